@@ -0,0 +1,49 @@
+'''
+scaling of the parallel hull-mesh generation (mesh_utils.parallel_map) with the
+number of worker processes, for the 'panels' and 'simple' hull of glider2d.json.
+Runs without FreeCAD:
+
+    python benchmarks/bench_cell_meshes.py [midribs]
+'''
+from __future__ import division, print_function
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from openglider import jsonify
+from freecad.freecad_glider import mesh_utils
+
+GLIDER_PATH = os.path.join(os.path.dirname(__file__), '..',
+                           'freecad', 'freecad_glider', 'glider2d.json')
+WORKERS = [1, 2, 4, 8]
+COMPUTE = {'panels': mesh_utils.panel_mesh_arrays, 'simple': mesh_utils.cell_mesh_arrays}
+
+
+def load_glider():
+    with open(GLIDER_PATH, 'r') as importfile:
+        return jsonify.load(importfile)['data'].get_glider_3d().copy_complete()
+
+
+def main(midribs=4):
+    glider = load_glider()
+    cells = range(len(glider.cells))
+    print('{} cells, midribs={}'.format(len(cells), midribs))
+    for name, compute in sorted(COMPUTE.items()):
+        reference = None
+        for num_workers in WORKERS:
+            executor = mesh_utils.get_executor(num_workers)
+            if executor is not None:
+                # start the processes before timing
+                mesh_utils.parallel_map(compute, glider, cells, midribs, executor=executor)
+            start = time.time()
+            mesh_utils.parallel_map(compute, glider, cells, midribs, executor=executor)
+            t = time.time() - start
+            reference = reference or t
+            print('{:>6} {} workers: {:8.1f} ms  speedup {:4.2f}'.format(
+                name, num_workers, t * 1000, reference / t))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,76 @@
+'''
+node count and frame time of the 'panels' hull: one separator per panel (as the
+lod hull still draws it), one merged vertex buffer per group of PANEL_GROUP_SIZE
+cells (draw_glider) and one merged vertex buffer for the whole hull.
+Needs FreeCAD with gui (offscreen rendering), run it from the python console:
+
+    exec(open('benchmarks/bench_hull_render.py').read())
+'''
+from __future__ import division, print_function
+import os
+import time
+
+from pivy import coin
+
+from openglider import jsonify
+from freecad.freecad_glider.tools import _glider
+
+GLIDER_PATH = os.path.join(os.path.dirname(_glider.__file__), '..', 'glider2d.json')
+
+
+def count_nodes(node):
+    if isinstance(node, coin.SoGroup):
+        return 1 + sum(count_nodes(child) for child in node)
+    return 1
+
+
+def frame_time(sep, frames=20, size=(1024, 768)):
+    root = coin.SoSeparator()
+    camera = coin.SoPerspectiveCamera()
+    root += [camera, coin.SoDirectionalLight(), sep]
+    viewport = coin.SbViewportRegion(*size)
+    camera.viewAll(root, viewport)
+    renderer = coin.SoOffscreenRenderer(viewport)
+    renderer.render(root)    # warm up (display lists / vbos)
+    start = time.time()
+    for _ in range(frames):
+        renderer.render(root)
+    return (time.time() - start) / frames
+
+
+def separate_panels(glider, midribs, keys):
+    sep = coin.SoSeparator()
+    for cell, key in zip(glider.cells, keys):
+        sep += [_glider.draw_panels_cell(cell, midribs, key)]
+    return sep
+
+
+def merged_panels(glider, midribs, keys, group_size=None):
+    cells = glider.cells
+    group_size = group_size or len(cells)
+    sep = coin.SoSeparator()
+    for first in range(0, len(cells), group_size):
+        sep += [_glider.draw_merged_panels(cells[first:first + group_size], midribs,
+                                           keys[first:first + group_size], first_cell=first)[0]]
+    return sep
+
+
+def grouped_panels(glider, midribs, keys):
+    return merged_panels(glider, midribs, keys, _glider.PANEL_GROUP_SIZE)
+
+
+def main(midribs=2, profile_num=30):
+    with open(GLIDER_PATH, 'r') as importfile:
+        glider = jsonify.load(importfile)['data'].get_glider_3d().copy_complete()
+    glider.profile_numpoints = profile_num
+    keys = [_glider.mesh_utils.cell_fingerprint(cell, 'panels', midribs, profile_num)
+            for cell in glider.cells]
+    for name, draw in [('per panel', separate_panels), ('grouped', grouped_panels),
+                       ('merged', merged_panels)]:
+        sep = draw(glider, midribs, keys)
+        print('{:>10}: {:6} nodes, {:8.2f} ms per frame'.format(
+            name, count_nodes(sep), frame_time(sep) * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+'''
+import time of the workbench: loading the tools package (what the workbench
+does on activation) against importing every tool module (what it did before
+the tool modules were loaded on first use). Every measurement runs in a fresh
+interpreter, FreeCAD / PySide / pivy are mocked if missing (see mock_gui.py):
+
+    python benchmarks/bench_import.py [repeat]
+'''
+from __future__ import division, print_function
+import os
+import subprocess
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPT = '''
+import sys, time
+sys.path[:0] = [{root!r}, {bench!r}]
+import mock_gui
+mock_gui.install()
+start = time.time()
+import freecad.freecad_glider.tools as tools
+for name in {modules!r}:
+    tools.load_tool_module(name)
+heavy = [m for m in ['openglider', 'paraBEM', 'scipy'] if m in sys.modules]
+print(time.time() - start, ','.join(heavy))
+'''
+
+
+def measure(modules, repeat, stderr=None):
+    script = SCRIPT.format(root=os.path.join(BENCH_DIR, '..'), bench=BENCH_DIR, modules=modules)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', script], stderr=stderr).decode().split()
+        times.append(float(out[0]))
+    return min(times), out[1] if len(out) > 1 else '-'
+
+
+def cases():
+    '''(name, tool modules loaded after the workbench)'''
+    sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+    import mock_gui
+    mock_gui.install()
+    from freecad.freecad_glider import tools
+    return [('workbench (lazy)', []),
+            ('glider object', ['_glider', 'features']),
+            ('all tool modules', tools.TOOL_MODULES)]
+
+
+def main(repeat=5):
+    print('{:<20} {:>10}  {}'.format('', 'time [ms]', 'heavy modules'))
+    for name, modules in cases():
+        t, heavy = measure(modules, repeat)
+        print('{:<20} {:>10.1f}  {}'.format(name, t * 1000, heavy))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,73 @@
+'''
+micro-benchmark for the mesh -> coin conversion used by mesh_sep.
+
+compares the old list based conversion with the numpy based one
+(freecad_glider.mesh_utils.mesh_arrays) on the panel meshes of the bundled
+glider2d.json. Runs without FreeCAD:
+
+    python benchmarks/bench_mesh_sep.py [midribs]
+'''
+from __future__ import division, print_function
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from openglider import jsonify
+from freecad.freecad_glider import mesh_utils
+
+GLIDER_PATH = os.path.join(os.path.dirname(__file__), '..',
+                           'freecad', 'freecad_glider', 'glider2d.json')
+
+
+def mesh_lists(mesh):
+    '''the conversion used by mesh_sep before the numpy path'''
+    vertices, polygons_grouped, _ = mesh.get_indexed()
+    polygons = sum(polygons_grouped.values(), [])
+    _vertices = [list(v) for v in vertices]
+    _polygons = []
+    _lines = []
+    for i in polygons:
+        _polygons += i
+        _lines += i
+        _lines.append(i[0])
+        _polygons.append(-1)
+        _lines.append(-1)
+    return _vertices, list(_polygons), list(_lines)
+
+
+def panel_meshes(glider, midribs=0):
+    return [panel.get_mesh(cell, midribs, with_numpy=True)
+            for cell in glider.cells for panel in cell.panels]
+
+
+CONVERSIONS = {'lists': mesh_lists, 'numpy': mesh_utils.mesh_arrays}
+
+
+def load_meshes(midribs=0):
+    with open(GLIDER_PATH, 'r') as importfile:
+        glider = jsonify.load(importfile)['data'].get_glider_3d().copy_complete()
+    return panel_meshes(glider, midribs)
+
+
+def check(meshes):
+    for m in meshes:
+        vertices, faces, lines = mesh_lists(m)
+        _vertices, _faces, _lines = mesh_utils.mesh_arrays(m)
+        assert faces == _faces.tolist()
+        assert lines == _lines.tolist()
+        assert len(vertices) == len(_vertices)
+
+
+def main(midribs=0, number=5):
+    meshes = load_meshes(midribs)
+    check(meshes)
+    print('{} panel meshes, midribs={}'.format(len(meshes), midribs))
+    for name, func in CONVERSIONS.items():
+        t = min(timeit.repeat(lambda: [func(m) for m in meshes], number=number, repeat=3))
+        print('{:>6}: {:8.2f} ms per redraw'.format(name, t / number * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
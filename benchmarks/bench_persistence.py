@@ -0,0 +1,52 @@
+'''
+save / load time and size of the glider state in the FreeCAD document: json
+(older versions) against the compact npz format (persistence.py). The state is
+passed through json.dumps / json.loads as FreeCAD does. Runs without FreeCAD:
+
+    python benchmarks/bench_persistence.py [glider.json]
+'''
+from __future__ import division, print_function
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from openglider import jsonify
+from freecad.freecad_glider import batch
+from freecad.freecad_glider import persistence
+
+GLIDER_PATH = os.path.join(os.path.dirname(__file__), '..',
+                           'freecad', 'freecad_glider', 'glider2d.json')
+
+
+FORMATS = {'json': False, 'npz': True}    # name -> compact
+
+
+def save_load(parametric_glider, compact):
+    '''save and load function of the document state, and the saved document'''
+    def save():
+        return json.dumps(persistence.dump_state(parametric_glider, compact=compact))
+    document = save()
+
+    def load():
+        return persistence.load_state(json.loads(document))
+    return save, load, document
+
+
+def main(path=GLIDER_PATH, number=10):
+    parametric_glider = batch.load_parametric_glider(path)
+    reference = json.loads(jsonify.dumps(parametric_glider))['data']
+    print('{:<8} {:>10} {:>10} {:>10}'.format('format', 'save [ms]', 'load [ms]', 'size [kB]'))
+    for name, compact in sorted(FORMATS.items()):
+        save, load, document = save_load(parametric_glider, compact)
+        assert json.loads(jsonify.dumps(load()))['data'] == reference
+        t_save = min(timeit.repeat(save, number=number, repeat=3)) / number
+        t_load = min(timeit.repeat(load, number=number, repeat=3)) / number
+        print('{:<8} {:>10.2f} {:>10.2f} {:>10.1f}'.format(
+            name, t_save * 1000, t_load * 1000, len(document) / 1024))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,222 @@
+'''
+stand-ins for FreeCAD, FreeCADGui, PySide and pivy.coin, so the drawing code of
+the workbench (tools/_glider.py) can be benchmarked without FreeCAD.
+
+only missing modules are replaced (install()). The mocked coin keeps the scene
+graph structure and copies the data passed to the fields (as coin does), but
+does not render anything: timings measure the python side of the draw functions.
+'''
+from __future__ import division, print_function
+import sys
+import types
+
+import numpy as np
+
+
+class _AnyMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return 0    # enums and constants: coin.SoShapeHints.COUNTERCLOCKWISE, ...
+
+
+class Any(_AnyMeta('_AnyBase', (object,), {})):
+    '''accepts every call and attribute access'''
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Any()
+
+    def __call__(self, *args, **kwargs):
+        return Any()
+
+
+class StubModule(types.ModuleType):
+    '''every missing attribute is a new subclass of Any (usable as base class)'''
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        cls = type(name, (Any,), {})
+        setattr(self, name, cls)
+        return cls
+
+
+# coin ##################################################################################
+
+class Field(object):
+    def __init__(self):
+        self.values = None
+
+    def setValues(self, start, num, values):
+        self.values = np.array(values)
+
+    def setValue(self, *value):
+        self.values = value[0] if len(value) == 1 else value
+
+    def getValue(self):
+        return self.values
+
+    def __call__(self, *args, **kwargs):
+        return self.values
+
+
+class SoNode(Any):
+    '''fields are created on first access, assignments set the field value'''
+    def __init__(self, *args, **kwargs):
+        object.__setattr__(self, '_name', '')
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        field = Field()
+        object.__setattr__(self, name, field)
+        return field
+
+    def __setattr__(self, name, value):
+        field = self.__dict__.get(name)
+        if isinstance(field, Field) and not isinstance(value, Field):
+            field.setValue(value)
+        else:
+            object.__setattr__(self, name, value)
+
+    def setName(self, name):
+        object.__setattr__(self, '_name', name)
+
+    def getName(self):
+        return self._name
+
+    def isOfType(self, type_id):
+        return False
+
+
+class SoGroup(SoNode):
+    def __init__(self, *args, **kwargs):
+        super(SoGroup, self).__init__()
+        object.__setattr__(self, '_children', [])
+
+    def addChild(self, child):
+        self._children.append(child)
+
+    def __iadd__(self, other):
+        for child in (other if isinstance(other, (list, tuple)) else [other]):
+            self.addChild(child)
+        return self
+
+    def removeChild(self, child):
+        if isinstance(child, int):
+            del self._children[child]
+        elif child in self._children:
+            self._children.remove(child)
+
+    def removeAllChildren(self):
+        del self._children[:]
+
+    def replaceChild(self, index, child):
+        self._children[index] = child
+
+    def getNumChildren(self):
+        return len(self._children)
+
+    def getByName(self, name):
+        for child in self._children:
+            if child.getName() == name:
+                return child
+        return None
+
+    def __len__(self):
+        return len(self._children)
+
+    def __iter__(self):
+        return iter(list(self._children))
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+
+class _CoinModule(types.ModuleType):
+    '''nodes and values which are not defined (SoMaterial, SbVec3f, ...) are plain nodes'''
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name.startswith(('So', 'Sb')):
+            value = type(name, (SoNode,), {})
+        else:
+            value = -1    # SO_SWITCH_ALL, SO_SWITCH_NONE, ...
+        setattr(self, name, value)
+        return value
+
+
+def _mock_coin():
+    coin = _CoinModule('pivy.coin')
+    coin.SoNode = SoNode
+    coin.SoGroup = SoGroup
+    for name in ['SoSeparator', 'SoSwitch', 'SoLevelOfDetail', 'SoLOD', 'SoSelection']:
+        setattr(coin, name, type(name, (SoGroup,), {}))
+    coin.cast = lambda obj, type_name: obj
+    return coin
+
+
+# FreeCAD ###############################################################################
+
+class _Parameters(object):
+    def __init__(self, *args):
+        pass
+
+    def GetBool(self, name, default=False):
+        return default
+
+    def GetInt(self, name, default=0):
+        return default
+
+    def GetFloat(self, name, default=0.):
+        return default
+
+    def GetString(self, name, default=''):
+        return default
+
+
+def _mock_freecad():
+    freecad = StubModule('FreeCAD')
+    freecad.GuiUp = False
+    freecad.ActiveDocument = None
+    freecad.ParamGet = _Parameters
+    freecad.Console = Any()
+    freecad.getUserAppDataDir = lambda: '.'
+    return freecad
+
+
+def _missing(name):
+    try:
+        __import__(name)
+        return False
+    except ImportError:
+        return True
+
+
+def install():
+    '''
+    installs the stand-ins of all gui modules which can not be imported.
+    returns the names of the mocked modules.
+    '''
+    mocked = []
+    if _missing('FreeCAD'):
+        sys.modules['FreeCAD'] = _mock_freecad()
+        mocked.append('FreeCAD')
+    if _missing('FreeCADGui'):
+        sys.modules['FreeCADGui'] = StubModule('FreeCADGui')
+        mocked.append('FreeCADGui')
+    if _missing('PySide'):
+        pyside = StubModule('PySide')
+        pyside.QtCore = sys.modules['PySide.QtCore'] = StubModule('PySide.QtCore')
+        pyside.QtGui = sys.modules['PySide.QtGui'] = StubModule('PySide.QtGui')
+        sys.modules['PySide'] = pyside
+        mocked.append('PySide')
+    if _missing('pivy.coin'):
+        pivy = StubModule('pivy')
+        pivy.coin = sys.modules['pivy.coin'] = _mock_coin()
+        sys.modules['pivy'] = pivy
+        mocked.append('pivy.coin')
+    return mocked
@@ -0,0 +1,415 @@
+'''
+benchmark suite of the build, draw and export paths. Runs without FreeCAD:
+if FreeCAD, PySide or pivy are missing the draw functions work on a mocked
+scene graph (see mock_gui.py). Benchmarks which need a missing module
+(openglider, paraBEM) are skipped. The single benchmark scripts
+(bench_*.py) print more details, the suite reuses their code.
+
+    python benchmarks/suite.py                      # run, compare with baseline.json
+    python benchmarks/suite.py -k draw --quick      # only benchmarks containing 'draw'
+    python benchmarks/suite.py --save-baseline      # store the results as new baseline
+
+the results are written to benchmarks/results/<date>.json. Benchmarks which are
+more than --threshold slower than the baseline are reported as regressions
+(exit code 1).
+
+No baseline is committed: timings depend on the machine and on the installed
+modules. Record one on the machine used for the comparison, with openglider,
+paraBEM, FreeCAD and pivy installed (the mocked modules are listed in the
+output and in 'meta' of the result file), before the change to measure:
+
+    git stash; python benchmarks/suite.py --save-baseline; git stash pop
+    python benchmarks/suite.py
+'''
+from __future__ import division, print_function
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import atexit
+import tempfile
+import timeit
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+sys.path.insert(0, BENCH_DIR)
+
+import mock_gui
+
+MOCKED = mock_gui.install()
+
+from freecad.freecad_glider import batch
+from freecad.freecad_glider import mesh_utils
+from freecad.freecad_glider import polar_sweep
+
+GLIDER_PATH = os.path.join(BENCH_DIR, '..', 'freecad', 'freecad_glider', 'glider2d.json')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+PROFILE_NUM = [20, 50]
+MIDRIBS = [0, 4]
+
+# name -> (list of parameter grids, setup function)
+BENCHMARKS = []
+
+
+def benchmark(*grids):
+    '''
+    registers a benchmark. The decorated function gets the parameters of one
+    combination of a grid (dict: name -> values) and returns the function to time.
+    A function marked with self_timed returns its time [s] itself.
+    '''
+    def decorator(setup):
+        BENCHMARKS.append((setup.__name__, grids or ({},), setup))
+        return setup
+    return decorator
+
+
+def self_timed(func):
+    func.self_timed = True
+    return func
+
+
+def temp_dir():
+    '''temporary directory, removed at exit'''
+    path = tempfile.mkdtemp(prefix='glider_bench_')
+    atexit.register(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def gui():
+    '''tools/_glider.py (needs openglider)'''
+    from freecad.freecad_glider.tools import _glider
+    return _glider
+
+
+_gliders = {}
+
+
+def parametric_glider():
+    from openglider import jsonify
+    if 'parametric' not in _gliders:
+        with open(GLIDER_PATH, 'r') as importfile:
+            _gliders['parametric'] = jsonify.load(importfile)['data']
+    return _gliders['parametric']
+
+
+def glider_3d():
+    if '3d' not in _gliders:
+        _gliders['3d'] = parametric_glider().get_glider_3d()
+    return _gliders['3d']
+
+
+def glider_complete(profile_num=None):
+    '''both halves of the glider, with profile_num points per profile'''
+    if ('complete', profile_num) not in _gliders:
+        glider = glider_3d().copy_complete()
+        if profile_num is not None:
+            glider.profile_numpoints = profile_num
+        _gliders['complete', profile_num] = glider
+    return _gliders['complete', profile_num]
+
+
+# benchmarks ############################################################################
+
+@benchmark()
+def load_json():
+    from openglider import jsonify
+
+    def run():
+        with open(GLIDER_PATH, 'r') as importfile:
+            jsonify.load(importfile)
+    return run
+
+
+@benchmark()
+def get_glider_3d():
+    return parametric_glider().get_glider_3d
+
+
+@benchmark()
+def copy_complete():
+    return glider_3d().copy_complete
+
+
+@benchmark({'hull': ['panels', 'simple'], 'profile_num': PROFILE_NUM, 'midribs': MIDRIBS},
+           {'hull': ['smooth'], 'profile_num': PROFILE_NUM},
+           {'hull': ['lod']})
+def draw_glider(hull, profile_num=20, midribs=0):
+    '''the hull of draw_glider without any cached mesh'''
+    _glider = gui()
+    glider = glider_complete(profile_num)
+
+    def run():
+        _glider.mesh_cache.clear()
+        vis_glider = _glider.coin.SoSeparator()
+        _glider.draw_glider(glider, vis_glider, midribs=midribs, profile_num=profile_num,
+                            hull=hull, draw_cache=_glider.DrawCache())
+    return run
+
+
+@benchmark({'profile_num': PROFILE_NUM, 'midribs': MIDRIBS})
+def draw_glider_cached(profile_num, midribs):
+    '''redraw of an unchanged glider ('panels' hull, all meshes cached)'''
+    _glider = gui()
+    glider = glider_complete(profile_num)
+    vis_glider = _glider.coin.SoSeparator()
+    draw_cache = _glider.DrawCache()
+    _glider.mesh_cache.clear()
+    _glider.draw_glider(glider, vis_glider, midribs=midribs, profile_num=profile_num,
+                        draw_cache=draw_cache)
+
+    def run():
+        _glider.draw_glider(glider, vis_glider, midribs=midribs, profile_num=profile_num,
+                            draw_cache=draw_cache)
+    return run
+
+
+@benchmark({'profile_num': PROFILE_NUM, 'midribs': MIDRIBS})
+def mesh_sep(profile_num, midribs):
+    '''mesh -> scene graph conversion of all panel meshes'''
+    import bench_mesh_sep
+    _glider = gui()
+    meshes = bench_mesh_sep.panel_meshes(glider_complete(profile_num), midribs)
+
+    def run():
+        for m in meshes:
+            _glider.mesh_sep(m, (.8, .8, .8), draw_lines=True)
+    return run
+
+
+@benchmark({'conversion': ['lists', 'numpy'], 'midribs': MIDRIBS})
+def mesh_arrays(conversion, midribs):
+    '''mesh -> index arrays of all panel meshes (bench_mesh_sep.py)'''
+    import bench_mesh_sep
+    meshes = bench_mesh_sep.panel_meshes(glider_complete(), midribs)
+    convert = bench_mesh_sep.CONVERSIONS[conversion]
+
+    def run():
+        for m in meshes:
+            convert(m)
+    return run
+
+
+@benchmark({'hull': ['panels', 'simple'], 'workers': [1, 4]})
+def cell_meshes(hull, workers, midribs=4):
+    '''hull meshes of all cells in the process pool (bench_cell_meshes.py)'''
+    import bench_cell_meshes
+    glider = glider_complete()
+    cells = list(range(len(glider.cells)))
+    compute = bench_cell_meshes.COMPUTE[hull]
+    executor = mesh_utils.get_executor(workers)
+
+    def run():
+        mesh_utils.parallel_map(compute, glider, cells, midribs, executor=executor)
+    return run
+
+
+@benchmark({'profile_num': PROFILE_NUM})
+def rib_triangulation(profile_num):
+    glider = glider_complete(profile_num)
+    ribs = [i for i, rib in enumerate(glider.ribs) if not rib.profile_2d.has_zero_thickness]
+
+    def run():
+        mesh_utils.rib_mesh_arrays(glider, ribs, 10, True)
+    return run
+
+
+@benchmark({'profile_num': PROFILE_NUM, 'midribs': MIDRIBS})
+def parabem_panels(profile_num, midribs):
+    from openglider.glider.in_out.export_3d import paraBEM_Panels
+    from openglider.utils.distribution import Distribution
+    import paraBEM    # skip the benchmark if paraBEM is missing
+    glider = glider_3d()
+
+    def run():
+        paraBEM_Panels(glider, midribs=midribs, profile_numpoints=profile_num, num_average=4,
+                       distribution=Distribution.from_nose_cos_distribution(0.2),
+                       symmetric=True)
+    return run
+
+
+@benchmark({'num_vertices': [10000, 100000]})
+def cp_colors(num_vertices):
+    '''pressure colors of the panel method result (min_val / max_val dragged)'''
+    cp = np.random.RandomState(0).uniform(-4, 2, num_vertices)
+    colors = [(1., 0., 0.), (0., 1., 0.), (1., 1., 1.), (0., 0., 1.)]
+
+    def run():
+        mesh_utils.pack_rgba(mesh_utils.colormap(cp, -3, 1, colors))
+    return run
+
+
+@benchmark({'num_alpha': [20, 200]})
+def polar_performance(num_alpha, area=25.):
+    '''speed polar and trim point of a potential table (re-evaluated while dragging)'''
+    table = np.zeros(num_alpha, dtype=polar_sweep.TABLE_DTYPE)
+    table['alpha'] = np.radians(np.linspace(2, 15, num_alpha))
+    table['cL'] = np.linspace(0.3, 1.2, num_alpha)
+    table['cDi'] = 0.02 * table['cL']**2
+
+    def run():
+        polar_sweep.trim_point(polar_sweep.performance(table, area, 1.5))
+    return run
+
+
+@benchmark({'export': batch.EXPORTS_2D + batch.EXPORTS_3D})
+def exports(export):
+    '''the exports of the batch processing (batch.export_glider)'''
+    parametric, glider = parametric_glider(), glider_3d()
+    out_dir = temp_dir()
+
+    def run():
+        batch.export_glider(parametric, glider, export, os.path.join(out_dir, 'glider'))
+    return run
+
+
+@benchmark({'format': ['json', 'npz'], 'step': ['save', 'load']})
+def persistence(format, step):
+    '''glider state in the FreeCAD document (bench_persistence.py)'''
+    import bench_persistence
+    save, load, _ = bench_persistence.save_load(parametric_glider(), bench_persistence.FORMATS[format])
+    return {'save': save, 'load': load}[step]
+
+
+@benchmark({'case': [0, 1, 2]})
+def import_time(case):
+    '''import time of the workbench in a new interpreter (bench_import.py, 0: lazy)'''
+    import bench_import
+    modules = bench_import.cases()[case][1]
+    try:
+        bench_import.measure(modules, 1, stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError:
+        raise ImportError('the import failed (openglider missing?)')
+
+    @self_timed
+    def run():
+        return bench_import.measure(modules, 1)[0]
+    return run
+
+
+@benchmark({'glider': ['parametric', '3d']})
+def jsonify_roundtrip(glider):
+    from openglider import jsonify
+    obj = parametric_glider() if glider == 'parametric' else glider_3d()
+
+    def run():
+        jsonify.loads(jsonify.dumps(obj))
+    return run
+
+
+# runner ################################################################################
+
+def combinations(grid):
+    names = sorted(grid)
+    for values in itertools.product(*[grid[name] for name in names]):
+        yield dict(zip(names, values))
+
+
+def bench_name(name, params):
+    if not params:
+        return name
+    return '{}[{}]'.format(name, ','.join('{}={}'.format(k, params[k]) for k in sorted(params)))
+
+
+def run_benchmarks(name_filter=None, repeat=3, quick=False):
+    results = {}
+    for name, grids, setup in BENCHMARKS:
+        for grid in grids:
+            if quick:
+                grid = {key: values[:1] for key, values in grid.items()}
+            for params in combinations(grid):
+                full_name = bench_name(name, params)
+                if name_filter and name_filter not in full_name:
+                    continue
+                try:
+                    func = setup(**params)
+                except ImportError as e:
+                    print('{:<60} skipped ({})'.format(full_name, e))
+                    continue
+                func()    # warm up (imports, lazy initialisation)
+                if getattr(func, 'self_timed', False):
+                    times = [func() for _ in range(repeat)]
+                else:
+                    times = timeit.repeat(func, number=1, repeat=repeat)
+                results[full_name] = {'min': min(times), 'mean': sum(times) / len(times),
+                                      'times': times, 'params': params}
+                print('{:<60} {:10.2f} ms'.format(full_name, min(times) * 1000))
+                sys.stdout.flush()
+    return results
+
+
+def compare(results, baseline, threshold=0.2):
+    '''prints the ratio to the baseline, returns the names of the regressions'''
+    regressions = []
+    print('\n{:<60} {:>10} {:>10} {:>7}'.format('compared to baseline', 'base [ms]', 'now [ms]', 'ratio'))
+    for name in sorted(results):
+        if name not in baseline['results']:
+            continue
+        base = baseline['results'][name]['min']
+        now = results[name]['min']
+        ratio = now / base if base else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = 'SLOWER'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = 'faster'
+        print('{:<60} {:10.2f} {:10.2f} {:7.2f} {}'.format(name, base * 1000, now * 1000, ratio, flag))
+    if baseline['meta'].get('mocked') != MOCKED:
+        print('warning: the baseline was recorded with other mocked modules: {}'.format(
+            baseline['meta'].get('mocked')))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='benchmarks of the freecad_glider hot paths')
+    parser.add_argument('-k', dest='filter', help='only run benchmarks whose name contains this')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='timings per benchmark (min is used)')
+    parser.add_argument('-o', '--out', help='result file (default: results/<date>.json)')
+    parser.add_argument('--quick', action='store_true', help='only the first value of every parameter')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as baseline')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown reported as regression')
+    args = parser.parse_args(argv)
+
+    if MOCKED:
+        print('mocked modules: {}\n'.format(', '.join(MOCKED)))
+    results = run_benchmarks(args.filter, args.repeat, args.quick)
+    now = datetime.datetime.now()
+    output = {'meta': {'date': now.isoformat(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'mocked': MOCKED},
+              'results': results}
+
+    out = args.out
+    if out is None:
+        if not os.path.isdir(RESULTS_DIR):
+            os.makedirs(RESULTS_DIR)
+        out = os.path.join(RESULTS_DIR, now.strftime('%Y-%m-%d_%H%M%S.json'))
+    with open(out, 'w') as outfile:
+        json.dump(output, outfile, indent=2)
+    print('\nresults written to {}'.format(out))
+
+    regressions = []
+    if args.save_baseline:
+        shutil.copy(out, args.baseline)
+        print('baseline saved to {}'.format(args.baseline))
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as infile:
+            regressions = compare(results, json.load(infile), args.threshold)
+        print('{} regressions'.format(len(regressions)))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+'''
+headless batch processing of glider files (no FreeCAD needed):
+
+    freecad_glider <directory or manifest> [-o OUT] [-e json,obj,patterns] [-w WORKERS]
+
+for every .json / .ods glider the 3d glider is built and the requested exports
+are written to the output directory (named by the path relative to the common
+directory of the gliders, see output_names). A manifest is a text file with one glider
+file per line (relative to the manifest, '#' starts a comment).
+'''
+from __future__ import division, print_function
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import sys
+import time
+import traceback
+
+GLIDER_EXTENSIONS = ('.json', '.ods')
+
+# 2d exports of the parametric glider, 3d exports of the glider instance (Glider.export_3d)
+EXPORTS_2D = ['json', 'ods']
+EXPORTS_3D = ['obj', 'dxf', 'apame']
+EXPORTS = EXPORTS_2D + EXPORTS_3D + ['patterns']
+
+# every worker process holds a whole glider, so don't use all cores by default
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def load_parametric_glider(path):
+    '''reads a parametric glider from a .json or .ods file'''
+    from openglider import jsonify
+    from openglider.glider import ParametricGlider
+    if path.endswith('.json'):
+        with open(path, 'r') as importfile:
+            return jsonify.load(importfile)['data']
+    elif path.endswith('.ods'):
+        return ParametricGlider.import_ods(path)
+    raise ValueError('only .ods and .json are supported: {}'.format(path))
+
+
+def find_gliders(source):
+    '''glider files of a directory or a manifest'''
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name) for name in os.listdir(source)
+                      if name.endswith(GLIDER_EXTENSIONS))
+    if source.endswith(GLIDER_EXTENSIONS):
+        return [source]
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, 'r') as manifest:
+        for line in manifest:
+            line = line.split('#')[0].strip()
+            if line:
+                paths.append(os.path.join(base, line))
+    return paths
+
+
+def output_names(paths):
+    '''
+    unique names of the glider files for the output: the path relative to the
+    common directory without the extension, directories joined with '_'.
+    Files which only differ in the extension keep it (a_json, a_ods).
+    '''
+    paths = [os.path.abspath(path) for path in paths]
+    if not paths:
+        return []
+    base = os.path.commonpath([os.path.dirname(path) for path in paths])
+    names = [os.path.splitext(os.path.relpath(path, base))[0].replace(os.sep, '_') for path in paths]
+    counts = collections.Counter(names)
+    names = [name + '_' + os.path.splitext(path)[1][1:] if counts[name] > 1 else name
+             for name, path in zip(names, paths)]
+    duplicates = sorted(name for name, count in collections.Counter(names).items() if count > 1)
+    if duplicates:
+        raise ValueError('gliders with the same output name: {}'.format(', '.join(duplicates)))
+    return names
+
+
+def output_files(out, exports):
+    '''files (or directories) written by process_glider for the output prefix out'''
+    return [out + '_patterns' if export == 'patterns' else out + '.' + export for export in exports]
+
+
+def export_glider(parametric_glider, glider_3d, export, out):
+    '''writes one export (see EXPORTS) of a glider, out: output path without the extension'''
+    from openglider import jsonify
+    if export == 'json':
+        with open(out + '.json', 'w') as outfile:
+            jsonify.dump(parametric_glider, outfile)
+    elif export == 'ods':
+        parametric_glider.export_ods(out + '.ods')
+    elif export in EXPORTS_3D:
+        glider_3d.export_3d(out + '.' + export)
+    elif export == 'patterns':
+        from openglider import plots
+        plots.Patterns(parametric_glider).unwrap(out + '_patterns', glider_3d)
+    else:
+        raise ValueError('unknown export: {}'.format(export))
+
+
+def process_glider(path, out, exports):
+    '''
+    builds the 3d glider and writes the exports (out: output path without the
+    extension). Returns a dict with the timings of every step [s] (runs in the
+    worker processes)
+    '''
+    result = {'file': path, 'timings': {}, 'error': None}
+    timings = result['timings']
+
+    def step(step_name, func, *args):
+        start = time.time()
+        value = func(*args)
+        timings[step_name] = time.time() - start
+        return value
+
+    try:
+        parametric_glider = step('load', load_parametric_glider, path)
+        glider_3d = step('glider_3d', parametric_glider.get_glider_3d)
+        for export in exports:
+            step(export, export_glider, parametric_glider, glider_3d, export, out)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    timings['total'] = sum(timings.values())
+    return result
+
+
+def run(paths, out_dir, exports, workers=1):
+    '''processes the gliders (in parallel if workers > 1) and yields the results'''
+    outs = [os.path.join(out_dir, name) for name in output_names(paths)]
+    if workers > 1 and len(paths) > 1:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(process_glider, path, out, exports)
+                       for path, out in zip(paths, outs)]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+    else:
+        for path, out in zip(paths, outs):
+            yield process_glider(path, out, exports)
+
+
+def format_result(result, exports):
+    timings = result['timings']
+    columns = ['load', 'glider_3d'] + list(exports) + ['total']
+    values = ['{:>10.2f}'.format(timings[c]) if c in timings else '{:>10}'.format('-')
+              for c in columns]
+    status = 'ok' if result['error'] is None else 'FAILED'
+    return '{:<32} {} {:>7}'.format(os.path.basename(result['file'])[:32], ' '.join(values), status)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='build and export many gliders without the gui')
+    parser.add_argument('source', help='directory, manifest or glider file (.json, .ods)')
+    parser.add_argument('-o', '--out', default='.', help='output directory')
+    parser.add_argument('-e', '--exports', default='obj',
+                        help='comma separated list of: ' + ', '.join(EXPORTS))
+    parser.add_argument('-w', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help='number of worker processes (default: {})'.format(DEFAULT_WORKERS))
+    parser.add_argument('--report', help='write the timings to this json file')
+    args = parser.parse_args(argv)
+
+    exports = [e for e in args.exports.split(',') if e]
+    unknown = [e for e in exports if e not in EXPORTS]
+    if unknown:
+        parser.error('unknown exports: {}'.format(', '.join(unknown)))
+    if not os.path.exists(args.source):
+        parser.error('no such file or directory: {}'.format(args.source))
+    paths = find_gliders(args.source)
+    try:
+        names = output_names(paths)
+    except ValueError as e:
+        parser.error(str(e))
+    sources = set(os.path.abspath(path) for path in paths)
+    for name in names:
+        for path in output_files(os.path.join(args.out, name), exports):
+            if os.path.abspath(path) in sources:
+                parser.error('the export would overwrite the glider file {}'.format(path))
+    if not os.path.isdir(args.out):
+        os.makedirs(args.out)
+
+    columns = ['load', 'glider_3d'] + exports + ['total']
+    print('{:<32} {} {:>7}'.format('file [s]', ' '.join('{:>10}'.format(c[:10]) for c in columns), ''))
+    start = time.time()
+    results = []
+    for result in run(paths, args.out, exports, args.workers):
+        results.append(result)
+        print(format_result(result, exports))
+        sys.stdout.flush()
+    failed = [r for r in results if r['error'] is not None]
+    for result in failed:
+        print('\n{}:\n{}'.format(result['file'], result['error']), file=sys.stderr)
+    print('{} gliders, {} failed, {:.1f} s'.format(len(results), len(failed), time.time() - start))
+
+    if args.report:
+        with open(args.report, 'w') as report:
+            json.dump(results, report, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+'''
+on-disk cache of the 3d glider and its meshes, stored next to the document:
+
+    <document>.glider_cache/<object name>_<key>.glider.npz    3d glider (persistence.py)
+    <document>.glider_cache/<object name>_<key>.meshes.npz    mesh_cache entries
+
+key is a hash of the content of the saved ParametricGlider, so a cache is only
+used if the parametric glider didn't change since it was written. Reading a
+broken or outdated cache is not an error, the glider is recomputed instead.
+'''
+from __future__ import division
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import warnings
+import zipfile
+
+import numpy as np
+
+from . import persistence
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+KINDS = ['glider', 'meshes']
+
+# a broken or outdated file, everything else is reported
+READ_ERRORS = (IOError, OSError, ValueError, KeyError, EOFError, zipfile.BadZipfile)
+
+
+def state_key(data):
+    '''
+    hash of the serialized ParametricGlider (json string or compact state). It hashes
+    the json skeleton and the arrays of the glider (see persistence.pack_tree), not
+    the npz archive, which has the time it was written. Only the 'data' of the
+    jsonify-tree is used, its metadata can contain dates too. Both formats of a
+    glider give the same key.
+    '''
+    if isinstance(data, str):
+        skeleton, arrays = persistence.pack_tree(json.loads(data))
+    else:
+        skeleton, arrays = persistence.read_archive(io.BytesIO(base64.b64decode(data['data'])))
+    if isinstance(skeleton, dict) and 'data' in skeleton:
+        skeleton = skeleton['data']
+    sha = hashlib.sha1(json.dumps(skeleton, sort_keys=True).encode('utf-8'))
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        sha.update('{} {}'.format(array.dtype.str, array.shape).encode('ascii'))
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+def cache_dir(document_path):
+    '''the cache directory of a document, None for unsaved documents'''
+    if not document_path:
+        return None
+    return os.path.splitext(document_path)[0] + '.glider_cache'
+
+
+def _path(directory, name, key, kind):
+    return os.path.join(directory, '{}_{}.{}.npz'.format(name, key, kind))
+
+
+def cache_files(directory, name):
+    '''{file name: key} of all cache files of the glider object name'''
+    pattern = re.compile(r'{}_([0-9a-f]{{40}})\.({})\.npz$'.format(re.escape(name), '|'.join(KINDS)))
+    files = {}
+    for file_name in os.listdir(directory):
+        match = pattern.match(file_name)
+        if match:
+            files[file_name] = match.group(1)
+    return files
+
+
+def pack_value(value, arrays):
+    '''nested lists / tuples of arrays, strings and numbers -> json skeleton'''
+    if isinstance(value, np.ndarray):
+        arrays.append(value)
+        return {'__array__': len(arrays) - 1}
+    elif isinstance(value, tuple):
+        return {'__tuple__': [pack_value(item, arrays) for item in value]}
+    elif isinstance(value, list):
+        return [pack_value(item, arrays) for item in value]
+    return value
+
+
+def unpack_value(skeleton, arrays):
+    if isinstance(skeleton, dict):
+        if '__array__' in skeleton:
+            return arrays[skeleton['__array__']]
+        return tuple(unpack_value(item, arrays) for item in skeleton['__tuple__'])
+    elif isinstance(skeleton, list):
+        return [unpack_value(item, arrays) for item in skeleton]
+    return skeleton
+
+
+def save(directory, name, key, glider_3d, meshes=None):
+    '''
+    writes the 3d glider and the meshes ({mesh_cache key: arrays}) of the glider
+    object name. Older caches of the object are removed.
+    '''
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for file_name, file_key in cache_files(directory, name).items():
+        if file_key != key:
+            os.remove(os.path.join(directory, file_name))
+
+    glider_path = _path(directory, name, key, 'glider')
+    if not os.path.exists(glider_path):
+        with open(glider_path, 'wb') as outfile:
+            outfile.write(persistence.dump_bytes(glider_3d))
+    if meshes:
+        arrays = []
+        skeleton = {mesh_key: pack_value(value, arrays) for mesh_key, value in meshes.items()}
+        with open(_path(directory, name, key, 'meshes'), 'wb') as outfile:
+            persistence.write_archive(outfile, skeleton, arrays)
+
+
+def _read(path, read):
+    '''read(data) of the file, None if it is missing, broken or can't be read'''
+    try:
+        with open(path, 'rb') as infile:
+            return read(infile.read())
+    except READ_ERRORS:
+        return None
+    except Exception as e:
+        warnings.warn('glider cache {} not read: {!r}'.format(path, e), RuntimeWarning)
+        return None
+
+
+def _read_meshes(data):
+    skeleton, arrays = persistence.read_archive(io.BytesIO(data))
+    return {mesh_key: unpack_value(value, arrays) for mesh_key, value in skeleton.items()}
+
+
+def load(directory, name, key):
+    '''returns (3d glider or None, {mesh_cache key: arrays})'''
+    glider_3d = _read(_path(directory, name, key, 'glider'), persistence.load_bytes)
+    if glider_3d is None:
+        return None, {}
+    meshes = _read(_path(directory, name, key, 'meshes'), _read_meshes)
+    return glider_3d, meshes or {}
@@ -48,9 +48,8 @@ class activeGlider(object):
     def apply(self):
         self._update()
         if self._glider:
-            self.ParametricGlider.get_glider_3d(self.GliderInstance)
-            self.visuals.Proxy.updateData()
-            App.ActiveDocument.recompute()
+            # recomputes the glider_instance (in the background) and redraws the glider
+            self.glider.Proxy.setParametricGlider(self.ParametricGlider)
 
     def __repr__(self):
         if self.glider:
@@ -91,7 +91,9 @@ class gliderWorkbench(Gui.Workbench):
         'ViewCommand']
 
     devBox = [
-        'RefreshCommand']
+        'RefreshCommand',
+        'FeatureCacheCommand',
+        'ProfilingCommand']
 
 
     def GetClassName(self):
@@ -132,6 +134,8 @@ class gliderWorkbench(Gui.Workbench):
         Gui.addCommand('ViewCommand', tools.ViewCommand())
 
         Gui.addCommand('RefreshCommand', tools.RefreshCommand())
+        Gui.addCommand('FeatureCacheCommand', tools.FeatureCacheCommand())
+        Gui.addCommand('ProfilingCommand', tools.ProfilingCommand())
 
         self.appendToolbar('GliderTools', self.toolBox)
         self.appendToolbar('Production', self.productionBox)
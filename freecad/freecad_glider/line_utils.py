@@ -0,0 +1,182 @@
+from __future__ import division
+import collections
+import time
+
+import numpy as np
+
+from . import mesh_utils
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+# per-stage timings of the last line update and the totals [s]:
+#     from freecad.freecad_glider import line_utils
+#     print(line_utils.timing_report())
+STAGES = ['fingerprint', 'forces', 'sag', 'points']
+timings = {'last': {}, 'total': collections.Counter(), 'updates': 0, 'cached': 0}
+
+# whether recalc without sag + calc_sag gives the same lines as recalc with sag
+# (None: not checked yet, see recalc)
+_split_sag = None
+
+
+def _node_data(node):
+    '''
+    the inputs of recalc for a node: the rib geometry of attachment points (recalc
+    moves them onto the rib), the position of lower nodes. The position of
+    intermediate nodes is computed by recalc.
+    '''
+    node_type = getattr(node, 'type', None)
+    rib = getattr(node, 'rib', None)
+    if rib is not None:
+        position = (np.asarray(rib.profile_3d.data, dtype=float), getattr(node, 'rib_pos', None))
+    elif node_type == 1:
+        position = None
+    else:
+        position = np.asarray(node.vec, dtype=float)
+    return node_type, position, getattr(node, 'force', None)
+
+
+def lineset_fingerprint(lineset, *args):
+    '''
+    hash of the inputs of lineset.recalc (topology, rib geometry of the attachment
+    points, lower nodes, line types, lengths, forces) + additional arguments. It
+    doesn't use anything recalc computes, so it can be taken before recalc:
+    equal fingerprints give equal forces and sag.
+    '''
+    nodes = []
+    node_ids = {}
+    for line in lineset.lines:
+        for node in (line.lower_node, line.upper_node):
+            if id(node) not in node_ids:
+                node_ids[id(node)] = len(nodes)
+                nodes.append(node)
+    node_data = [_node_data(node) for node in nodes]
+    line_data = [(node_ids[id(line.lower_node)], node_ids[id(line.upper_node)],
+                  getattr(line.line_type, 'name', line.line_type),
+                  getattr(line, 'target_length', None))
+                 for line in lineset.lines]
+    return mesh_utils.fingerprint(node_data, line_data, getattr(lineset, 'v_inf', None), *args)
+
+
+def _line_state(lineset):
+    '''forces and sag parameters of all lines (nan for None)'''
+    values = []
+    for line in lineset.lines:
+        for value in (getattr(line, 'force', None), line.sag_par_1, line.sag_par_2):
+            values.extend([np.nan] if value is None else np.ravel(np.asarray(value, dtype=float)))
+    return np.array(values)
+
+
+def recalc(lineset, sag=True, stage_timings=None):
+    '''
+    lineset.recalc, timed in two stages: 'forces' is the recalc without sag (geometry
+    and forces), 'sag' the sag solve (calc_sag). The first call with sag checks the
+    split against lineset.recalc(calculate_sag=True); if they don't give the same
+    forces and sag parameters, the combined call is used and timed as 'forces'.
+    '''
+    global _split_sag
+    stage_timings = {} if stage_timings is None else stage_timings
+    split = sag and _split_sag is not False and hasattr(lineset, 'calc_sag')
+    start = time.time()
+    lineset.recalc(calculate_sag=sag and not split)
+    stage_timings['forces'] = time.time() - start
+    if split:
+        start = time.time()
+        lineset.calc_sag()
+        stage_timings['sag'] = time.time() - start
+        if _split_sag is None:
+            state = _line_state(lineset)
+            lineset.recalc(calculate_sag=True)
+            _split_sag = bool(np.allclose(state, _line_state(lineset), equal_nan=True))
+            if not _split_sag:
+                stage_timings.pop('sag')
+    return stage_timings
+
+
+def _sag_points(lines, x):
+    '''
+    straight line + sag u(x) along the ortho-vector of every line, evaluated for
+    all lines and points at once (same formula as Line.get_line_point)
+    '''
+    lower = np.array([line.lower_node.vec for line in lines], dtype=float)
+    upper = np.array([line.upper_node.vec for line in lines], dtype=float)
+    points = lower[:, None, :] * (1. - x)[None, :, None] + upper[:, None, :] * x[None, :, None]
+    sagged = [i for i, line in enumerate(lines)
+              if line.sag_par_1 is not None and line.sag_par_2 is not None]
+    if sagged:
+        sag_lines = [lines[i] for i in sagged]
+        ortho = np.array([line.ortho_vec for line in sag_lines], dtype=float)
+        length = np.array([line.length_projected for line in sag_lines], dtype=float)
+        load = np.array([line.lineload / line.force_projected for line in sag_lines], dtype=float)
+        par_1 = np.array([line.sag_par_1 for line in sag_lines], dtype=float)
+        par_2 = np.array([line.sag_par_2 for line in sag_lines], dtype=float)
+        xs = x[None, :] * length[:, None]
+        u = -xs ** 2 / 2 * load[:, None] + xs * par_1[:, None] + par_2[:, None]
+        points[sagged] += ortho[:, None, :] * u[:, :, None]
+    return points
+
+
+def line_points(lines, numpoints):
+    '''
+    the points of all lines (list of arrays with shape (numpoints, 3)).
+    uses the vectorized evaluation if it matches Line.get_line_points, else
+    falls back to sampling line by line.
+    '''
+    lines = list(lines)
+    if not lines:
+        return []
+    try:
+        points = _sag_points(lines, np.linspace(0., 1., numpoints))
+        sagged = [i for i, line in enumerate(lines) if line.sag_par_1 is not None]
+        for i in [0] + sagged[:1]:    # the first line and the first line with sag
+            reference = np.asarray(lines[i].get_line_points(numpoints=numpoints), dtype=float)
+            if not np.allclose(points[i], reference, atol=1e-6):
+                break
+        else:
+            return list(points)
+    except (AttributeError, TypeError, ZeroDivisionError):
+        pass
+    return [np.asarray(line.get_line_points(numpoints=numpoints), dtype=float) for line in lines]
+
+
+def lineset_arrays(lineset, numpoints, sag=True, cache=None):
+    '''
+    vertices and index array of all lines (see mesh_utils.polyline_arrays).
+    with a cache (mesh_utils.MeshCache) recalc and sampling are skipped if the
+    lineset did not change.
+    '''
+    stage_timings = {}
+    start = time.time()
+    key = None
+    if cache is not None:
+        key = lineset_fingerprint(lineset, 'lines', sag, numpoints)
+    stage_timings['fingerprint'] = time.time() - start
+
+    if key is not None and key in cache:
+        arrays = cache.get(key, None)
+        timings['cached'] += 1
+    else:
+        recalc(lineset, sag, stage_timings)
+        start = time.time()
+        arrays = mesh_utils.polyline_arrays(line_points(lineset.lines, numpoints))
+        stage_timings['points'] = time.time() - start
+        if key is not None:
+            cache.put(key, arrays)
+
+    timings['last'] = stage_timings
+    timings['total'].update(stage_timings)
+    timings['updates'] += 1
+    return arrays
+
+
+def timing_report():
+    last = timings['last']
+    total = timings['total']
+    lines = ['line updates: {} ({} from cache)'.format(timings['updates'], timings['cached']),
+             '{:<12} {:>10} {:>10}'.format('stage', 'last [ms]', 'total [ms]')]
+    for stage in STAGES:
+        lines.append('{:<12} {:>10.2f} {:>10.2f}'.format(
+            stage, last.get(stage, 0.) * 1000, total.get(stage, 0.) * 1000))
+    if _split_sag is False:
+        lines.append('(forces includes the sag: calc_sag alone differs from recalc with sag)')
+    return '\n'.join(lines)
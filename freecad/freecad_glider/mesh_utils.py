@@ -0,0 +1,367 @@
+from __future__ import division
+import collections
+import concurrent.futures
+import concurrent.futures.process
+import hashlib
+import itertools
+import os
+
+import numpy as np
+
+# this module must not depend on FreeCAD or pivy. It is used by the gui (tools/_glider.py)
+# and by the benchmarks, which run without a gui.
+
+
+def polygon_arrays(polygons):
+    '''
+    converts a list of polygons (lists of vertex-indices) into the flat
+    index-arrays used by coin:
+        face_index: [p0_0, p0_1, p0_2, -1, p1_0, ...]
+        line_index: [p0_0, p0_1, p0_2, p0_0, -1, p1_0, ...]   (closed polylines)
+    both arrays are contiguous int32 arrays
+    '''
+    lengths = np.fromiter((len(pol) for pol in polygons), dtype=np.int32, count=len(polygons))
+    num_polygons = len(lengths)
+    num_indices = int(lengths.sum())
+    flat = np.fromiter(itertools.chain.from_iterable(polygons), dtype=np.int32, count=num_indices)
+
+    # position of every index of polygon i is shifted by the i (face) or 2*i (line)
+    # separators inserted before it
+    polygon_nr = np.repeat(np.arange(num_polygons, dtype=np.int32), lengths)
+    positions = np.arange(num_indices, dtype=np.int32)
+
+    face_index = np.full(num_indices + num_polygons, -1, dtype=np.int32)
+    face_index[positions + polygon_nr] = flat
+
+    line_index = np.full(num_indices + 2 * num_polygons, -1, dtype=np.int32)
+    line_index[positions + 2 * polygon_nr] = flat
+    starts = np.cumsum(lengths) - lengths
+    line_index[starts + lengths + 2 * np.arange(num_polygons, dtype=np.int32)] = flat[starts]
+    return face_index, line_index
+
+
+def polyline_arrays(polylines):
+    '''
+    converts a list of polylines (arrays of points) into one vertex array
+    (float32, shape (n, 3)) and the index array of a coin line set:
+        [0, 1, 2, -1, 3, 4, -1, ...]
+    '''
+    polylines = [np.asarray(line, dtype=np.float32).reshape(-1, 3) for line in polylines]
+    if not polylines:
+        return np.zeros((0, 3), dtype=np.float32), np.zeros(0, dtype=np.int32)
+    lengths = np.array([len(line) for line in polylines], dtype=np.int32)
+    vertices = np.concatenate(polylines)
+    line_nr = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+    line_index = np.full(len(vertices) + len(lengths), -1, dtype=np.int32)
+    line_index[np.arange(len(vertices), dtype=np.int32) + line_nr] = np.arange(len(vertices), dtype=np.int32)
+    return vertices, line_index
+
+
+def panel_face_index(panels, group_size=None):
+    '''
+    panels (m, 4) vertex indices (-1 for unused corners) -> face index arrays
+    [p0_0, p0_1, p0_2, p0_3, -1, p1_0, ...], split into groups of group_size panels
+    '''
+    panels = np.asarray(panels, dtype=np.int32).reshape(-1, 4)
+    padded = np.hstack([panels, np.full((len(panels), 1), -1, dtype=np.int32)])
+    keep = np.ones(padded.shape, dtype=bool)
+    keep[:, :-1] = panels >= 0
+    face_index = padded[keep]
+    if not group_size or group_size >= len(panels):
+        return [face_index]
+    ends = np.cumsum(keep.sum(axis=1))
+    return np.split(face_index, ends[group_size - 1:-1:group_size])
+
+
+def colormap(values, min_val, max_val, colors):
+    '''
+    values -> rgb (n, 3): the colors are spread evenly over [min_val, max_val],
+    outside of the range they fade to black within one color step
+    '''
+    values = np.asarray(values, dtype=float)
+    num = len(colors) - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        norm_val = (values - min_val) / (max_val - min_val)
+    stops = np.arange(-1, num + 2) / num
+    stop_colors = np.zeros((num + 3, 3))
+    stop_colors[1:-1] = colors
+    return np.stack([np.interp(norm_val, stops, stop_colors[:, i]) for i in range(3)], axis=1)
+
+
+def pack_rgba(rgb, alpha=1.):
+    '''rgb (n, 3) in [0, 1] -> uint32 rgba as used by coin (orderedRGBA)'''
+    rgb = np.clip(np.round(np.asarray(rgb, dtype=float) * 255), 0, 255).astype(np.uint32)
+    return ((rgb[:, 0] << 24) | (rgb[:, 1] << 16) | (rgb[:, 2] << 8) |
+            np.uint32(int(round(alpha * 255))))
+
+
+def shark_nose(profiles, x1, x2, x3, y_add, quadratic=False):
+    '''
+    deforms the lower side (y < 0) of airfoils with shape (n_ribs, n_points, 2):
+        x1 < x <= x2: y is reduced from 0 to y_add
+        x2 < x < x3:  y is reduced from y_add back to 0
+    linear or quadratic (tangent to the airfoil at x1 and x3). Returns a new array.
+    '''
+    profiles = np.array(profiles, dtype=float)
+    x = profiles[..., 0]
+    y = profiles[..., 1]    # view, modified in place
+    lower = y < 0
+    rise = lower & (x > x1) & (x <= x2)
+    fall = lower & (x > x2) & (x < x3)
+    t_rise = (x[rise] - x1) / (x2 - x1)
+    t_fall = (x3 - x[fall]) / (x3 - x2)
+    if quadratic:
+        t_rise **= 2
+        t_fall **= 2
+    y[rise] -= y_add * t_rise
+    y[fall] -= y_add * t_fall
+    return profiles
+
+
+def mesh_arrays(mesh):
+    '''
+    returns the vertices (float32, shape (n, 3)) and the face- and line-index
+    arrays of an openglider mesh
+    '''
+    vertices, polygons_grouped, _ = mesh.get_indexed()
+    polygons = list(itertools.chain.from_iterable(polygons_grouped.values()))
+    vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+    face_index, line_index = polygon_arrays(polygons)
+    return vertices, face_index, line_index
+
+
+def _update_hash(hash_obj, item):
+    if isinstance(item, np.ndarray):
+        hash_obj.update(repr((item.dtype.str, item.shape)).encode())
+        hash_obj.update(np.ascontiguousarray(item).tobytes())
+    elif isinstance(item, dict):
+        hash_obj.update(b'{')
+        for key in sorted(item, key=str):
+            _update_hash(hash_obj, key)
+            _update_hash(hash_obj, item[key])
+        hash_obj.update(b'}')
+    elif isinstance(item, (list, tuple)):
+        hash_obj.update(b'(')
+        for i in item:
+            _update_hash(hash_obj, i)
+        hash_obj.update(b')')
+    elif hasattr(item, '__json__'):
+        # openglider objects serialize their defining data with __json__
+        hash_obj.update(type(item).__name__.encode())
+        _update_hash(hash_obj, item.__json__())
+    else:
+        hash_obj.update(repr(item).encode())
+
+
+def fingerprint(*items):
+    '''content hash of numbers, strings, arrays, containers and openglider objects'''
+    hash_obj = hashlib.sha1()
+    for item in items:
+        _update_hash(hash_obj, item)
+    return hash_obj.hexdigest()
+
+
+def cell_fingerprint(cell, *args):
+    '''
+    hash of everything defining the hull of a cell:
+    rib-geometry, ballooning, panel-cuts and -colors + additional arguments (accuracy)
+    '''
+    panels = [(panel.cut_front, panel.cut_back, panel.material_code) for panel in cell.panels]
+    return fingerprint(cell.rib1.profile_3d.data, cell.rib2.profile_3d.data,
+                       cell.ballooning, panels, *args)
+
+
+def cell_elements_fingerprint(cell, *args):
+    '''hash of the diagonals and straps of a cell'''
+    return fingerprint(cell.rib1.profile_3d.data, cell.rib2.profile_3d.data,
+                       cell.diagonals, cell.straps, *args)
+
+
+def rib_fingerprint(rib, *args):
+    '''hash of everything defining the mesh of a rib'''
+    return fingerprint(type(rib).__name__, rib.profile_3d.data, rib.holes,
+                       getattr(rib, 'single_skin_par', None), *args)
+
+
+def nbytes(value):
+    '''memory used by the numpy arrays in (nested) lists / tuples'''
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    elif isinstance(value, (list, tuple)):
+        return sum(nbytes(i) for i in value)
+    return 0
+
+
+class MeshCache(object):
+    '''
+    least-recently-used cache for mesh arrays (see mesh_arrays) with a memory budget.
+    values are (nested lists / tuples of) numpy arrays, the size of an entry is
+    the sum of the array sizes.
+    '''
+    def __init__(self, max_bytes=100 * 2**20):
+        self.max_bytes = max_bytes
+        self._data = collections.OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __repr__(self):
+        return '<MeshCache {entries} entries, {mbytes:.1f}/{max_mbytes:.1f} MB, ' \
+               '{hits} hits, {misses} misses>'.format(**self.stats())
+
+    def stats(self):
+        return {'entries': len(self._data),
+                'mbytes': self.nbytes / 2**20,
+                'max_mbytes': self.max_bytes / 2**20,
+                'hits': self.hits,
+                'misses': self.misses}
+
+    def get(self, key, create):
+        '''returns the cached value or stores and returns create()'''
+        if key in self._data:
+            value = self._data.pop(key)
+            self._data[key] = value
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = create()
+        self.put(key, value)
+        return value
+
+    def peek(self, key):
+        '''the cached value or None, without counting a hit or changing the order'''
+        return self._data.get(key)
+
+    def put(self, key, value):
+        size = nbytes(value)
+        if key in self._data:
+            self.nbytes -= nbytes(self._data.pop(key))
+        if size > self.max_bytes:
+            return
+        self._data[key] = value
+        self.nbytes += size
+        self.evict()
+
+    def evict(self):
+        '''remove the least recently used entries until the memory budget is met'''
+        while self.nbytes > self.max_bytes and self._data:
+            _, value = self._data.popitem(last=False)
+            self.nbytes -= nbytes(value)
+
+    def clear(self):
+        self._data.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+def merge_arrays(arrays):
+    '''
+    merges mesh arrays (see mesh_arrays) into one, the buffers are allocated once.
+    None entries (empty meshes) are skipped, returns None if nothing is left
+    '''
+    arrays = [a for a in arrays if a is not None]
+    if not arrays:
+        return None
+    vertices = np.empty((sum(len(a[0]) for a in arrays), 3), dtype=np.float32)
+    face_index = np.empty(sum(len(a[1]) for a in arrays), dtype=np.int32)
+    line_index = np.empty(sum(len(a[2]) for a in arrays), dtype=np.int32)
+    v0 = f0 = l0 = 0
+    for _vertices, _face_index, _line_index in arrays:
+        vertices[v0:v0 + len(_vertices)] = _vertices
+        face_index[f0:f0 + len(_face_index)] = np.where(_face_index < 0, -1, _face_index + v0)
+        line_index[l0:l0 + len(_line_index)] = np.where(_line_index < 0, -1, _line_index + v0)
+        v0 += len(_vertices)
+        f0 += len(_face_index)
+        l0 += len(_line_index)
+    return vertices, face_index, line_index
+
+
+def merged_mesh_arrays(meshes):
+    '''mesh arrays of a list of openglider meshes, None if there is no vertex'''
+    return merge_arrays([mesh_arrays(m) for m in meshes if m.vertices is not None])
+
+
+def rib_mesh_arrays(glider, rib_indices, hole_num, filled):
+    '''triangulates the ribs with the given indices (runs in the process pool)'''
+    from openglider import mesh
+    ribs = glider.ribs
+    return [mesh_arrays(mesh.Mesh.from_rib(ribs[i], hole_num, mesh_option='QYqazip',
+                                           glider=glider, filled=filled))
+            for i in rib_indices]
+
+
+def cell_panel_arrays(cell, midribs):
+    '''[(mesh arrays, material_code) for every panel of the cell]'''
+    return [(mesh_arrays(panel.get_mesh(cell, midribs, with_numpy=True)), panel.material_code)
+            for panel in cell.panels]
+
+
+def panel_mesh_arrays(glider, cell_indices, midribs):
+    '''panel meshes of the cells with the given indices (runs in the process pool)'''
+    cells = glider.cells
+    return [cell_panel_arrays(cells[i], midribs) for i in cell_indices]
+
+
+def cell_mesh_arrays(glider, cell_indices, midribs):
+    '''meshes of the cells with the given indices (runs in the process pool)'''
+    cells = glider.cells
+    return [mesh_arrays(cells[i].get_mesh(midribs, with_numpy=True)) for i in cell_indices]
+
+
+_executor = None
+_executor_workers = 0
+
+
+def get_executor(num_workers=0):
+    '''
+    returns a process pool with num_workers processes, or None (compute serially,
+    the default) if num_workers < 2. The pool is created on first use and reused.
+    '''
+    global _executor, _executor_workers
+    if num_workers < 2:
+        return None
+    if _executor is None or _executor_workers != num_workers:
+        shutdown_executor()
+        _executor = concurrent.futures.ProcessPoolExecutor(num_workers)
+        _executor.num_workers = num_workers
+        _executor_workers = num_workers
+    return _executor
+
+
+def shutdown_executor():
+    global _executor, _executor_workers
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = None
+    _executor_workers = 0
+
+
+def parallel_map(func, glider, indices, *args, **kwargs):
+    '''
+    returns the concatenated results of func(glider, chunk, *args) for chunks of indices.
+    with executor=<process pool> the chunks (one per process) run in parallel,
+    the glider is sent once per chunk. If the pool breaks (a worker died, which
+    happens with processes started from FreeCAD) it is dropped and the chunks
+    are computed serially.
+    '''
+    executor = kwargs.get('executor', None)
+    indices = list(indices)
+    if executor is None or len(indices) < 2:
+        return func(glider, indices, *args)
+    num_chunks = min(len(indices), getattr(executor, 'num_workers', os.cpu_count() or 1))
+    chunks = [chunk.tolist() for chunk in np.array_split(indices, num_chunks)]
+    try:
+        futures = [executor.submit(func, glider, chunk, *args) for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+    except concurrent.futures.process.BrokenProcessPool as e:
+        print('mesh worker processes failed ({}), computing serially'.format(e))
+        if executor is _executor:
+            shutdown_executor()
+        return func(glider, indices, *args)
@@ -0,0 +1,194 @@
+'''
+content-addressed disk cache of the panel method (paraBEM_Panels and solved cases).
+
+every entry is a directory of .npy files, named by a hash of the parametric glider
+and all parameters which change the result:
+
+    <cache root>/<key>/vertices.npy, panels.npy, ...
+
+entries are read as memory-mapped arrays. The least recently used entries are
+removed if the cache grows bigger than its size limit. A broken entry is not an
+error, it is recomputed.
+'''
+from __future__ import division
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import glider_cache
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+VERSION = 2    # change if the stored arrays change
+
+
+def cache_root(user_dir):
+    '''the cache directory in the user directory of FreeCAD'''
+    return os.path.join(user_dir, 'glider_panel_cache')
+
+
+def glider_key(parametric_glider):
+    '''hash of the parametric glider'''
+    from openglider import jsonify
+    return glider_cache.state_key(jsonify.dumps(parametric_glider))
+
+
+def entry_key(kind, glider_hash, **params):
+    '''key of a cache entry: kind ('panels', 'solution', ...), glider hash and parameters'''
+    data = json.dumps([VERSION, kind, glider_hash, params], sort_keys=True)
+    return glider_cache.state_key(data)
+
+
+def _touch(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def load(root, key):
+    '''returns {name: memory-mapped array} or None'''
+    if root is None:
+        return None
+    path = os.path.join(root, key)
+    try:
+        names = [name for name in os.listdir(path) if name.endswith('.npy')]
+        arrays = {name[:-4]: np.load(os.path.join(path, name), mmap_mode='r', allow_pickle=False)
+                  for name in names}
+    except (IOError, OSError, ValueError):
+        return None
+    _touch(path)
+    return arrays or None
+
+
+def save(root, key, arrays, max_size=None):
+    '''writes {name: array} as entry key and removes old entries (see evict)'''
+    if root is None:
+        return
+    if not os.path.isdir(root):
+        os.makedirs(root)
+    path = os.path.join(root, key)
+    # write to a temporary directory first, so no half written entry is read
+    tmp_path = tempfile.mkdtemp(prefix='.tmp_', dir=root)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, name + '.npy'), np.asarray(array), allow_pickle=False)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
+    finally:
+        if os.path.isdir(tmp_path):
+            shutil.rmtree(tmp_path)
+    if max_size is not None:
+        evict(root, max_size, keep=key)
+
+
+def entry_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def evict(root, max_size, keep=None):
+    '''removes the least recently used entries until the cache is smaller than max_size (bytes)'''
+    entries = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path) and not name.startswith('.'):
+            entries.append((os.path.getmtime(path), entry_size(path), name, path))
+    total = sum(entry[1] for entry in entries)
+    for _, size, name, path in sorted(entries):
+        if total <= max_size:
+            break
+        if name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+    return total
+
+
+def clear(root):
+    if root is not None and os.path.isdir(root):
+        shutil.rmtree(root)
+
+
+# panel geometry ########################################################################
+
+def panel_arrays(vertices, panels, trailing_edges):
+    '''
+    paraBEM_Panels result -> arrays: vertices (n, 3), panels (m, 4) vertex indices
+    (-1 for triangles), trailing_edges (k,) vertex indices
+    '''
+    index = {id(vertex): i for i, vertex in enumerate(vertices)}
+    panel_index = -np.ones((len(panels), 4), dtype=np.int32)
+    for i, panel in enumerate(panels):
+        points = [index[id(point)] for point in panel.points]
+        panel_index[i, :len(points)] = points
+    return {'vertices': np.array([[v.x, v.y, v.z] for v in vertices], dtype=float),
+            'panels': panel_index,
+            'trailing_edges': np.array([index[id(v)] for v in trailing_edges], dtype=np.int32)}
+
+
+def build_panels(arrays, paraBEM):
+    '''inverse of panel_arrays: creates the paraBEM vertices, panels and trailing edge'''
+    vertices = [paraBEM.PanelVector3(*point) for point in np.asarray(arrays['vertices']).tolist()]
+    panels = [paraBEM.Panel3([vertices[i] for i in row if i >= 0])
+              for row in np.asarray(arrays['panels']).tolist()]
+    trailing_edges = [vertices[i] for i in np.asarray(arrays['trailing_edges']).tolist()]
+    return vertices, panels, trailing_edges
+
+
+def solution_arrays(case, panels):
+    '''
+    solved paraBEM case -> arrays: vertices (n, 3), cp (n,) of the case vertices,
+    panels (m, 4) case vertex numbers (vertex.nr), center_of_pressure, force, cL, cD
+    (the case needs A_ref)
+    '''
+    panel_index = -np.ones((len(panels), 4), dtype=np.int32)
+    for i, panel in enumerate(panels):
+        points = [point.nr for point in panel.points]
+        panel_index[i, :len(points)] = points
+    return {'vertices': np.array([list(v) for v in case.vertices], dtype=float),
+            'cp': np.array([v.cp for v in case.vertices], dtype=float),
+            'panels': panel_index,
+            'center_of_pressure': np.array(case.center_of_pressure, dtype=float),
+            'force': np.array(case.force, dtype=float),
+            'cL': np.array(case.cL, dtype=float),
+            'cD': np.array(case.cD, dtype=float)}
+
+
+def get_panels(root, max_size, paraBEM, parametric_glider, glider_hash=None, glider_3d=None,
+               **params):
+    '''
+    paraBEM_Panels (vertices, panels, trailing_edges) of the parametric glider, read
+    from the cache if the glider and the parameters didn't change. glider_3d is
+    computed if it is not given and the panels are not cached.
+    '''
+    from openglider.glider.in_out.export_3d import paraBEM_Panels
+    from openglider.utils.distribution import Distribution
+    glider_hash = glider_hash or glider_key(parametric_glider)
+    key = entry_key('panels', glider_hash, **params)
+    arrays = load(root, key)
+    if arrays is not None:
+        try:
+            return build_panels(arrays, paraBEM)
+        except (KeyError, IndexError, ValueError):
+            pass
+    if glider_3d is None:
+        glider_3d = parametric_glider.get_glider_3d()
+    vertices, panels, trailing_edges = paraBEM_Panels(
+        glider_3d,
+        distribution=Distribution.from_nose_cos_distribution(0.2),
+        **params)
+    if root is not None:
+        try:
+            # a panel point which is not in vertices can't be stored
+            arrays = panel_arrays(vertices, panels, trailing_edges)
+        except (KeyError, ValueError) as e:
+            print('panel cache not written, unknown panel point: {!r}'.format(e))
+        else:
+            try:
+                save(root, key, arrays, max_size)
+            except (IOError, OSError) as e:
+                print('panel cache not written: {}'.format(e))
+    return vertices, panels, trailing_edges
@@ -0,0 +1,122 @@
+'''
+adaptive panel refinement of the panel method.
+
+the glider is solved with coarse panels first. After every solution the cp jumps
+over the panel edges show where the resolution is too low: along the profiles
+(more profile points) or along the span (more midribs). The glider is refined in
+that direction until cL and cD change less than the tolerance.
+
+paraBEM_Panels only knows global parameters, so a whole direction is refined,
+not single regions of the glider.
+'''
+from __future__ import division
+import time
+
+import numpy as np
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+MAX_PROFILE_NUMPOINTS = 100
+MAX_MIDRIBS = 8
+
+
+def force_coefficients(solution):
+    '''cL, cD of a solution (see panel_cache.solution_arrays) as computed by paraBEM'''
+    return float(solution['cL']), float(solution['cD'])
+
+
+def cp_jumps(solution):
+    '''
+    mean cp difference over the chordwise and the spanwise panel edges of a solution.
+    The edges 0-1, 2-3 and 1-2, 3-0 of the quads are the two directions of the
+    panel grid. The direction whose edges are more aligned with the span (y, over
+    all panels) is the spanwise one. Triangles have no edge 3-0 (-1 in panels).
+    '''
+    panels = np.asarray(solution['panels'])
+    vertices = np.asarray(solution['vertices'])
+    cp = np.asarray(solution['cp'])
+    jumps = []
+    span = []
+    for edges in [[(0, 1), (2, 3)], [(1, 2), (3, 0)]]:
+        start = np.concatenate([panels[:, i] for i, _ in edges])
+        end = np.concatenate([panels[:, j] for _, j in edges])
+        used = (start >= 0) & (end >= 0)
+        start, end = start[used], end[used]
+        if not len(start):
+            jumps.append(0.)
+            span.append(0.)
+            continue
+        edge = vertices[end] - vertices[start]
+        length = np.linalg.norm(edge, axis=1)
+        jumps.append(np.abs(cp[end] - cp[start]).mean())
+        span.append(np.abs(edge[:, 1]).sum() / max(length.sum(), 1e-300))
+    if span[0] > span[1]:
+        jumps.reverse()
+    return jumps[0], jumps[1]
+
+
+def refine(params, jumps, factor=1.5):
+    '''
+    the parameters of the next level: more profile points if the chordwise cp
+    jumps are larger, else one more midrib. None if both are at their maximum.
+    '''
+    chordwise_jump, spanwise_jump = jumps
+    more_points = min(MAX_PROFILE_NUMPOINTS, int(params['profile_numpoints'] * factor) // 2 * 2)
+    more_midribs = min(MAX_MIDRIBS, params['midribs'] + 1)
+    can_refine_chord = more_points > params['profile_numpoints']
+    can_refine_span = more_midribs > params['midribs']
+    new_params = dict(params)
+    if can_refine_chord and (chordwise_jump >= spanwise_jump or not can_refine_span):
+        new_params['profile_numpoints'] = more_points
+    elif can_refine_span:
+        new_params['midribs'] = more_midribs
+    else:
+        return None
+    return new_params
+
+
+def adaptive_solve(solve, params, tol=0.01, max_levels=6, factor=1.5):
+    '''
+    solve(params) returns the solution arrays of the panel parameters (see
+    panel_cache.solution_arrays) and whether they were read from the cache.
+    Returns the finest solution, its parameters and the report (one dict per level).
+    '''
+    report = []
+    solution = None
+    for level in range(max_levels):
+        start = time.time()
+        solution, cached = solve(params)
+        cL, cD = force_coefficients(solution)
+        entry = {'level': level, 'profile_numpoints': params['profile_numpoints'],
+                 'midribs': params['midribs'], 'num_panels': len(solution['panels']),
+                 'time': time.time() - start, 'cached': cached, 'cL': cL, 'cD': cD,
+                 'dcL': np.nan, 'dcD': np.nan, 'converged': False}
+        if report:
+            entry['dcL'] = abs(cL - report[-1]['cL']) / abs(cL)
+            entry['dcD'] = abs(cD - report[-1]['cD']) / abs(cD)
+            entry['converged'] = entry['dcL'] < tol and entry['dcD'] < tol
+        report.append(entry)
+        if entry['converged'] or level == max_levels - 1:
+            break
+        new_params = refine(params, cp_jumps(solution), factor)
+        if new_params is None:
+            break
+        params = new_params
+    # params are the parameters of the last solved level
+    return solution, params, report
+
+
+def format_report(report):
+    '''the time of cached levels (marked with *) is the time to read the cache'''
+    lines = ['{:>5} {:>7} {:>7} {:>8} {:>10} {:>9} {:>9} {:>8} {:>8}'.format(
+        'level', 'points', 'midribs', 'panels', 'time [s]', 'cL', 'cD', 'dcL [%]', 'dcD [%]')]
+    for entry in report:
+        lines.append('{level:>5} {profile_numpoints:>7} {midribs:>7} {num_panels:>8} {time:>9.2f}{mark} '
+                     '{cL:>9.4f} {cD:>9.5f} {dcL_pct:>8.2f} {dcD_pct:>8.2f}'.format(
+                         mark='*' if entry['cached'] else ' ',
+                         dcL_pct=entry['dcL'] * 100, dcD_pct=entry['dcD'] * 100, **entry))
+    if any(entry['cached'] for entry in report):
+        lines.append('* read from the panel cache')
+    if report:
+        lines.append('converged' if report[-1]['converged'] else 'not converged')
+    return '\n'.join(lines)
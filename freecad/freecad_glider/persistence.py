@@ -0,0 +1,153 @@
+'''
+compact serialization of openglider objects for the FreeCAD document.
+
+the jsonify-tree of the object is split into a small json skeleton and the
+numeric lists (control points, profiles, ...), which are stored as binary
+arrays in a compressed npz archive:
+
+    {'format': 'npz', 'version': 1, 'data': <base64 npz>}
+
+FreeCAD writes the state of a proxy as json, so the archive is base64 encoded.
+States written by older versions ({'ParametricGlider': <json string>}) are
+still read, and dumps falls back to json if the compact format fails.
+'''
+from __future__ import division
+import base64
+import io
+import json
+import warnings
+
+import numpy as np
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+FORMAT = 'npz'
+VERSION = 1
+MIN_ARRAY_SIZE = 16    # shorter lists stay in the skeleton
+
+
+def _leaves(value):
+    for item in value:
+        if isinstance(item, list):
+            for leaf in _leaves(item):
+                yield leaf
+        else:
+            yield item
+
+
+def _to_array(value):
+    '''
+    rectangular list of numbers of one type (all int or all float) -> array, else
+    None. Mixed lists and bools are kept, the array would change their type.
+    '''
+    leaf_types = set(type(leaf) for leaf in _leaves(value))
+    if len(leaf_types) != 1 or leaf_types.pop() not in (int, float):
+        return None
+    try:
+        array = np.array(value)
+    except ValueError:    # ragged
+        return None
+    if array.dtype.kind not in 'iuf' or array.size < MIN_ARRAY_SIZE:
+        return None
+    return array
+
+
+def pack_tree(tree):
+    '''json-tree -> (skeleton, arrays): numeric lists are replaced by {'__array__': index}'''
+    arrays = []
+
+    def pack(value):
+        if isinstance(value, dict):
+            return {key: pack(item) for key, item in value.items()}
+        elif isinstance(value, list):
+            if value:
+                array = _to_array(value)
+                if array is not None:
+                    arrays.append(array)
+                    return {'__array__': len(arrays) - 1}
+            return [pack(item) for item in value]
+        return value
+    return pack(tree), arrays
+
+
+def unpack_tree(skeleton, arrays, object_hook=None):
+    '''inverse of pack_tree, object_hook is applied to every dict (as json.loads does)'''
+    def unpack(value):
+        if isinstance(value, dict):
+            if '__array__' in value and len(value) == 1:
+                return arrays[value['__array__']].tolist()
+            value = {key: unpack(item) for key, item in value.items()}
+            return object_hook(value) if object_hook else value
+        elif isinstance(value, list):
+            return [unpack(item) for item in value]
+        return value
+    return unpack(skeleton)
+
+
+def write_archive(fileobj, skeleton, arrays):
+    '''json skeleton + list of arrays -> compressed npz'''
+    named_arrays = {'array_{}'.format(i): array for i, array in enumerate(arrays)}
+    named_arrays['skeleton'] = np.frombuffer(json.dumps(skeleton).encode('utf-8'), dtype=np.uint8)
+    np.savez_compressed(fileobj, **named_arrays)
+
+
+def read_archive(fileobj):
+    with np.load(fileobj, allow_pickle=False) as archive:
+        skeleton = json.loads(archive['skeleton'].tobytes().decode('utf-8'))
+        arrays = [archive['array_{}'.format(i)] for i in range(len(archive.files) - 1)]
+    return skeleton, arrays
+
+
+def dump_bytes(obj):
+    '''openglider object -> npz archive (bytes)'''
+    from openglider import jsonify
+    tree = json.loads(jsonify.dumps(obj))
+    buffer = io.BytesIO()
+    write_archive(buffer, *pack_tree(tree))
+    return buffer.getvalue()
+
+
+def load_bytes(data):
+    '''npz archive (bytes) -> openglider object'''
+    from openglider import jsonify
+    skeleton, arrays = read_archive(io.BytesIO(data))
+    object_hook = getattr(jsonify, 'object_hook', None)
+    if object_hook is None:
+        return jsonify.loads(json.dumps(unpack_tree(skeleton, arrays)))['data']
+    return unpack_tree(skeleton, arrays, object_hook)['data']
+
+
+def dumps(obj):
+    '''openglider object -> compact state (json serializable dict)'''
+    return {'format': FORMAT, 'version': VERSION,
+            'data': base64.b64encode(dump_bytes(obj)).decode('ascii')}
+
+
+def loads(state):
+    '''compact state -> openglider object'''
+    if state.get('format') != FORMAT or state.get('version', 0) > VERSION:
+        raise ValueError('unknown glider format: {} {}'.format(state.get('format'), state.get('version')))
+    return load_bytes(base64.b64decode(state['data']))
+
+
+def dump_state(obj, compact=True):
+    '''
+    state of a glider for __getstate__: the compact format or (compact=False,
+    or if it fails) the json string of older versions
+    '''
+    if compact:
+        try:
+            return {'ParametricGlider': dumps(obj)}
+        except Exception as e:
+            warnings.warn('compact format failed, using json: {}'.format(e), RuntimeWarning)
+    from openglider import jsonify
+    return {'ParametricGlider': jsonify.dumps(obj)}
+
+
+def load_state(state):
+    '''reads the ParametricGlider of a state written by dump_state (or older versions)'''
+    from openglider import jsonify
+    data = state['ParametricGlider']
+    if isinstance(data, dict):
+        return loads(data)
+    return jsonify.loads(data)['data']
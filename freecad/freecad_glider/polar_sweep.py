@@ -0,0 +1,291 @@
+'''
+angle of attack sweeps with the panel method (paraBEM), without FreeCAD:
+
+    freecad_glider_polars <directory or manifest> [-o polars.csv] [--alpha 2 15] [--num 20] [-w WORKERS]
+
+the result of a glider is a structured array with one row per angle of attack:
+
+    alpha        angle of attack [rad]
+    cL, cDi, cP  lift, induced drag and pitch moment coefficient (panel method)
+    cD           total drag: cDi + profile drag, line drag and pilot drag
+    speed        trimmed flight speed [m/s] (mass, rho: see PERFORMANCE)
+    glide_ratio  cL / cD
+
+several gliders are computed in parallel worker processes. Panels and tables are
+stored in the panel cache if a cache directory is given (see panel_cache.py).
+'''
+from __future__ import division, print_function
+import argparse
+import concurrent.futures
+import csv
+import sys
+import time
+import traceback
+
+import numpy as np
+
+from . import panel_cache
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+DEFAULTS = {'alpha_min': 2.,                  # deg
+            'alpha_max': 15.,                 # deg
+            'num_alpha': 20,
+            'profile_numpoints': 50,
+            'midribs': 0,
+            'num_average': 4,
+            'symmetric': True,
+            'farfield': 5,
+            'wake_length': 10000000,
+            'wake_panels': 20,
+            'mom_ref_point': [1.25, 0, -6]}
+
+# drag model and pilot for the derived quantities (see performance)
+PERFORMANCE = {'c0': 0.010,     # const profile drag
+               'c2': 0.01,      # c2 * cL**2 + c0 = cDpr
+               'cDpi': 0.01,    # drag coefficient of the pilot
+               'rho': 1.2,
+               'mass': 90,
+               'g': 9.81}
+
+TABLE_FIELDS = ['alpha', 'cL', 'cDi', 'cP']
+RESULT_FIELDS = TABLE_FIELDS + ['cD', 'speed', 'glide_ratio']
+TABLE_DTYPE = np.dtype([(name, float) for name in TABLE_FIELDS])
+RESULT_DTYPE = np.dtype([(name, float) for name in RESULT_FIELDS])
+
+
+def _merge(defaults, values):
+    unknown = set(values) - set(defaults)
+    if unknown:
+        raise ValueError('unknown parameters: {}'.format(', '.join(sorted(unknown))))
+    merged = dict(defaults)
+    merged.update(values)
+    return merged
+
+
+def potential_table(parametric_glider, paraBEM, glider_3d=None, cache_root=None,
+                    max_cache_size=None, glider_hash=None, **options):
+    '''solves the panel method for every angle of attack, returns a TABLE_DTYPE array'''
+    options = _merge(DEFAULTS, options)
+    vertices, panels, trailing_edges = panel_cache.get_panels(
+        cache_root, max_cache_size, paraBEM, parametric_glider, glider_hash, glider_3d,
+        midribs=options['midribs'], profile_numpoints=options['profile_numpoints'],
+        num_average=options['num_average'], symmetric=options['symmetric'])
+    case = paraBEM.pan3d.DirichletDoublet0Source0Case3(panels, trailing_edges)
+    case.A_ref = parametric_glider.shape.area
+    case.mom_ref_point = paraBEM.Vector3(*options['mom_ref_point'])
+    case.v_inf = paraBEM.Vector(parametric_glider.v_inf)
+    case.drag_calc = 'trefftz'
+    case.farfield = options['farfield']
+    case.create_wake(options['wake_length'], options['wake_panels'])
+    v_inf = paraBEM.utils.v_inf_deg_range3(
+        case.v_inf, options['alpha_min'], options['alpha_max'], options['num_alpha'])
+    pols = case.polars(v_inf)
+    return np.array([(i.alpha, i.cL, i.cD, i.cP) for i in pols.values], dtype=TABLE_DTYPE)
+
+
+def performance(table, area, line_drag=0., **constants):
+    '''
+    adds total drag, speed and glide ratio to a potential table. The glide angle
+    of the trimmed glider is arctan(cD / cL), rows with cL <= 0 get nan.
+    '''
+    constants = _merge(PERFORMANCE, constants)
+    result = np.zeros(len(table), dtype=RESULT_DTYPE)
+    for name in TABLE_FIELDS:
+        result[name] = table[name]
+    cL = result['cL']
+    cDl = line_drag / area * 2
+    result['cD'] = (result['cDi'] + constants['cDpi'] + cDl + constants['c0'] +
+                    constants['c2'] * cL**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['glide_ratio'] = cL / result['cD']
+        glide_angle = np.arctan(result['cD'] / cL)
+        result['speed'] = np.sqrt(2 * constants['mass'] * constants['g'] * np.cos(glide_angle) /
+                                  (cL * constants['rho'] * area))
+    result['speed'][cL <= 0] = np.nan
+    return result
+
+
+def find_zeros(x, y):
+    '''x values of all sign changes of y (linear interpolation), nan values are skipped'''
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y)
+    x, y = x[valid], y[valid]
+    i = np.nonzero(y[:-1] * y[1:] < 0)[0]
+    zeros = x[i] - (x[i + 1] - x[i]) * y[i] / (y[i + 1] - y[i])
+    return np.sort(np.concatenate([zeros, x[y == 0]]))
+
+
+def trim_point(result):
+    '''
+    alpha, speed and glide ratio where the glide angle arctan(cD / cL) equals the
+    angle of attack (first crossing), None if the sweep doesn't contain it
+    '''
+    order = np.argsort(result['alpha'])
+    alpha = result['alpha'][order]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        phi = alpha - np.arctan(result['cD'][order] / result['cL'][order])
+    zeros = find_zeros(alpha, phi)
+    if not len(zeros):
+        return None
+    alpha_trim = zeros[0]
+    return {'alpha': alpha_trim,
+            'speed': np.interp(alpha_trim, alpha, result['speed'][order]),
+            'glide_ratio': np.interp(alpha_trim, alpha, result['glide_ratio'][order])}
+
+
+def import_paraBEM():
+    import paraBEM
+    import paraBEM.pan3d
+    import paraBEM.utils
+    return paraBEM
+
+
+def sweep(parametric_glider, cache_root=None, max_cache_size=None, constants=None, **options):
+    '''
+    potential table and performance of a parametric glider: RESULT_DTYPE array and
+    the normalized line drag used for the total drag (see performance)
+    '''
+    options = _merge(DEFAULTS, options)
+    glider_hash = panel_cache.glider_key(parametric_glider)
+    key = panel_cache.entry_key('polars', glider_hash, **options)
+    cached = panel_cache.load(cache_root, key)
+    if cached is not None and 'table' in cached:
+        table, line_drag = np.array(cached['table']), float(cached['line_drag'])
+    else:
+        paraBEM = import_paraBEM()
+        glider_3d = parametric_glider.get_glider_3d()
+        line_drag = glider_3d.lineset.get_normalized_drag()
+        table = potential_table(parametric_glider, paraBEM, glider_3d, cache_root,
+                                max_cache_size, glider_hash, **options)
+        if cache_root is not None:
+            try:
+                panel_cache.save(cache_root, key, {'table': table, 'line_drag': np.array(line_drag)},
+                                 max_cache_size)
+            except (IOError, OSError) as e:
+                print('panel cache not written: {}'.format(e))
+    area = parametric_glider.shape.area
+    return performance(table, area, line_drag, **(constants or {})), line_drag
+
+
+def load_source(source):
+    '''path of a glider file, jsonify string or parametric glider -> parametric glider'''
+    if not isinstance(source, str):
+        return source
+    if source.lstrip().startswith('{'):
+        from openglider import jsonify
+        return jsonify.loads(source)['data']
+    from . import batch
+    return batch.load_parametric_glider(source)
+
+
+def sweep_job(name, source, options):
+    '''
+    sweep of one glider (runs in the worker processes), returns a dict with
+    name, result, line_drag, time [s] and error (traceback or None)
+    '''
+    start = time.time()
+    job = {'name': name, 'result': None, 'line_drag': None, 'error': None}
+    try:
+        job['result'], job['line_drag'] = sweep(load_source(source), **options)
+    except Exception:
+        job['error'] = traceback.format_exc()
+    job['time'] = time.time() - start
+    return job
+
+
+def run(jobs, workers=1, **options):
+    '''
+    jobs: list of (name, source), source is a glider file, jsonify string or
+    parametric glider. Yields the results of sweep_job (in parallel if workers > 1)
+    '''
+    if workers > 1 and len(jobs) > 1:
+        from openglider import jsonify
+        # parametric gliders are sent to the workers as json
+        jobs = [(name, source if isinstance(source, str) else jsonify.dumps(source))
+                for name, source in jobs]
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(sweep_job, name, source, options) for name, source in jobs]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+    else:
+        for name, source in jobs:
+            yield sweep_job(name, source, options)
+
+
+def write_csv(results, path):
+    '''results: list of (name, RESULT_DTYPE array), one row per glider and angle of attack'''
+    with open(path, 'w') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['glider'] + RESULT_FIELDS)
+        for name, result in results:
+            for row in result.tolist():
+                writer.writerow([name] + ['{:.6g}'.format(value) for value in row])
+
+
+def write_npz(results, path):
+    '''results: list of (name, RESULT_DTYPE array), stored as one array per glider'''
+    arrays = {}
+    for name, result in results:
+        if name in arrays:
+            raise ValueError('two results with the name {}'.format(name))
+        arrays[name] = result
+    np.savez(path, **arrays)
+
+
+def main(argv=None):
+    from . import batch
+    parser = argparse.ArgumentParser(description='angle of attack sweeps with the panel method')
+    parser.add_argument('source', help='directory, manifest or glider file (.json, .ods)')
+    parser.add_argument('-o', '--out', default='polars.csv', help='result file (.csv or .npz)')
+    parser.add_argument('--alpha', nargs=2, type=float, metavar=('MIN', 'MAX'),
+                        default=[DEFAULTS['alpha_min'], DEFAULTS['alpha_max']],
+                        help='range of the angle of attack [deg]')
+    parser.add_argument('--num', type=int, default=DEFAULTS['num_alpha'],
+                        help='number of angles of attack')
+    parser.add_argument('--profile-points', type=int, default=DEFAULTS['profile_numpoints'])
+    parser.add_argument('--midribs', type=int, default=DEFAULTS['midribs'])
+    parser.add_argument('--cache', help='panel cache directory (see panel_cache.py)')
+    parser.add_argument('--cache-size', type=int, default=500, help='panel cache size [MB]')
+    parser.add_argument('-w', '--workers', type=int, default=batch.DEFAULT_WORKERS,
+                        help='number of worker processes (default: {})'.format(batch.DEFAULT_WORKERS))
+    args = parser.parse_args(argv)
+
+    paths = batch.find_gliders(args.source)
+    try:
+        jobs = list(zip(batch.output_names(paths), paths))
+    except ValueError as e:
+        parser.error(str(e))
+    options = {'alpha_min': args.alpha[0], 'alpha_max': args.alpha[1], 'num_alpha': args.num,
+               'profile_numpoints': args.profile_points, 'midribs': args.midribs,
+               'cache_root': args.cache, 'max_cache_size': args.cache_size * 2**20}
+    start = time.time()
+    results = []
+    failed = []
+    for job in run(jobs, args.workers, **options):
+        if job['error'] is not None:
+            failed.append(job)
+            print('{:<32} {:>8.1f} s  FAILED'.format(job['name'][:32], job['time']))
+        else:
+            results.append((job['name'], job['result']))
+            best = np.nanargmax(job['result']['glide_ratio'])
+            print('{:<32} {:>8.1f} s  best glide {:.2f} at {:.1f} m/s'.format(
+                job['name'][:32], job['time'], job['result']['glide_ratio'][best],
+                job['result']['speed'][best]))
+        sys.stdout.flush()
+    for job in failed:
+        print('\n{}:\n{}'.format(job['name'], job['error']), file=sys.stderr)
+
+    results.sort(key=lambda item: item[0])
+    if args.out.endswith('.npz'):
+        write_npz(results, args.out)
+    else:
+        write_csv(results, args.out)
+    print('{} gliders, {} failed, {:.1f} s, written to {}'.format(
+        len(results) + len(failed), len(failed), time.time() - start, args.out))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
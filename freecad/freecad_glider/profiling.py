@@ -0,0 +1,163 @@
+'''
+timing of the hot paths (redraw, meshing, get_glider_3d, tool accept).
+
+    from freecad.freecad_glider import profiling
+    profiling.configure(True)          # or the preference 'profiling'
+    ...
+    print(profiling.report())
+    profiling.dump_chrome_trace('trace.json')    # chrome://tracing, perfetto
+    profiling.dump_pstats('glider.pstats')       # with configure(True, cprofile=True)
+
+functions are instrumented with the profile decorator, code blocks with the
+timed context manager. When profiling is disabled both cost one global lookup.
+'''
+from __future__ import division
+import collections
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+
+try:
+    _clock = time.perf_counter
+except AttributeError:    # python2
+    _clock = time.time
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+enabled = False
+records = collections.deque(maxlen=20000)    # ring buffer of (name, start, duration, thread id)
+stats = {}                                   # name -> [count, total, max]
+_lock = threading.Lock()
+_profiler = None
+_cprofile_running = False
+_start = _clock()
+
+
+def configure(on, cprofile=False, buffer_size=None):
+    '''switch the timing (and optional cProfile of the gui thread) on / off'''
+    global enabled, records, _profiler
+    enabled = bool(on)
+    if buffer_size and buffer_size != records.maxlen:
+        records = collections.deque(records, maxlen=buffer_size)
+    if enabled and cprofile:
+        if _profiler is None:
+            _profiler = cProfile.Profile()
+        _set_cprofile(True)
+    else:
+        _set_cprofile(False)
+
+
+def _set_cprofile(on):
+    global _cprofile_running
+    if _profiler is not None and on != _cprofile_running:
+        if on:
+            _profiler.enable()
+        else:
+            _profiler.disable()
+        _cprofile_running = on
+
+
+def record(name, start, duration):
+    with _lock:
+        records.append((name, start, duration, threading.current_thread().ident))
+        entry = stats.get(name)
+        if entry is None:
+            stats[name] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+
+
+class timed(object):
+    '''context manager: with timed('draw ribs'): ...'''
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if enabled:
+            self.start = _clock()
+        return self
+
+    def __exit__(self, *args):
+        if self.start is not None:
+            record(self.name, self.start, _clock() - self.start)
+
+
+def profile(name=None):
+    '''decorator, the name defaults to the qualified function name'''
+    def decorator(func):
+        label = name or getattr(func, '__qualname__', func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = _clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, start, _clock() - start)
+        return wrapper
+    return decorator
+
+
+def reset():
+    global _profiler
+    with _lock:
+        records.clear()
+        stats.clear()
+    if _profiler is not None:
+        running = _cprofile_running
+        _set_cprofile(False)
+        _profiler = cProfile.Profile()
+        _set_cprofile(running)
+
+
+def top(num=20, key='total'):
+    '''[(name, count, total, mean, max)] sorted by total, mean, max or count'''
+    with _lock:
+        rows = [(name, count, total, total / count, maximum)
+                for name, (count, total, maximum) in stats.items()]
+    column = {'count': 1, 'total': 2, 'mean': 3, 'max': 4}[key]
+    return sorted(rows, key=lambda row: row[column], reverse=True)[:num]
+
+
+def report(num=20, key='total'):
+    lines = ['{:<40} {:>7} {:>11} {:>10} {:>10}'.format(
+        'name', 'calls', 'total [ms]', 'mean [ms]', 'max [ms]')]
+    for name, count, total, mean, maximum in top(num, key):
+        lines.append('{:<40} {:>7} {:>11.1f} {:>10.2f} {:>10.2f}'.format(
+            name[-40:], count, total * 1000, mean * 1000, maximum * 1000))
+    if len(lines) == 1:
+        lines.append('no records (profiling enabled: {})'.format(enabled))
+    return '\n'.join(lines)
+
+
+def dump_chrome_trace(path):
+    '''writes the ring buffer as chrome trace events (complete events, us)'''
+    pid = os.getpid()
+    with _lock:
+        events = [{'name': name, 'ph': 'X', 'pid': pid, 'tid': tid,
+                   'ts': (start - _start) * 1e6, 'dur': duration * 1e6}
+                  for name, start, duration, tid in records]
+    with open(path, 'w') as outfile:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, outfile)
+    return len(events)
+
+
+def dump_pstats(path):
+    '''writes the cProfile statistics, returns False if cProfile was never started'''
+    if _profiler is None:
+        return False
+    running = _cprofile_running
+    _set_cprofile(False)
+    _profiler.dump_stats(path)
+    _set_cprofile(running)
+    return True
@@ -0,0 +1,138 @@
+'''
+stream lines of a solved panel method case.
+
+all seed points are traced in one batch (optionally in a thread pool) and every
+path is converted into a numpy array once. Paths of unchanged seeds are kept in
+a cache, so only moved seeds are traced again. With a time budget (dragging) the
+seeds which don't fit into the budget are skipped and reported as None.
+'''
+from __future__ import division
+import collections
+import concurrent.futures
+import threading
+import time
+
+import numpy as np
+
+# this module must not depend on FreeCAD or pivy (see mesh_utils)
+
+
+def path_array(flow_path):
+    '''list of paraBEM vectors -> array (n, 3)'''
+    try:
+        return np.array(flow_path, dtype=float).reshape(-1, 3)
+    except (TypeError, ValueError):
+        return np.array([[p.x, p.y, p.z] for p in flow_path], dtype=float).reshape(-1, 3)
+
+
+def seed_offsets(num, seed=0):
+    '''
+    random offsets in the unit cube around the origin. They don't change between calls,
+    so the seeds of a stream only move with the marker (and more seeds keep the old ones)
+    '''
+    return np.random.RandomState(seed).random_sample((num, 3)) - 0.5
+
+
+class StreamlineTracer(object):
+    '''
+    traces stream lines with flow_path(point, interval, numpoints) (case.flow_path
+    with the point converted to a paraBEM vector), the paths are cached by seed,
+    interval and numpoints.
+    '''
+    def __init__(self, flow_path, num_workers=0, cache_size=512, precision=9):
+        self.flow_path = flow_path
+        self.num_workers = num_workers
+        self.cache_size = cache_size
+        self.precision = precision
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()    # late results of the thread pool
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, point, interval, numpoints):
+        return tuple(np.round(point, self.precision).tolist()) + (interval, numpoints)
+
+    def trace_one(self, point, interval, numpoints):
+        return path_array(self.flow_path(list(point), interval, numpoints))
+
+    def _lookup(self, key):
+        with self._lock:
+            path = self._cache.get(key)
+            if path is not None:
+                self._cache.move_to_end(key)
+            return path
+
+    def _store(self, key, path):
+        with self._lock:
+            self._cache[key] = path
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get_executor(self):
+        if self.num_workers < 2:
+            return None
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.num_workers)
+        return self._executor
+
+    def trace(self, seeds, interval, numpoints, budget=None):
+        '''
+        returns a list with the path (array (n, 3)) of every seed point. With a
+        budget [s] the seeds which are not traced in time are None (the first
+        seed is always traced).
+        '''
+        seeds = np.asarray(seeds, dtype=float).reshape(-1, 3)
+        paths = [None] * len(seeds)
+        keys = [self.key(point, interval, numpoints) for point in seeds]
+        todo = []
+        for i, key in enumerate(keys):
+            paths[i] = self._lookup(key)
+            if paths[i] is None:
+                todo.append(i)
+            else:
+                self.hits += 1
+        self.misses += len(todo)
+        if not todo:
+            return paths
+
+        start = time.time()
+        executor = self.get_executor()
+        if executor is None or len(todo) < 2:
+            for count, i in enumerate(todo):
+                if count and budget is not None and time.time() - start > budget:
+                    break
+                paths[i] = self.trace_one(seeds[i], interval, numpoints)
+                self._store(keys[i], paths[i])
+        else:
+            futures = {executor.submit(self.trace_one, seeds[i], interval, numpoints): i for i in todo}
+            done, not_done = concurrent.futures.wait(futures, timeout=budget)
+            first = min(futures, key=futures.get)
+            if first in not_done:
+                first.result()    # the first seed is always traced
+                done.add(first)
+                not_done.discard(first)
+            for future in not_done:
+                if not future.cancel():
+                    # running paths land in the cache when they are finished
+                    future.add_done_callback(self._late_result(keys[futures[future]]))
+            for future in done:
+                i = futures[future]
+                paths[i] = future.result()
+                self._store(keys[i], paths[i])
+        return paths
+
+    def _late_result(self, key):
+        def callback(future):
+            if not future.cancelled() and future.exception() is None:
+                self._store(key, future.result())
+        return callback
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
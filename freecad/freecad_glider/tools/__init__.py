@@ -1,4 +1,8 @@
+import collections
+import importlib
 import os
+import sys
+import time
 
 import FreeCAD
 import FreeCAD as App
@@ -12,21 +16,37 @@ except ImportError:
     App.Console.PrintWarning('there is a newer version (python3)\n')
     App.Console.PrintMessage('try to motivate dev to port to python3\n')
 
-from . import _glider as glider
-from . import _tools as tools
-from . import airfoil_tool
-from . import shape_tool
-from . import arc_tool
-from . import aoa_tool
-from . import ballooning_tool
-from . import line_tool
-from . import merge_tool
-from . import panel_method as pm
-from . import cell_tool
-from . import design_tool
-from . import color_tool
-from . import features
-import openglider
+# the tool modules (and openglider, paraBEM, ...) are imported when a command
+# is used for the first time, not when the workbench is loaded.
+TOOL_MODULES = ['_glider', '_tools', 'features', 'airfoil_tool', 'shape_tool', 'arc_tool',
+                'aoa_tool', 'ballooning_tool', 'line_tool', 'merge_tool', 'panel_method',
+                'cell_tool', 'design_tool', 'color_tool']
+import_times = collections.OrderedDict()    # module -> time of the first import [s]
+
+
+def load_tool_module(name):
+    '''imports freecad_glider.tools.<name> on first use'''
+    module_name = __name__ + '.' + name
+    if module_name not in sys.modules:
+        start = time.time()
+        importlib.import_module(module_name)
+        import_times[name] = time.time() - start
+    return sys.modules[module_name]
+
+
+def import_report():
+    '''import time of the tool modules loaded by the commands'''
+    lines = ['{:<20} {:>10}'.format('tool module', 'import [ms]')]
+    for name in TOOL_MODULES:
+        if name in import_times:
+            lines.append('{:<20} {:>10.1f}'.format(name, import_times[name] * 1000))
+        elif __name__ + '.' + name in sys.modules:
+            lines.append('{:<20} {:>10}'.format(name, 'loaded'))
+        else:
+            lines.append('{:<20} {:>10}'.format(name, '-'))
+    lines.append('heavy dependencies loaded: {}'.format(
+        ', '.join(m for m in ['openglider', 'paraBEM', 'scipy'] if m in sys.modules) or '-'))
+    return '\n'.join(lines)
 
 
 #   -import export                                          -?
@@ -70,7 +90,7 @@ class BaseCommand(object):
         return None
 
     def tool(self, obj):
-        return tools.BaseTool(obj)
+        return load_tool_module('_tools').BaseTool(obj)
 
 
 class ViewCommand(object):
@@ -90,7 +110,7 @@ class ViewCommand(object):
 
 class CellCommand(BaseCommand):
     def tool(self, obj):
-        return cell_tool.CellTool(obj)
+        return load_tool_module('cell_tool').CellTool(obj)
 
     def GetResources(self):
         return {'Pixmap': 'cell_command.svg',
@@ -107,7 +127,7 @@ class Gl2dExport(BaseCommand):
     def Activated(self):
         obj = self.glider_obj
         if obj:
-            tools.export_2d(obj)
+            load_tool_module('_tools').export_2d(obj)
 
 
 class CreateGlider(BaseCommand):
@@ -118,6 +138,7 @@ class CreateGlider(BaseCommand):
 
     @staticmethod
     def create_glider(import_path=None, parametric_glider=None):
+        glider = load_tool_module('_glider')
         glider_object = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'Glider')
         glider.OGGlider(glider_object, import_path=import_path, parametric_glider=parametric_glider)
         vp = glider.OGGliderVP(glider_object.ViewObject)
@@ -176,7 +197,7 @@ class PatternCommand(BaseCommand):
             if not file_name[0] == '':
                 file_name = file_name[0]
                 pat = plots.Patterns(obj.Proxy.getParametricGlider())
-                pat.unwrap(file_name, obj.Proxy.getGliderInstance())
+                pat.unwrap(file_name, obj.Proxy.getGliderInstance().copy_complete())
 
     @staticmethod
     def fcvec(vec):
@@ -193,7 +214,8 @@ class ImportGlider(BaseCommand):
         if file_name[0].endswith('.json'):
             CreateGlider.create_glider(import_path=file_name[0])
         elif file_name[0].endswith('ods'):
-            par_glider = openglider.glider.ParametricGlider.import_ods(file_name[0])
+            from openglider.glider import ParametricGlider
+            par_glider = ParametricGlider.import_ods(file_name[0])
             CreateGlider.create_glider(parametric_glider=par_glider)
         else:
             FreeCAD.Console.PrintError('\nonly .ods and .json are supported')
@@ -218,7 +240,7 @@ class ShapeCommand(BaseCommand):
                 'ToolTip': 'shape'}
 
     def tool(self, obj):
-        return shape_tool.ShapeTool(obj)
+        return load_tool_module('shape_tool').ShapeTool(obj)
 
 
 class ArcCommand(BaseCommand):
@@ -228,7 +250,7 @@ class ArcCommand(BaseCommand):
                 'ToolTip': 'arc'}
 
     def tool(self, obj):
-        return arc_tool.ArcTool(obj)
+        return load_tool_module('arc_tool').ArcTool(obj)
 
 
 class AoaCommand(BaseCommand):
@@ -238,7 +260,7 @@ class AoaCommand(BaseCommand):
                 'ToolTip': 'aoa'}
 
     def tool(self, obj):
-        return aoa_tool.AoaTool(obj)
+        return load_tool_module('aoa_tool').AoaTool(obj)
 
 
 class ZrotCommand(BaseCommand):
@@ -248,7 +270,7 @@ class ZrotCommand(BaseCommand):
                 'ToolTip': 'zrot'}
 
     def tool(self, obj):
-        return aoa_tool.ZrotTool(obj)
+        return load_tool_module('aoa_tool').ZrotTool(obj)
 
 
 class AirfoilCommand(BaseCommand):
@@ -258,7 +280,7 @@ class AirfoilCommand(BaseCommand):
                 'ToolTip': 'airfoil'}
 
     def tool(self, obj):
-        return airfoil_tool.AirfoilTool(obj)
+        return load_tool_module('airfoil_tool').AirfoilTool(obj)
 
 
 class AirfoilMergeCommand(BaseCommand):
@@ -268,7 +290,7 @@ class AirfoilMergeCommand(BaseCommand):
                 'ToolTip': 'airfoil merge'}
 
     def tool(self, obj):
-        return merge_tool.AirfoilMergeTool(obj)
+        return load_tool_module('merge_tool').AirfoilMergeTool(obj)
 
 
 class BallooningCommand(BaseCommand):
@@ -278,7 +300,7 @@ class BallooningCommand(BaseCommand):
                 'ToolTip': 'ballooning'}
 
     def tool(self, obj):
-        return ballooning_tool.BallooningTool(obj)
+        return load_tool_module('ballooning_tool').BallooningTool(obj)
 
 
 class BallooningMergCommand(BaseCommand):
@@ -288,7 +310,7 @@ class BallooningMergCommand(BaseCommand):
                 'ToolTip': 'ballooning merge'}
 
     def tool(self, obj):
-        return merge_tool.BallooningMergeTool(obj)
+        return load_tool_module('merge_tool').BallooningMergeTool(obj)
 
 
 class LineCommand(BaseCommand):
@@ -298,7 +320,7 @@ class LineCommand(BaseCommand):
                 'ToolTip': 'lines'}
 
     def tool(self, obj):
-        return line_tool.LineTool(obj)
+        return load_tool_module('line_tool').LineTool(obj)
 
 
 def check_glider(obj):
@@ -313,14 +335,14 @@ class PanelCommand(BaseCommand):
                 'ToolTip': 'panelmethode'}
 
     def tool(self, obj):
-        return pm.PanelTool(obj)
+        return load_tool_module('panel_method').PanelTool(obj)
 
 class PolarsCommand(BaseCommand):
     def GetResources(self):
         return {'Pixmap': 'polar.svg', 'MenuText': 'polars', 'ToolTip': 'polars'}
 
     def tool(self, obj):
-        return pm.polars(obj)
+        return load_tool_module('panel_method').polars(obj)
 
 
 class CutCommand(BaseCommand):
@@ -328,14 +350,14 @@ class CutCommand(BaseCommand):
         return {'Pixmap': 'cut_command.svg', 'MenuText': 'Design', 'ToolTip': 'Design'}
 
     def tool(self, obj):
-        return design_tool.DesignTool(obj)
+        return load_tool_module('design_tool').DesignTool(obj)
 
 class ColorCommand(BaseCommand):
     def GetResources(self):
         return {'Pixmap': 'color_selector.svg', 'MenuText': 'Design', 'ToolTip': 'Colors'}
 
     def tool(self, obj):
-        return color_tool.ColorTool(obj)
+        return load_tool_module('color_tool').ColorTool(obj)
 
 
 class RefreshCommand():
@@ -359,15 +381,49 @@ class RefreshCommand():
 
 
 
+class FeatureCacheCommand(object):
+    def GetResources(self):
+        return {'Pixmap': 'feature.svg', 'MenuText': 'feature cache',
+                'ToolTip': 'print cache hits and rebuild times of all features'}
+
+    def IsActive(self):
+        return FreeCAD.ActiveDocument is not None
+
+    def Activated(self):
+        features = load_tool_module('features')
+        FreeCAD.Console.PrintMessage(features.feature_cache_report(FreeCAD.ActiveDocument) + '\n')
+
+
+class ProfilingCommand(object):
+    def GetResources(self):
+        return {'MenuText': 'profiling',
+                'ToolTip': 'print the slowest functions and write the timings to the user directory'}
+
+    def IsActive(self):
+        return True
+
+    def Activated(self):
+        from .. import profiling
+        FreeCAD.Console.PrintMessage(profiling.report() + '\n\n' + import_report() + '\n')
+        user_dir = FreeCAD.getUserAppDataDir()
+        trace_path = os.path.join(user_dir, 'glider_trace.json')
+        num_events = profiling.dump_chrome_trace(trace_path)
+        FreeCAD.Console.PrintMessage('{} events written to {}\n'.format(num_events, trace_path))
+        pstats_path = os.path.join(user_dir, 'glider.pstats')
+        if profiling.dump_pstats(pstats_path):
+            FreeCAD.Console.PrintMessage('cProfile statistics written to {}\n'.format(pstats_path))
+
+
 class GliderFeatureCommand(BaseCommand):
     def GetResources(self):
         return {'Pixmap': 'feature.svg', 'MenuText': 'Features', 'ToolTip': 'Features'}
 
     def Activated(self):
+        features = load_tool_module('features')
         feature = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'BaseFeature')
         self.feature.ViewObject.Visibility = False
         features.BaseFeature(feature, self.feature)
-        vp = glider.OGGliderVP(feature.ViewObject)
+        vp = features.OGGliderVP(feature.ViewObject)
         vp.updateData()
 
     def IsActive(self):
@@ -380,6 +436,7 @@ class GliderRibFeatureCommand(GliderFeatureCommand):
         return {'Pixmap': 'rib_feature.svg' , 'MenuText': 'Features', 'ToolTip': 'set airfoil to ribs'}
 
     def Activated(self):
+        features = load_tool_module('features')
         feature = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'ribFeature')
         self.feature.ViewObject.Visibility = False
         features.RibFeature(feature, self.glider_obj)
@@ -392,6 +449,7 @@ class GliderBallooningFeatureCommand(GliderFeatureCommand):
         return {'Pixmap': 'ballooning_feature.svg' , 'MenuText': 'Features', 'ToolTip': 'set ballooning to ribs'}
 
     def Activated(self):
+        features = load_tool_module('features')
         feature = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'ballooningFeature')
         self.glider_obj.ViewObject.Visibility = False
         features.BallooningFeature(feature, self.glider_obj)
@@ -404,6 +462,7 @@ class GliderSharkFeatureCommand(GliderFeatureCommand):
         return {'Pixmap': 'sharknose_feature.svg' , 'MenuText': 'Features', 'ToolTip': 'shark nose'}
 
     def Activated(self):
+        features = load_tool_module('features')
         feature = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'sharkFeature')
         self.glider_obj.ViewObject.Visibility = False
         features.SharkFeature(feature, self.glider_obj)
@@ -415,6 +474,7 @@ class GliderSingleSkinRibFeatureCommand(GliderFeatureCommand):
         return {'Pixmap': 'singleskin_feature.svg' , 'MenuText': 'Features', 'ToolTip': 'set single-skin feature'}
 
     def Activated(self):
+        features = load_tool_module('features')
         feature = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'singleSkinRib')
         self.glider_obj.ViewObject.Visibility = False
         features.SingleSkinRibFeature(feature, self.glider_obj)
@@ -426,6 +486,7 @@ class GliderFlapFeatureCommand(GliderFeatureCommand):
         return {'Pixmap': 'flap_feature.svg' , 'MenuText': 'Features', 'ToolTip': 'flap feature'}
 
     def Activated(self):
+        features = load_tool_module('features')
         feature = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'flapFeature')
         self.glider_obj.ViewObject.Visibility = False
         features.FlapFeature(feature, self.glider_obj)
@@ -437,6 +498,7 @@ class GliderHoleFeatureCommand(GliderFeatureCommand):
         return {'Pixmap': 'hole_feature.svg' , 'MenuText': 'Features', 'ToolTip': 'hole feature'}
 
     def Activated(self):
+        features = load_tool_module('features')
         feature = FreeCAD.ActiveDocument.addObject('App::FeaturePython', 'holeFeature')
         self.glider_obj.ViewObject.Visibility = False
         features.HoleFeature(feature, self.glider_obj)
@@ -1,14 +1,22 @@
 from __future__ import division
 import os
+import traceback
+
 import numpy as np
 
 import FreeCAD as App
 
 from openglider import jsonify
 from openglider import mesh
-from openglider.glider import ParametricGlider
 from openglider.glider.cell.elements import TensionLine
+from .. import batch
+from .. import glider_cache
+from .. import line_utils
+from .. import mesh_utils
+from .. import persistence
+from .. import profiling
 from . import pivy_primitives_new as prim
+from . import _recompute
 from ._tools import coin, hex_to_rgb
 
 
@@ -25,9 +33,18 @@ importpath = os.path.join(os.path.dirname(__file__), '..', 'demokite.ods')
 preference_table = {'default_show_half_glider': (bool, True),
                     'default_show_panels': (bool, False),
                     'default_num_prof_points': (int, 20),
+                    'num_mesh_workers': (int, 0),
                     'default_num_cell_points': (int, 0),
                     'default_num_line_points': (int, 2),
-                    'default_num_hole_points': (int, 10)}
+                    'default_num_hole_points': (int, 10),
+                    'mesh_cache_size': (int, 200),    # MB
+                    'async_recompute': (bool, True),
+                    'profiling': (bool, False),
+                    'profiling_cprofile': (bool, False),
+                    'compact_documents': (bool, True),
+                    'glider_disk_cache': (bool, False),
+                    'panel_cache_size': (int, 500),    # MB, 0: no panel cache
+                    'num_stream_threads': (int, 0)}
 
 
 def get_parameter(name):
@@ -38,18 +55,63 @@ def get_parameter(name):
         return glider_defaults.GetInt(name, preference_table[name][1])
 
 
+def update_profiling():
+    '''applies the profiling preferences (see profiling.py)'''
+    profiling.configure(get_parameter('profiling'), cprofile=get_parameter('profiling_cprofile'))
+
+
+class PreferenceObserver(object):
+    '''applies changed preferences which are not read on every use (profiling)'''
+    def OnChange(self, group, name):
+        if name in ['profiling', 'profiling_cprofile']:
+            update_profiling()
+
+
+class DocumentObserver(object):
+    '''writes the glider disk cache when a document is saved (see glider_cache.py)'''
+    def slotFinishSaveDocument(self, doc, file_name):
+        if not get_parameter('glider_disk_cache'):
+            return
+        for obj in doc.Objects:
+            if isinstance(getattr(obj, 'Proxy', None), OGGlider):
+                obj.Proxy.saveGliderCache(file_name)
+
+
+update_profiling()
+preference_observer = PreferenceObserver()
+try:
+    App.ParamGet('User parameter:BaseApp/Preferences/Mod/glider').Attach(preference_observer)
+except AttributeError:    # old FreeCAD: the preferences are applied at the next start
+    pass
+document_observer = DocumentObserver()
+try:
+    App.addDocumentObserver(document_observer)
+except AttributeError:    # old FreeCAD: no glider disk cache
+    pass
+
+# hull meshes of all gliders, keyed by a hash of the cell-geometry and the accuracy
+mesh_cache = mesh_utils.MeshCache(get_parameter('mesh_cache_size') * 2**20)
+
+
+def set_field_values(field, array):
+    '''feed a coin multi-field (SoMFVec3f, SoMFInt32, ...) with a numpy array'''
+    try:
+        # pivy converts contiguous numpy arrays without creating python objects
+        field.setValues(0, len(array), array)
+    except TypeError:
+        # older pivy versions accept only sequences of python numbers
+        field.setValues(0, len(array), array.tolist())
+
+
+@profiling.profile()
 def mesh_sep(mesh, color, draw_lines=False):
-    vertices, polygons_grouped, _ = mesh.get_indexed()
-    polygons = sum(polygons_grouped.values(), [])
-    _vertices = [list(v) for v in vertices]
-    _polygons = []
-    _lines = []
-    for i in polygons:
-        _polygons += i
-        _lines += i
-        _lines.append(i[0])
-        _polygons.append(-1)
-        _lines.append(-1)
+    return arrays_sep(mesh_utils.mesh_arrays(mesh), color, draw_lines)
+
+
+@profiling.profile()
+def arrays_sep(arrays, color, draw_lines=False):
+    '''arrays: vertices, face_index, line_index (see mesh_utils.mesh_arrays)'''
+    vertices, face_index, line_index = arrays
 
     sep = coin.SoSeparator()
     vertex_property = coin.SoVertexProperty()
@@ -59,14 +121,14 @@ def mesh_sep(mesh, color, draw_lines=False):
     shape_hint.creaseAngle = np.pi / 3
     face_mat = coin.SoMaterial()
     face_mat.diffuseColor = color
-    vertex_property.vertex.setValues(0, len(_vertices), _vertices)
-    face_set.coordIndex.setValues(0, len(_polygons), list(_polygons))
+    set_field_values(vertex_property.vertex, vertices)
+    set_field_values(face_set.coordIndex, face_index)
     vertex_property.materialBinding = coin.SoMaterialBinding.PER_VERTEX_INDEXED
     sep += [shape_hint, vertex_property, face_mat, face_set]
 
     if draw_lines:
         line_set = coin.SoIndexedLineSet()
-        line_set.coordIndex.setValues(0, len(_lines), list(_lines))
+        set_field_values(line_set.coordIndex, line_index)
         line_mat = coin.SoMaterial()
         line_mat.diffuseColor = (.0, .0, .0)
         sep += [line_mat, line_set]
@@ -117,6 +179,21 @@ class OGBaseObject(object):
     def execute(self, fp):
         pass
 
+    # properties the object writes itself (statistics), they don't invalidate the glider
+    volatile_properties = ['CacheStats']
+
+    def onChanged(self, fp, prop):
+        if prop not in self.volatile_properties:
+            self.invalidate()
+
+    def invalidate(self):
+        '''marks the glider of the object (and of all features using it) as changed'''
+        self._version = getattr(self, '_version', 0) + 1
+
+    def getStamp(self):
+        '''changes whenever a property of the object (or of a parent) has changed'''
+        return getattr(self, '_version', 0)
+
     def addProperty(self, name, value, group, docs, p_type=None):
         _addProperty(self.obj, name, value, group, docs, p_type)
 
@@ -162,7 +239,8 @@ class OGGlider(OGBaseObject):
             import_path = import_path or os.path.dirname(__file__) + '/../glider2d.json'
             with open(import_path, 'r') as importfile:
                 obj.ParametricGlider = jsonify.load(importfile)['data']
-        obj.GliderInstance = obj.ParametricGlider.get_glider_3d()
+        with profiling.timed('get_glider_3d'):
+            obj.GliderInstance = obj.ParametricGlider.get_glider_3d()
         super(OGGlider, self).__init__(obj)
 
     def drawGlider(self):
@@ -174,15 +252,7 @@ class OGGlider(OGBaseObject):
 
     @classmethod
     def load(cls, path):
-
-        if path.endswith(".json"):
-            with open(path, 'r') as importfile:
-                parametricglider = jsonify.load(importfile)["data"]
-        elif path.endswith(".ods"):
-            parametricglider = ParametricGlider.import_ods(path)
-        else:
-            raise ValueError
-
+        parametricglider = batch.load_parametric_glider(path)
         return cls(parametric_glider=parametricglider)
 
     def getGliderInstance(self):
@@ -192,30 +262,105 @@ class OGGlider(OGBaseObject):
         '''returns top level parametric glider'''
         return self.obj.ParametricGlider
 
-    def setParametricGlider(self, parametric_glider):
-        '''sets the top-level glider2d and recomputes the glider3d'''
+    def setParametricGlider(self, parametric_glider, on_error=None):
+        '''
+        sets the top-level glider2d and recomputes the glider3d.
+        with the gui the glider3d is computed in a background thread, the view
+        shows the old geometry until the new one is set. If the glider3d can't be
+        built on_error(traceback) is called (default: the error is printed).
+        '''
         self.obj.ParametricGlider = parametric_glider
-        self.obj.GliderInstance = parametric_glider.get_glider_3d()
-        App.ActiveDocument.recompute()
+        if App.GuiUp and get_parameter('async_recompute'):
+            _recompute.get_worker().submit(self, parametric_glider, self.setGliderInstance, on_error)
+            return
+        try:
+            with profiling.timed('get_glider_3d'):
+                glider_instance = parametric_glider.get_glider_3d()
+        except Exception:
+            if on_error is None:
+                raise
+            on_error(traceback.format_exc())
+            return
+        self.setGliderInstance(glider_instance)
+
+    @profiling.profile()
+    def setGliderInstance(self, glider_instance):
+        '''
+        sets the glider3d and redraws the glider and all features. The current
+        instance is updated in place, so references to it (features, task panels)
+        see the new geometry.
+        '''
+        old_instance = getattr(self.obj, 'GliderInstance', None)
+        if type(old_instance) is type(glider_instance) and old_instance is not glider_instance:
+            old_instance.__dict__.clear()
+            old_instance.__dict__.update(glider_instance.__dict__)
+            glider_instance = old_instance
+        self.obj.GliderInstance = glider_instance
+        self.invalidate()    # an in place update doesn't always trigger onChanged
+        self.drawGlider()
+        self.obj.Document.recompute()
 
     def getRoot(self):
         '''return the root freecad obj'''
         return self.obj
 
     def __getstate__(self):
-        out = {
-            'ParametricGlider': jsonify.dumps(self.obj.ParametricGlider),
-            'name': self.obj.Name}
+        # compact binary format, json with compact_documents=False (see persistence.py)
+        with profiling.timed('save glider'):
+            out = persistence.dump_state(self.obj.ParametricGlider,
+                                         compact=get_parameter('compact_documents'))
+        out['name'] = self.obj.Name
+        # the key of the glider disk cache, which is written after the document
+        # is saved (DocumentObserver), not on every serialization (undo, copy)
+        self._saved_state = out['ParametricGlider']
         return out
 
     def __setstate__(self, state):
         print("OBJECT!!!!!!!!!!!!")
         # seld.obj is not yet available! 
         obj = App.ActiveDocument.getObject(state['name'])
-        obj.ParametricGlider = jsonify.loads(state['ParametricGlider'])['data']
-        obj.GliderInstance = obj.ParametricGlider.get_glider_3d()
+        with profiling.timed('load glider'):
+            obj.ParametricGlider = persistence.load_state(state)
+        glider_instance = None
+        if get_parameter('glider_disk_cache'):
+            glider_instance = self.loadGliderCache(state)
+        if glider_instance is None:
+            with profiling.timed('get_glider_3d'):
+                glider_instance = obj.ParametricGlider.get_glider_3d()
+        obj.GliderInstance = glider_instance
         return None
 
+    def saveGliderCache(self, file_name):
+        '''writes the glider instance and the drawn meshes next to the saved document (see glider_cache.py)'''
+        data = getattr(self, '_saved_state', None)
+        directory = glider_cache.cache_dir(file_name)
+        if directory is None or data is None:
+            return
+        if App.GuiUp and _recompute.get_worker().is_busy(self):
+            return    # the glider instance doesn't belong to the parametric glider yet
+        meshes = {}
+        view_proxy = getattr(self.obj.ViewObject, 'Proxy', None) if App.GuiUp else None
+        if hasattr(view_proxy, 'getCachedMeshes'):
+            meshes = view_proxy.getCachedMeshes()
+        try:
+            with profiling.timed('save glider cache'):
+                glider_cache.save(directory, self.obj.Name, glider_cache.state_key(data),
+                                  self.obj.GliderInstance, meshes)
+        except (IOError, OSError) as e:
+            App.Console.PrintWarning('glider cache not written: {}\n'.format(e))
+
+    def loadGliderCache(self, state):
+        '''returns the cached glider instance or None, the meshes are put into the mesh_cache'''
+        directory = glider_cache.cache_dir(App.ActiveDocument.FileName)
+        if directory is None:
+            return None
+        with profiling.timed('load glider cache'):
+            glider_instance, meshes = glider_cache.load(
+                directory, state['name'], glider_cache.state_key(state['ParametricGlider']))
+        for key, value in meshes.items():
+            mesh_cache.put(key, value)
+        return glider_instance
+
 #########################################  gui!!! ################################
     def onDocumentRestored(self, obj):
         if not hasattr(self, 'obj'):  # make sure this function is only run once
@@ -273,7 +418,7 @@ class OGGliderVP(OGBaseVP):
         view_obj.num_ribs = get_parameter('default_num_cell_points')
         view_obj.profile_num = get_parameter('default_num_prof_points')
         view_obj.line_num = get_parameter('default_num_line_points')
-        view_obj.hull = ['panels', 'smooth', 'simple', 'None']
+        view_obj.hull = HULL_TYPES
         view_obj.ribs = True
         view_obj.half_glider = get_parameter('default_show_half_glider')
         view_obj.hole_num = get_parameter('default_num_hole_points')
@@ -283,11 +428,30 @@ class OGGliderVP(OGBaseVP):
 
     def addProperties(self, view_object):
         self.view_obj = view_object
+        # backward compatibility: hull types added later
+        if hasattr(self.view_obj, 'getEnumerationsOfProperty'):
+            if self.view_obj.getEnumerationsOfProperty('hull') != HULL_TYPES:
+                hull = self.view_obj.hull
+                self.view_obj.hull = HULL_TYPES
+                self.view_obj.hull = hull
         if not hasattr(self.view_obj, 'fill_ribs'):
             self.view_obj.addProperty('App::PropertyBool',
                                  'fill_ribs', 'visuals', 'fill ribs')
             self.view_obj.fill_ribs = False
-
+        if not hasattr(self.view_obj, 'line_colors'):
+            self.view_obj.addProperty('App::PropertyEnumeration',
+                                 'line_colors', 'visuals', 'color of the lines')
+            self.view_obj.line_colors = ['black', 'type']
+
+    def getCachedMeshes(self):
+        '''{key: arrays} of the drawn hull meshes which are in the mesh_cache'''
+        meshes = {}
+        for keys in getattr(self, 'draw_cache', DrawCache()).cells.values():
+            for key in keys:
+                value = mesh_cache.peek(key)
+                if value is not None:
+                    meshes[key] = value
+        return meshes
 
     def getGliderInstance(self):
         try:
@@ -298,6 +462,7 @@ class OGGliderVP(OGBaseVP):
 
     def attach(self, view_obj):
         super(OGGliderVP, self).attach(view_obj)
+        self.draw_cache = DrawCache()
         self.vis_glider = coin.SoSeparator()
         self.vis_lines = coin.SoSeparator()
         self.material = coin.SoMaterial()
@@ -321,6 +486,23 @@ class OGGliderVP(OGBaseVP):
     def updateData(self, prop='all', *args):
         self._updateData(self.view_obj, prop)
 
+    def getElementPicked(self, picked_point):
+        '''names the picked panel of the 'panels' hull: Cell<i>_Panel<j>'''
+        hull_sep = self.vis_glider.getByName('hull')
+        panels_sep = hull_sep.getByName('panels') if hull_sep is not None else None
+        detail = picked_point.getDetail()
+        path = picked_point.getPath()
+        if (panels_sep is not None and detail is not None and path.containsNode(panels_sep) and
+                detail.isOfType(coin.SoFaceDetail.getClassTypeId())):
+            # the child of the panels separator in the path is the group
+            group = path.getIndex(path.findNode(panels_sep) + 1)
+            face_detail = coin.cast(detail, 'SoFaceDetail')
+            panel = self.draw_cache.panel_at_face(group, face_detail.getFaceIndex())
+            if panel is not None:
+                return 'Cell{}_Panel{}'.format(*panel)
+        raise NotImplementedError
+
+    @profiling.profile()
     def _updateData(self, fp, prop='all'):
         if not self.getGliderInstance():
             return
@@ -339,8 +521,16 @@ class OGGliderVP(OGBaseVP):
             else:
                 self.glider = self.getGliderInstance().copy()
         if hasattr(fp, 'ribs'):      # check for last attribute to be restored
-            if prop in ['all', 'profile_num', 'num_ribs', 'half_glider']:
+            if prop in ['profile_num', 'num_ribs', 'half_glider']:
                 self.vis_glider.removeChild(self.vis_glider.getByName('hull'))
+            elif prop == 'all':
+                # the shown hull is updated cell by cell (see draw_glider),
+                # all other hull-types are outdated
+                hull_sep = self.vis_glider.getByName('hull')
+                if hull_sep is not None:
+                    for child in list(hull_sep):
+                        if not (child.getName() == fp.hull and fp.hull in ['panels', 'simple', 'lod']):
+                            hull_sep.removeChild(child)
 
             if prop in ['all', 'hole_num', 'profile_num', 'half_glider', 'fill_ribs']:
                 self.vis_glider.removeChild(self.vis_glider.getByName('ribs'))
@@ -350,6 +540,9 @@ class OGGliderVP(OGBaseVP):
                 numpoints = fp.profile_num
                 numpoints = max(numpoints, 5)
                 glider_changed = (prop in ['half_glider', 'profile_num', 'all'])
+                # draw_glider resamples the profiles of self.glider, but the levels
+                # of detail need the original profiles: start from a fresh copy
+                glider_changed |= (fp.hull == 'lod')
                 if glider_changed:
                     if not fp.half_glider:
                         self.glider = self.getGliderInstance().copy_complete()
@@ -365,19 +558,24 @@ class OGGliderVP(OGBaseVP):
                                    fill_ribs=fp.fill_ribs)
                 fp.Proxy.recompute = False
         if hasattr(fp, 'line_num'):
-            if prop in ['line_num', 'half_glider', 'all']:
+            if prop in ['line_num', 'line_colors', 'half_glider', 'all']:
                 self.update_lines(fp.line_num)
 
     def update_glider(self, midribs=0, profile_numpoints=20,
                       hull='panels', ribs=False, 
                       hole_num=10, glider_changed=True, fill_ribs=True):
+        mesh_cache.max_bytes = get_parameter('mesh_cache_size') * 2**20
+        mesh_cache.evict()
         draw_glider(self.glider, vis_glider=self.vis_glider, midribs=midribs, 
                     hole_num=hole_num, profile_num=profile_numpoints,
-                    hull=hull, ribs=ribs, fill_ribs=fill_ribs)
+                    hull=hull, ribs=ribs, fill_ribs=fill_ribs,
+                    draw_cache=self.draw_cache,
+                    executor=mesh_utils.get_executor(get_parameter('num_mesh_workers')))
 
     def update_lines(self, num=3):
         self.vis_lines.removeAllChildren()
-        draw_lines(self.glider, num, self.vis_lines)
+        color = getattr(self.view_obj, 'line_colors', 'black')
+        draw_lines(self.glider, num, self.vis_lines, color=None if color == 'black' else color)
 
     def onChanged(self, vp, prop):
         self._updateData(vp, prop)
@@ -396,26 +594,244 @@ class OGGliderVP(OGBaseVP):
         view_obj = obj.ViewObject
         self.addProperties(view_obj)
 
-def draw_lines(glider, line_num=2, vis_lines=None):
+# colors of the line types (color='type' in draw_lines), assigned in order of appearance
+LINE_COLORS = [(0., 0., 0.), (.8, 0., 0.), (0., .5, 0.), (0., 0., .8),
+               (.8, .5, 0.), (.5, 0., .5), (0., .5, .5), (.5, .5, .5)]
+
+
+def line_type_colors(lines):
+    '''one color per line, lines with the same line type get the same color'''
+    type_colors = {}
+    colors = []
+    for line in lines:
+        name = getattr(line.line_type, 'name', str(line.line_type))
+        if name not in type_colors:
+            type_colors[name] = LINE_COLORS[len(type_colors) % len(LINE_COLORS)]
+        colors.append(type_colors[name])
+    return colors
+
+
+@profiling.profile()
+def draw_lines(glider, line_num=2, vis_lines=None, color=None):
+    '''
+    draws all lines with one vertex property and one line set.
+    color: None (black), 'type' (see LINE_COLORS) or a function line -> (r, g, b)
+    '''
     vis_lines = vis_lines or coin.SoSeparator()
     if line_num < 1:
         return
-    elif line_num == 1:
-        glider.lineset.recalc(calculate_sag=False)
-        line_num += 1
-    else:
-        glider.lineset.recalc(calculate_sag=True)
+    # the forces, sag and points are reused if the lineset didn't change
+    # (line_utils.timing_report() shows the time of the stages)
+    sag = line_num > 1
+    lines = glider.lineset.lines
+    vertices, line_index = line_utils.lineset_arrays(
+        glider.lineset, max(line_num, 2), sag=sag, cache=mesh_cache)
+    if not len(vertices):
+        return vis_lines
 
-    for line in glider.lineset.lines:
-        points = line.get_line_points(numpoints=line_num)
-        vis_lines += [prim.Line(points, dynamic=False)]
+    vertex_property = coin.SoVertexProperty()
+    set_field_values(vertex_property.vertex, vertices)
+    line_set = coin.SoIndexedLineSet()
+    set_field_values(line_set.coordIndex, line_index)
+    if color is None:
+        line_mat = coin.SoMaterial()
+        line_mat.diffuseColor = (0., 0., 0.)
+        vis_lines += [line_mat]
+    else:
+        if color == 'type':
+            colors = line_type_colors(lines)
+        else:
+            colors = [color(line) for line in lines]
+        packed = [packed_color(c) for c in colors]
+        set_field_values(vertex_property.orderedRGBA, np.array(packed, dtype=np.uint32))
+        # one color per polyline (line), PER_PART would color every segment
+        vertex_property.materialBinding = coin.SoMaterialBinding.PER_FACE
+    vis_lines += [vertex_property, line_set]
     return vis_lines
 
 
+HULL_TYPES = ['panels', 'smooth', 'simple', 'lod', 'None']
+
+# hull type 'lod': (profile_numpoints, midribs) of the levels, finest first.
+# coin shows the next coarser level if the glider covers less than
+# LOD_SCREEN_AREA (pixels) on the screen
+LOD_LEVELS = [(100, 5), (50, 2), (20, 0)]
+LOD_SCREEN_AREA = [400. ** 2, 150. ** 2]
+
+# hull type 'panels': number of cells merged into one face set. A changed cell
+# redraws its group only
+PANEL_GROUP_SIZE = 4
+
+
+class DrawCache(object):
+    '''
+    remembers what draw_glider has drawn. Cells and ribs are identified by a hash of
+    their geometry (see mesh_utils), so a redraw only replaces the parts which have changed.
+    '''
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.cells = {}             # hull-type -> list of cell-hashes (one per child)
+        self.rib_meshes = {}        # rib-hash -> mesh-arrays
+        self.element_meshes = {}    # cell-hash -> (diagonal-arrays, tension-line-arrays)
+        # one entry per group of the 'panels' hull: (cell-index, panel-index) and
+        # number of faces up to each panel (see draw_merged_panels)
+        self.panel_groups = []
+
+    def panel_at_face(self, group, face_index):
+        '''(cell-index, panel-index) of a face of a group of the 'panels' hull'''
+        if not 0 <= group < len(self.panel_groups):
+            return None
+        panels, panel_faces = self.panel_groups[group]
+        i = int(np.searchsorted(panel_faces, face_index, side='right'))
+        if 0 <= face_index and i < len(panels):
+            return panels[i]
+        return None
+
+
+def update_children(sep, old_keys, new_keys, build):
+    '''
+    replace the children of sep whose key has changed.
+    build(i) returns the new node for the i-th key
+    '''
+    if len(old_keys) != len(new_keys) or sep.getNumChildren() != len(old_keys):
+        sep.removeAllChildren()
+        for i in range(len(new_keys)):
+            sep += [build(i)]
+    else:
+        for i, (old_key, new_key) in enumerate(zip(old_keys, new_keys)):
+            if old_key != new_key:
+                sep.replaceChild(i, build(i))
+    return list(new_keys)
+
+
+def get_cell_arrays(key, create, computed=None):
+    '''mesh arrays of a cell: computed by the process pool (computed: key -> arrays), cached or create()'''
+    if computed and key in computed:
+        return mesh_cache.get(key, lambda: computed[key])
+    return mesh_cache.get(key, create)
+
+
+def draw_panels_cell(cell, midribs, key, computed=None):
+    cell_sep = coin.SoSeparator()
+    for arrays, material_code in get_cell_arrays(
+            key, lambda: mesh_utils.cell_panel_arrays(cell, midribs), computed):
+        if material_code:
+            color = hex_to_rgb(material_code)
+        else:
+            color = (.8, .8, .8)
+        cell_sep += [arrays_sep(arrays, color)]
+    return cell_sep
+
+
+def packed_color(color):
+    '''material_code or (r, g, b) -> rgba packed into an uint32 (SoMFUInt32 orderedRGBA)'''
+    if not color:
+        color = (.8, .8, .8)
+    elif isinstance(color, str):
+        color = hex_to_rgb(color)
+    r, g, b = (min(int(c * 256), 255) for c in color)
+    return (r << 24) | (g << 16) | (b << 8) | 0xff
+
+
+def draw_merged_panels(cells, midribs, cell_keys, computed=None, first_cell=0):
+    '''
+    draws the panels of the cells with one vertex property (colored per face) and
+    one face set. Returns the separator, the (cell-index, panel-index) of the panels
+    (the first cell is first_cell) and the number of faces up to each panel (picking).
+    '''
+    arrays = []
+    colors = []
+    panels = []
+    for i, (cell, key) in enumerate(zip(cells, cell_keys)):
+        cell_arrays = get_cell_arrays(key, lambda: mesh_utils.cell_panel_arrays(cell, midribs), computed)
+        for j, (panel_arrays, material_code) in enumerate(cell_arrays):
+            arrays.append(panel_arrays)
+            colors.append(packed_color(material_code))
+            panels.append((first_cell + i, j))
+    sep = coin.SoSeparator()
+    merged = mesh_utils.merge_arrays(arrays)
+    if merged is None:
+        return sep, [], np.zeros(0, dtype=np.int64)
+    vertices, face_index, _ = merged
+    num_faces = [np.count_nonzero(a[1] < 0) for a in arrays]
+
+    shape_hint = coin.SoShapeHints()
+    shape_hint.vertexOrdering = coin.SoShapeHints.COUNTERCLOCKWISE
+    shape_hint.creaseAngle = np.pi / 3
+    pick_style = coin.SoPickStyle()    # the face is needed to identify the panel
+    pick_style.style.setValue(coin.SoPickStyle.SHAPE)
+    vertex_property = coin.SoVertexProperty()
+    set_field_values(vertex_property.vertex, vertices)
+    set_field_values(vertex_property.orderedRGBA, np.repeat(np.array(colors, dtype=np.uint32), num_faces))
+    vertex_property.materialBinding = coin.SoMaterialBinding.PER_FACE
+    face_set = coin.SoIndexedFaceSet()
+    face_set.vertexProperty = vertex_property
+    set_field_values(face_set.coordIndex, face_index)
+    sep += [shape_hint, pick_style, face_set]
+    return sep, panels, np.cumsum(num_faces)
+
+
+def draw_simple_cell(cell, midribs, key, computed=None):
+    def create():
+        return mesh_utils.mesh_arrays(cell.get_mesh(midribs, with_numpy=True))
+
+    return arrays_sep(get_cell_arrays(key, create, computed), (.8, .8, .8))
+
+
+def draw_lod_hull(glider, hull_sep, draw_cache):
+    '''
+    adds a SoLevelOfDetail with the panel-meshes of all LOD_LEVELS to the hull switch.
+    glider must not be resampled (profile_numpoints) yet.
+    '''
+    lod = hull_sep.getByName('lod')
+    if lod is None:
+        lod = coin.SoLevelOfDetail()
+        lod.setName('lod')
+        lod.screenArea.setValues(0, len(LOD_SCREEN_AREA), LOD_SCREEN_AREA)
+        for i in range(len(LOD_LEVELS)):
+            lod += [coin.SoSeparator()]
+            draw_cache.cells['lod', i] = []
+        hull_sep += [lod]
+
+    # the levels are resampled from copies of the original profiles,
+    # which are put back afterwards
+    ribs = glider.ribs
+    profiles = [rib.profile_2d for rib in ribs]
+    keys = [[mesh_utils.cell_fingerprint(cell, 'lod', numpoints, midribs) for cell in glider.cells]
+            for numpoints, midribs in LOD_LEVELS]
+    try:
+        for i, (numpoints, midribs) in enumerate(LOD_LEVELS):
+            level_keys = keys[i]
+            old_keys = draw_cache.cells.get(('lod', i), [])
+            if level_keys == old_keys and lod[i].getNumChildren() == len(level_keys):
+                continue
+            for rib, profile in zip(ribs, profiles):
+                rib.profile_2d = profile.copy()
+            glider.profile_numpoints = numpoints
+            cells = glider.cells
+            draw_cache.cells['lod', i] = update_children(
+                lod[i], old_keys, level_keys,
+                lambda j: draw_panels_cell(cells[j], midribs, level_keys[j]))
+    finally:
+        for rib, profile in zip(ribs, profiles):
+            rib.profile_2d = profile
+
+
+@profiling.profile()
 def draw_glider(glider, vis_glider=None, midribs=0, hole_num=10, profile_num=20,
-                  hull='panels', ribs=False, elements=False, fill_ribs=True):
-    '''draw the glider to the visglider seperator'''
-    glider.profile_numpoints = profile_num
+                  hull='panels', ribs=False, elements=False, fill_ribs=True, draw_cache=None,
+                  executor=None):
+    '''
+    draw the glider to the visglider seperator.
+    if a draw_cache is given, the 'panels', 'simple' and 'lod' hulls and the rib-meshes
+    are only recomputed for cells and ribs which have changed since the last call.
+    hull='lod' shows the panels with a level of detail depending on the size on screen.
+    with an executor (process pool, see mesh_utils.get_executor) the hull-meshes
+    of the cells and the ribs are computed in parallel.
+    '''
+    draw_cache = draw_cache or DrawCache()
 
     vis_glider = vis_glider or coin.SoSeparator()
     if vis_glider.getByName('hull') is None:        # TODO: fix bool(sep_without_children) -> False pivy
@@ -423,12 +839,14 @@ def draw_glider(glider, vis_glider=None, midribs=0, hole_num=10, profile_num=20,
     else:
         hull_sep = vis_glider.getByName('hull')
 
+    if hull == 'lod':
+        draw_lod_hull(glider, hull_sep, draw_cache)
+    glider.profile_numpoints = profile_num
+
     draw_aoa(glider, vis_glider)
 
     draw_ribs = not vis_glider.getByName('ribs')
-    draw_panels = not hull_sep.getByName('panels')
     draw_smooth = not hull_sep.getByName('smooth')
-    draw_simple = not hull_sep.getByName('simple')
 
     def setHullType(name):
         for i in range(len(hull_sep)):
@@ -438,16 +856,58 @@ def draw_glider(glider, vis_glider=None, midribs=0, hole_num=10, profile_num=20,
         else:
             hull_sep.whichChild = -1
 
-    if hull == 'panels' and draw_panels:
-        hull_panels_sep = coin.SoSeparator()
-        hull_panels_sep.setName('panels')
-        for cell in glider.cells:
-            for panel in cell.panels:
-                m = panel.get_mesh(cell, midribs, with_numpy=True)
-                if panel.material_code:
-                    color = hex_to_rgb(panel.material_code)
-                hull_panels_sep += [mesh_sep(m,  color)]
-        hull_sep += [hull_panels_sep]
+    def getHullSep(name):
+        sep = hull_sep.getByName(name)
+        if sep is None:
+            sep = coin.SoSeparator()
+            sep.setName(name)
+            hull_sep += [sep]
+            draw_cache.cells[name] = []
+        return sep
+
+    if hull in ['panels', 'simple']:
+        cells = glider.cells
+        cell_keys = [mesh_utils.cell_fingerprint(cell, hull, midribs, profile_num)
+                     for cell in cells]
+        old_keys = draw_cache.cells.get(hull, []) if hull_sep.getByName(hull) is not None else []
+        size = PANEL_GROUP_SIZE
+        if hull == 'panels':
+            # a changed cell redraws all cells of its group
+            def group_of(keys, i):
+                return keys[i // size * size:(i // size + 1) * size]
+
+            changed = [group_of(old_keys, i) != group_of(cell_keys, i) for i in range(len(cell_keys))]
+        else:
+            changed = [i >= len(old_keys) or old_keys[i] != key for i, key in enumerate(cell_keys)]
+        computed = {}
+        if executor is not None:
+            # compute the meshes of the cells in the process pool, the draw
+            # functions use them directly (and store them in the mesh_cache)
+            missing = [i for i, key in enumerate(cell_keys) if changed[i] and key not in mesh_cache]
+            compute = {'panels': mesh_utils.panel_mesh_arrays, 'simple': mesh_utils.cell_mesh_arrays}[hull]
+            arrays = mesh_utils.parallel_map(compute, glider, missing, midribs, executor=executor)
+            computed = {cell_keys[i]: cell_arrays for i, cell_arrays in zip(missing, arrays)}
+        if hull == 'panels':
+            def group_keys(keys):
+                return [tuple(keys[i:i + size]) for i in range(0, len(keys), size)]
+
+            def draw_group(j):
+                first = j * size
+                sep, panels, panel_faces = draw_merged_panels(
+                    cells[first:first + size], midribs, cell_keys[first:first + size], computed, first)
+                draw_cache.panel_groups[j] = (panels, panel_faces)
+                return sep
+
+            new_group_keys = group_keys(cell_keys)
+            num_groups = len(new_group_keys)
+            draw_cache.panel_groups = draw_cache.panel_groups[:num_groups]
+            draw_cache.panel_groups += [([], [])] * (num_groups - len(draw_cache.panel_groups))
+            update_children(getHullSep('panels'), group_keys(old_keys), new_group_keys, draw_group)
+            draw_cache.cells['panels'] = cell_keys
+        else:
+            draw_cache.cells[hull] = update_children(
+                getHullSep(hull), old_keys, cell_keys,
+                lambda i: draw_simple_cell(cells[i], midribs, cell_keys[i], computed))
 
     elif hull == 'smooth' and draw_smooth:
         hull_smooth_sep = coin.SoSeparator()
@@ -463,43 +923,52 @@ def draw_glider(glider, vis_glider=None, midribs=0, hole_num=10, profile_num=20,
         hull_smooth_sep += [msh, vertexproperty]
         hull_sep += [hull_smooth_sep]
 
-    elif hull == 'simple' and draw_simple:
-        hull_simple_sep = coin.SoSeparator()
-        hull_simple_sep.setName('simple')
-        for cell in glider.cells:
-            m = cell.get_mesh(midribs, with_numpy=True)
-            color = (.8, .8, .8)
-            hull_simple_sep += [mesh_sep(m,  color)]
-        hull_sep += [hull_simple_sep]
-
     setHullType(hull)
 
     if ribs and draw_ribs:
         rib_sep = coin.SoSwitch()
         rib_sep.setName('ribs')
-        msh = mesh.Mesh()
-        line_msh = mesh.Mesh()
-        for rib in glider.ribs:
+        # triangulate the ribs which are not cached (in parallel if a pool is given)
+        rib_keys = {}
+        for i, rib in enumerate(glider.ribs):
             if not rib.profile_2d.has_zero_thickness:
-                msh += mesh.Mesh.from_rib(rib, hole_num, mesh_option='QYqazip', glider=glider, filled=fill_ribs)
-        if msh.vertices is not None:
-            rib_sep += [mesh_sep(msh, (.3, .3, .3), draw_lines = not fill_ribs)]
-
-        msh = mesh.Mesh()
+                rib_keys[i] = mesh_utils.rib_fingerprint(rib, hole_num, fill_ribs)
+        missing = [i for i, key in rib_keys.items() if key not in draw_cache.rib_meshes]
+        new_arrays = mesh_utils.parallel_map(mesh_utils.rib_mesh_arrays, glider, missing,
+                                             hole_num, fill_ribs, executor=executor)
+        for i, arrays in zip(missing, new_arrays):
+            draw_cache.rib_meshes[rib_keys[i]] = arrays
+        # forget ribs which are not drawn anymore
+        draw_cache.rib_meshes = {key: draw_cache.rib_meshes[key] for key in rib_keys.values()}
+        rib_arrays = mesh_utils.merge_arrays([draw_cache.rib_meshes[key] for key in rib_keys.values()])
+        if rib_arrays is not None:
+            rib_sep += [arrays_sep(rib_arrays, (.3, .3, .3), draw_lines = not fill_ribs)]
+
+        element_meshes = {}
         for cell in glider.cells:
-            for diagonal in cell.diagonals:
-                msh += mesh.Mesh.from_diagonal(diagonal, cell, insert_points=4)
-
-            for strap in cell.straps:
-                if isinstance(strap, TensionLine):
-                    line_msh += strap.get_mesh(cell)
-                else:
-                    msh += mesh.Mesh.from_diagonal(strap, cell, insert_points=4)
-
-        if msh.vertices is not None:
-            rib_sep += [mesh_sep(msh, (.3, .3, .3))]
-        if line_msh.vertices is not None:
-            rib_sep += [mesh_sep(line_msh, (.3, .3, .3), draw_lines=True)]
+            key = mesh_utils.cell_elements_fingerprint(cell)
+            if key not in draw_cache.element_meshes:
+                cell_meshes = []
+                cell_line_meshes = []
+                for diagonal in cell.diagonals:
+                    cell_meshes.append(mesh.Mesh.from_diagonal(diagonal, cell, insert_points=4))
+
+                for strap in cell.straps:
+                    if isinstance(strap, TensionLine):
+                        cell_line_meshes.append(strap.get_mesh(cell))
+                    else:
+                        cell_meshes.append(mesh.Mesh.from_diagonal(strap, cell, insert_points=4))
+                draw_cache.element_meshes[key] = (mesh_utils.merged_mesh_arrays(cell_meshes),
+                                                  mesh_utils.merged_mesh_arrays(cell_line_meshes))
+            element_meshes[key] = draw_cache.element_meshes[key]
+        draw_cache.element_meshes = element_meshes
+
+        element_arrays = mesh_utils.merge_arrays([i[0] for i in element_meshes.values()])
+        line_arrays = mesh_utils.merge_arrays([i[1] for i in element_meshes.values()])
+        if element_arrays is not None:
+            rib_sep += [arrays_sep(element_arrays, (.3, .3, .3))]
+        if line_arrays is not None:
+            rib_sep += [arrays_sep(line_arrays, (.3, .3, .3), draw_lines=True)]
         vis_glider += [rib_sep]
 
     rib_sep = vis_glider.getByName('ribs')
@@ -0,0 +1,105 @@
+from __future__ import division
+import copy
+import threading
+import traceback
+
+import FreeCAD as App
+from PySide import QtCore
+
+from .. import profiling
+
+
+class Glider3DWorker(QtCore.QObject):
+    '''
+    computes ParametricGlider.get_glider_3d in a background thread.
+
+    requests are identified by a key (the glider proxy). Only the newest request of
+    a key is computed: a request which is still waiting is replaced, the result of a
+    request which is already running is dropped. Results are delivered to the gui
+    thread with a qt signal, so the callback can safely modify the document and the
+    scene graph.
+    '''
+    finished = QtCore.Signal(object, int, object, object)    # key, request_id, glider_3d, callback
+    failed = QtCore.Signal(object, int, str, object)          # key, request_id, traceback, errback
+
+    def __init__(self):
+        super(Glider3DWorker, self).__init__()
+        self._lock = threading.Lock()
+        self._requests = {}    # key -> id of the newest request
+        self._pending = {}     # key -> (request_id, parametric_glider, callback)
+        self._threads = {}     # key -> running thread
+        self.finished.connect(self._on_finished)
+        self.failed.connect(self._on_failed)
+
+    def submit(self, key, parametric_glider, callback, errback=None):
+        '''
+        compute parametric_glider.get_glider_3d() and call callback(glider_3d) in the
+        gui thread. If the build fails errback(traceback) is called instead (default:
+        print the traceback)
+        '''
+        # the tools continue to modify their parametric glider, so the worker gets a copy
+        parametric_glider = copy.deepcopy(parametric_glider)
+        with self._lock:
+            request_id = self._requests.get(key, 0) + 1
+            self._requests[key] = request_id
+            self._pending[key] = (request_id, parametric_glider, callback, errback)
+            if key in self._threads:
+                return request_id     # the running thread picks up the request
+            thread = threading.Thread(target=self._run, args=(key,))
+            thread.daemon = True
+            self._threads[key] = thread
+        thread.start()
+        return request_id
+
+    def is_busy(self, key):
+        with self._lock:
+            return key in self._threads
+
+    def _run(self, key):
+        while True:
+            with self._lock:
+                if key not in self._pending:
+                    del self._threads[key]
+                    return
+                request_id, parametric_glider, callback, errback = self._pending.pop(key)
+            try:
+                with profiling.timed('get_glider_3d (background)'):
+                    glider_3d = parametric_glider.get_glider_3d()
+            except Exception:
+                self.failed.emit(key, request_id, traceback.format_exc(), errback)
+            else:
+                self.finished.emit(key, request_id, glider_3d, callback)
+
+    def _is_current(self, key, request_id):
+        with self._lock:
+            return self._requests.get(key) == request_id
+
+    def _on_finished(self, key, request_id, glider_3d, callback):
+        if not self._is_current(key, request_id):
+            return    # superseded by a newer request
+        try:
+            callback(glider_3d)
+        except Exception:
+            App.Console.PrintError(traceback.format_exc())
+
+    def _on_failed(self, key, request_id, error, errback):
+        if not self._is_current(key, request_id):
+            return
+        if errback is None:
+            App.Console.PrintError(error)
+            return
+        try:
+            errback(error)
+        except Exception:
+            App.Console.PrintError(traceback.format_exc())
+
+
+_worker = None
+
+
+def get_worker():
+    '''the worker is created on first use, as a QObject needs a running QApplication'''
+    global _worker
+    if _worker is None:
+        _worker = Glider3DWorker()
+    return _worker
@@ -10,6 +10,7 @@ import FreeCAD as App
 from openglider.jsonify import dump, load
 from openglider.vector.spline import BernsteinBase, BSplineBase
 from openglider.glider import ParametricGlider
+from .. import profiling
 
 # as long as this isn't part of std pivy:
 ########################################################################################
@@ -98,10 +99,12 @@ def import_2d(glider):
         with open(file_name, 'r') as importfile:
             glider.ParametricGlider = load(importfile)['data']
             glider.ParametricGlider.get_glider_3d(glider.GliderInstance)
+            glider.Proxy.invalidate()
             glider.ViewObject.Proxy.updateData()
     elif file_name.endswith('ods'):
         glider.ParametricGlider = ParametricGlider.import_ods(file_name)
         glider.ParametricGlider.get_glider_3d(glider.GliderInstance)
+        glider.Proxy.invalidate()
         glider.ViewObject.Proxy.updateData()
     else:
         FreeCAD.Console.PrintError('\nonly .ods and .json are supported')
@@ -179,11 +182,11 @@ class BaseTool(object):
         self.scene.addChild(self.task_separator)
 
     def update_view_glider(self):  # rename
-        # 1: update parametric-glider and get the glider_instance
+        # update parametric-glider, the glider_instance is recomputed and
+        # all visible objects are redrawn once it is available
         self.obj.Proxy.setParametricGlider(self.parametric_glider)
-        # 2: draw the glider for all visible objects
-        self.obj.Proxy.drawGlider()
 
+    @profiling.profile()
     def accept(self):
         for obj in self._vis_object:
             obj.ViewObject.Visibility = True
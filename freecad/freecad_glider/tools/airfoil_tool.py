@@ -7,6 +7,7 @@ import FreeCADGui as Gui
 
 from openglider.airfoil import BezierProfile2D
 from openglider.vector import normalize, norm
+from .. import profiling
 from ._tools import BaseTool
 from . import pivy_primitives as pp
 
@@ -282,6 +283,7 @@ class AirfoilTool(BaseTool):
             self.lower_cpc.control_points[0].fix = True
             self._update_lower_spline()
 
+    @profiling.profile()
     def accept(self):
         self.unset_edit_mode()
         profiles = []
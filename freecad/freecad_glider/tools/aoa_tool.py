@@ -4,6 +4,7 @@ import numpy as np
 from pivy import coin
 from PySide import QtGui
 
+from .. import profiling
 from ._tools import BaseTool, text_field, input_field, spline_select
 from . import pivy_primitives as pp
 from . import pivy_primitives_new as ppn
@@ -115,6 +116,7 @@ class ZrotTool(BaseTool):
 
         self._update_grid(self.x_grid, y_grid, drag_release)
 
+    @profiling.profile()
     def accept(self):
         self.aoa_cpc.remove_callbacks()
         super(ZrotTool, self).accept()
@@ -192,6 +194,7 @@ class AoaTool(ZrotTool):
         self.layout.setWidget(3, text_field, QtGui.QLabel('glidenumber'))
         self.layout.setWidget(3, input_field, self.QGlide)
 
+    @profiling.profile()
     def accept(self):
         self.parametric_glider.glide = self.QGlide.value()
         super(AoaTool, self).accept()
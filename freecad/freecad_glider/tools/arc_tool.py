@@ -2,6 +2,7 @@ from openglider.vector.polygon import CirclePart
 from pivy import coin
 from PySide import QtGui
 
+from .. import profiling
 from ._tools import BaseTool, text_field, input_field, spline_select
 from .pivy_primitives import Line, ControlPointContainer, vector3D, vector2D
 
@@ -84,6 +85,7 @@ class ArcTool(BaseTool):
         self.arc_cpc.control_pos = self.parametric_glider.arc.curve.controlpoints
         self.update_spline()
 
+    @profiling.profile()
     def accept(self):
         self.arc_cpc.remove_callbacks()
         super(ArcTool, self).accept()
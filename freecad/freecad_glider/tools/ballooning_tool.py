@@ -2,6 +2,7 @@ from __future__ import division
 
 import numpy
 import FreeCADGui as Gui
+from .. import profiling
 from ._tools import BaseTool, QtGui, spline_select
 from .pivy_primitives import Line, vector3D, ControlPointContainer, coin
 from openglider.glider.ballooning import BallooningBezier
@@ -250,6 +251,7 @@ class BallooningTool(BaseTool):
             self.lower_cpc.remove_callbacks()
             self.is_edit = False
 
+    @profiling.profile()
     def accept(self):
         self.unset_edit_mode()
         balloonings = []
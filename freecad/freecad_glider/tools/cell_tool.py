@@ -2,8 +2,9 @@ from __future__ import division
 from PySide import QtGui
 from pivy import coin
 
+from .. import profiling
 from ._tools import BaseTool, input_field
-from ._glider import draw_glider, draw_lines
+from ._glider import draw_glider, draw_lines, DrawCache
 from .table import base_table_widget
 
 
@@ -32,6 +33,7 @@ class CellTool(BaseTool):
         self.update_button = QtGui.QPushButton('update glider')
         self.update_button.clicked.connect(self.update_glider)
         self.layout.setWidget(2, input_field, self.update_button)
+        self.draw_cache = DrawCache()
         self.draw_glider()
 
     def draw_glider(self):
@@ -42,7 +44,7 @@ class CellTool(BaseTool):
         self.task_separator += rot
         draw_glider(self.parametric_glider.get_glider_3d(), 
                     self.task_separator, hull=None, ribs=True, 
-                    fill_ribs=False)
+                    fill_ribs=False, draw_cache=self.draw_cache)
         draw_lines(self.parametric_glider.get_glider_3d(), vis_lines=self.task_separator, line_num=1)
 
     def update_glider(self):
@@ -54,6 +56,7 @@ class CellTool(BaseTool):
         self.diagonals_table.apply_to_glider(self.parametric_glider)
         self.vector_table.apply_to_glider(self.parametric_glider)
 
+    @profiling.profile()
     def accept(self):
         super(CellTool, self).accept()
         self.diagonals_table.hide()
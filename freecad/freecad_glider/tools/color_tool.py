@@ -4,6 +4,7 @@ from PySide import QtGui, QtCore
 import numpy as np
 import FreeCAD as App
 
+from .. import profiling
 from ._tools import BaseTool, input_field, text_field, coin, hex_to_rgb, rgb_to_hex
 from .pivy_primitives_new import Polygon, InteractionSeparator, vector3D
 
@@ -76,6 +77,7 @@ class ColorTool(BaseTool):
             if panel.std_col == old_color:
                 panel.set_color(color)
 
+    @profiling.profile()
     def accept(self):
         self.selector.unregister()
         colors = []
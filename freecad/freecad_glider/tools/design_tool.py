@@ -5,6 +5,7 @@ import numpy as np
 import FreeCAD as App
 from openglider.glider.cell.elements import Panel
 
+from .. import profiling
 from ._tools import BaseTool, input_field, text_field, coin
 from .pivy_primitives_new import Line, Marker, InteractionSeparator, vector3D
 
@@ -339,6 +340,7 @@ class DesignTool(BaseTool):
         else:
             self.add_separator.removeAllChildren()
 
+    @profiling.profile()
     def accept(self):
         self.event_separator.unregister()
         self.view.removeEventCallbackPivy(
@@ -1,10 +1,59 @@
 from ._glider import OGBaseObject, OGGliderVP
+from ..mesh_utils import shark_nose
 
 import os
 from openglider.airfoil.profile_2d import Profile2D
 from openglider.glider.rib import SingleSkinRib, RibHole
 import numpy as np
 import copy
+import time
+
+
+def _cow_copy(obj):
+    '''shallow copy, lists and dicts of the object are copied too (holes, caches, ...)'''
+    new_obj = copy.copy(obj)
+    for name, value in vars(new_obj).items():
+        if isinstance(value, (list, dict)):
+            setattr(new_obj, name, copy.copy(value))
+    return new_obj
+
+
+def overlay_glider(glider, ribs=(), cells=()):
+    '''
+    copy-on-write copy of a glider. Only the ribs and cells with the given indices
+    are copied (shallow), together with the cells using a copied rib and the lineset
+    (if ribs are copied). Everything else is shared with the original glider, so only
+    the copied parts may be modified.
+    '''
+    ribs, cells = set(ribs), set(cells)
+    new_glider = _cow_copy(glider)
+    old_ribs = glider.ribs
+    rib_map = {id(rib): _cow_copy(rib) for i, rib in enumerate(old_ribs) if i in ribs}
+    for new_rib in rib_map.values():
+        mirrored_rib = getattr(new_rib, 'mirrored_rib', None)
+        if mirrored_rib is not None and id(mirrored_rib) in rib_map:
+            new_rib.mirrored_rib = rib_map[id(mirrored_rib)]
+
+    cell_map = {}
+    for i, cell in enumerate(glider.cells):
+        if i in cells or id(cell.rib1) in rib_map or id(cell.rib2) in rib_map:
+            new_cell = _cow_copy(cell)
+            new_cell.rib1 = rib_map.get(id(cell.rib1), cell.rib1)
+            new_cell.rib2 = rib_map.get(id(cell.rib2), cell.rib2)
+            cell_map[id(cell)] = new_cell
+    new_glider.cells = [cell_map.get(id(cell), cell) for cell in glider.cells]
+
+    if rib_map:
+        # the attachment points have to use the new ribs: copy the lineset but
+        # keep references to the glider, ribs and cells pointing to the overlay
+        memo = {id(glider): new_glider}
+        for rib in old_ribs:
+            memo[id(rib)] = rib_map.get(id(rib), rib)
+        for cell in glider.cells:
+            memo[id(cell)] = cell_map.get(id(cell), cell)
+        new_glider.lineset = copy.deepcopy(glider.lineset, memo)
+    return new_glider
+
 
 class BaseFeature(OGBaseObject):
     def __init__(self, obj, parent):
@@ -25,16 +74,59 @@ class BaseFeature(OGBaseObject):
                 self.obj.parent.Proxy.drawGlider()
 
     def getGliderInstance(self):
+        '''
+        returns the glider of this feature. The glider is cached and only rebuilt
+        if a property of this feature or of a parent has changed.
+        The returned glider is shared, don't modify it.
+        '''
+        stamp = self.getStamp()
+        stats = self.cache_stats
+        if getattr(self, '_cached_stamp', None) == stamp:
+            stats['hits'] += 1
+            self.showCacheStats()
+            return self._cached_glider
+        start = time.time()
+        glider = self.buildGliderInstance()
+        stats['rebuilds'] += 1
+        stats['last_time'] = time.time() - start
+        stats['total_time'] += stats['last_time']
+        # building may add missing properties, so the stamp is taken afterwards
+        self._cached_stamp = self.getStamp()
+        self._cached_glider = glider
+        self.showCacheStats()
+        return glider
+
+    def showCacheStats(self):
+        '''shows the cache statistics in the property view of the feature (group debug)'''
+        if not hasattr(self.obj, 'CacheStats'):
+            # transient and output (2 | 8): not saved, doesn't touch the document
+            self.obj.addProperty('App::PropertyString', 'CacheStats', 'debug',
+                                 'cache hits, rebuilds and rebuild times of the feature glider',
+                                 2 | 8, True)
+        stats = self.cache_stats
+        self.obj.CacheStats = '{} hits, {} rebuilds, last {:.1f} ms, total {:.1f} ms'.format(
+            stats['hits'], stats['rebuilds'], stats['last_time'] * 1000, stats['total_time'] * 1000)
+
+    def buildGliderInstance(self):
         '''adds stuff and returns changed copy'''
-        return copy.deepcopy(self.obj.parent.Proxy.getGliderInstance())
+        return overlay_glider(self.obj.parent.Proxy.getGliderInstance())
+
+    def getStamp(self):
+        return (super(BaseFeature, self).getStamp(), self.obj.parent.Proxy.getStamp())
+
+    @property
+    def cache_stats(self):
+        if not hasattr(self, '_cache_stats'):
+            self._cache_stats = {'hits': 0, 'rebuilds': 0, 'last_time': 0., 'total_time': 0.}
+        return self._cache_stats
 
     def getParametricGlider(self):
         '''returns top level parametric glider'''
         return self.obj.parent.Proxy.getParametricGlider()
 
-    def setParametricGlider(self, obj):
+    def setParametricGlider(self, obj, on_error=None):
         '''sets the top-level glider2d and recomputes the glider3d'''
-        self.obj.parent.Proxy.setParametricGlider(obj)
+        self.obj.parent.Proxy.setParametricGlider(obj, on_error)
 
     def getRoot(self):
         '''return the root freecad obj'''
@@ -72,8 +164,8 @@ class RibFeature(BaseFeature):
         obj.addProperty('App::PropertyIntegerList', 'ribs', 'not yet', 'docs')
         obj.addProperty('App::PropertyInteger', 'airfoil', 'not yet', 'docs')
 
-    def getGliderInstance(self):
-        glider = copy.deepcopy(self.obj.parent.Proxy.getGliderInstance())
+    def buildGliderInstance(self):
+        glider = overlay_glider(self.obj.parent.Proxy.getGliderInstance(), ribs=self.obj.ribs)
         airfoil = self.obj.parent.Proxy.getParametricGlider().profiles[self.obj.airfoil]
         for i, rib in enumerate(glider.ribs):
             if i in self.obj.ribs:
@@ -92,8 +184,8 @@ class BallooningFeature(BaseFeature):
         obj.addProperty('App::PropertyIntegerList', 'cells', 'not yet', 'docs')
         obj.addProperty('App::PropertyInteger', 'ballooning', 'not yet', 'docs')
 
-    def getGliderInstance(self):
-        glider = copy.deepcopy(self.obj.parent.Proxy.getGliderInstance())
+    def buildGliderInstance(self):
+        glider = overlay_glider(self.obj.parent.Proxy.getGliderInstance(), cells=self.obj.cells)
         ballooning = self.obj.parent.Proxy.getParametricGlider().balloonings[self.obj.ballooning]
         for i, cell in enumerate(glider.cells):
             if i in self.obj.cells:
@@ -117,23 +209,23 @@ class SharkFeature(BaseFeature):
         self.addProperty('y_add', 0.1, 'not_yet', 'amount')
         self.addProperty('type', False, 'not_yet', '0-> linear, 1->quadratic')
 
-    def apply(self, airfoil_data, x1, x2, x3, y_add):
-        data = []
-        for x, y in copy.copy(airfoil_data):
-            if y < 0:
-                if x > x1 and x < x2:
-                    y -= y_add * (x - x1) / (x2 - x1)  # here any function
-                elif x > x2 and x < x3:
-                    y -= y_add * (x3 - x) / (x3 - x2)  # here another function
-            data.append([x, y])
-        return np.array(data)
+    def apply(self, airfoil_data, x1, x2, x3, y_add, quadratic=False):
+        return shark_nose(np.asarray(airfoil_data)[None], x1, x2, x3, y_add, quadratic)[0]
 
-    def getGliderInstance(self):
+    def buildGliderInstance(self):
         x1, x2, x3, y_add =  self.obj.x1, self.obj.x2, self.obj.x3, self.obj.y_add
-        from openglider.airfoil.profile_2d import Profile2D
-        glider = copy.deepcopy(self.obj.parent.Proxy.getGliderInstance())
-        for rib in enumerate(glider.ribs):
-            rib.profile_2d = Profile2D(self.apply(rib.profile_2d._data, x1, x2, x3, y_add))
+        glider = overlay_glider(self.obj.parent.Proxy.getGliderInstance(), ribs=self.obj.ribs)
+        ribs = [rib for i, rib in enumerate(glider.ribs) if i in self.obj.ribs]
+
+        # all airfoils with the same number of points are deformed at once
+        groups = {}
+        for rib in ribs:
+            groups.setdefault(len(rib.profile_2d.data), []).append(rib)
+        for group in groups.values():
+            data = np.array([rib.profile_2d.data for rib in group])
+            data = shark_nose(data, x1, x2, x3, y_add, quadratic=self.obj.type)
+            for rib, rib_data in zip(group, data):
+                rib.profile_2d = Profile2D(rib_data, name=rib.profile_2d.name)
         return glider
 
 
@@ -150,10 +242,13 @@ class SingleSkinRibFeature(BaseFeature):
                         'ribs', 'not yet', 'docs')
         self.addProperties()
 
-    def getGliderInstance(self):
-        glider = copy.deepcopy(self.obj.parent.Proxy.getGliderInstance())
-        new_ribs = []
+    def buildGliderInstance(self):
         self.addProperties()
+        parent_glider = self.obj.parent.Proxy.getGliderInstance()
+        changed_ribs = [i for i, rib in enumerate(parent_glider.ribs)
+                        if i in self.obj.ribs or rib.xrot != self.obj.xrot[i]]
+        glider = overlay_glider(parent_glider, ribs=changed_ribs)
+        new_ribs = []
 
         single_skin_par = {'att_dist': self.obj.att_dist,
                            'height': self.obj.height,
@@ -177,21 +272,27 @@ class SingleSkinRibFeature(BaseFeature):
             else:
                 new_ribs.append(rib)
         for rib, ss_rib in zip(glider.ribs, new_ribs):
+            if rib is ss_rib:
+                continue    # not replaced, this rib may be shared with the parent
             if hasattr(rib, 'mirrored_rib') and rib.mirrored_rib:
                 nr = glider.ribs.index(rib.mirrored_rib)
                 ss_rib.mirrored_rib = new_ribs[nr]
         glider.replace_ribs(new_ribs)
         hole_size = np.array([self.obj.hole_width, self.obj.hole_height])
         if self.obj.holes:
+            # only the ribs of this feature: they are copies (overlay_glider) or new ribs,
+            # all other ribs are shared with the parent
+            ribs = [rib for i, rib in enumerate(new_ribs) if i in self.obj.ribs]
             for att_pnt in glider.lineset.attachment_points:
-                if (isinstance(att_pnt.rib, SingleSkinRib) and 
+                if (att_pnt.rib in ribs and isinstance(att_pnt.rib, SingleSkinRib) and
                     att_pnt.rib_pos > self.obj.min_hole_pos and
                     att_pnt.rib_pos < self.obj.max_hole_pos):
                     att_pnt.rib.holes.append(RibHole(att_pnt.rib_pos,
                                                      size=hole_size,
                                                      horizontal_shift=self.obj.horizontal_shift))
         for i, rib in enumerate(glider.ribs):
-            rib.xrot = self.obj.xrot[i]
+            if i in changed_ribs:
+                rib.xrot = self.obj.xrot[i]
 
         return glider
 
@@ -213,9 +314,10 @@ class SingleSkinRibFeature(BaseFeature):
         self.addProperty('continued_min_angle', 0., 'bows', 'no idea')
         self.addProperty('continued_min_delta_y', 0., 'bows', 'no idea')
         self.addProperty('continued_min_x', 0., 'bows', 'no idea')
-        glider = self.obj.parent.Proxy.getGliderInstance()
-        angle_list = [0. for _ in glider.ribs]
-        self.addProperty('xrot', angle_list, 'not_yet', 'set rib angles')
+        if not hasattr(self.obj, 'xrot'):
+            glider = self.obj.parent.Proxy.getGliderInstance()
+            angle_list = [0. for _ in glider.ribs]
+            self.addProperty('xrot', angle_list, 'not_yet', 'set rib angles')
 
 
 class VSingleSkinRibFeature(OGGliderVP):
@@ -234,13 +336,14 @@ class FlapFeature(BaseFeature):
         self.addProperty('flap_amount', 0.01, 'flap', 'how much flapping', float)
         self.addProperty('flap_ribs', [], 'flap', 'which ribs get flapped', int)
 
-    def getGliderInstance(self):
-        glider = copy.deepcopy(self.obj.parent.Proxy.getGliderInstance())
-        new_ribs = []
+    def buildGliderInstance(self):
         self.addProperties()
+        glider = overlay_glider(self.obj.parent.Proxy.getGliderInstance(), ribs=self.obj.flap_ribs)
 
         for i, rib in enumerate(glider.ribs):
             if i in self.obj.flap_ribs:
+                # set_flap modifies the airfoil, which is shared with the parent
+                rib.profile_2d = copy.deepcopy(rib.profile_2d)
                 rib.profile_2d.set_flap(self.obj.flap_begin, self.obj.flap_amount)
         return glider
 
@@ -256,12 +359,11 @@ class HoleFeature(BaseFeature):
         super(HoleFeature, self).__init__(obj, parent)
         self.addProperties()
 
-    def getGliderInstance(self):
-        glider = copy.deepcopy(self.obj.parent.Proxy.getGliderInstance())
+    def buildGliderInstance(self):
+        self.addProperties()
+        glider = overlay_glider(self.obj.parent.Proxy.getGliderInstance(), ribs=self.obj.ribs)
 
         ribs = [rib for i, rib in enumerate(glider.ribs) if i in self.obj.ribs]
-        new_ribs = []
-        self.addProperties()
 
         hole_size = np.array([self.obj.hole_width, self.obj.hole_height])
         if self.obj.holes:
@@ -290,4 +392,16 @@ class HoleFeature(BaseFeature):
 class VHoleFeature(OGGliderVP):
     def getIcon(self):
         _dir = os.path.dirname(os.path.realpath(__file__))
-        return(_dir + "/../icons/hole_feature.svg")
\ No newline at end of file
+        return(_dir + "/../icons/hole_feature.svg")
+
+def feature_cache_report(doc):
+    '''returns a table of the feature cache statistics of all gliders in the document'''
+    lines = ['{:<24} {:<24} {:>8} {:>8} {:>12} {:>12}'.format(
+        'feature', 'parent', 'hits', 'rebuilds', 'last [ms]', 'total [ms]')]
+    for obj in doc.Objects:
+        if isinstance(getattr(obj, 'Proxy', None), BaseFeature):
+            stats = obj.Proxy.cache_stats
+            lines.append('{:<24} {:<24} {:>8} {:>8} {:>12.1f} {:>12.1f}'.format(
+                obj.Label, obj.parent.Label, stats['hits'], stats['rebuilds'],
+                stats['last_time'] * 1000, stats['total_time'] * 1000))
+    return '\n'.join(lines)
@@ -10,6 +10,7 @@ import numpy as np
 import FreeCAD as App
 import FreeCADGui as Gui
 
+from .. import profiling
 from ._tools import BaseTool, input_field, text_field
 from .pivy_primitives_new import vector3D
 from .pivy_primitives_new import InteractionSeparator, Object3D
@@ -588,6 +589,7 @@ class LineTool(BaseTool):
         self.layer_selection.model().sort(0)
         self.show_layer()
 
+    @profiling.profile()
     def accept(self):
         '''glider 2d will recive the 2d information
             the attachmentpoints are already stored.
@@ -609,19 +611,26 @@ class LineTool(BaseTool):
 
         lineset = self.parametric_glider.lineset
         try:
-            new_lines = LineSet2D(lines)
-            self.parametric_glider.lineset = new_lines
-            self.parametric_glider.get_glider_3d(self.obj.Proxy.getGliderInstance())
+            self.parametric_glider.lineset = LineSet2D(lines)
         except Exception as e:
             App.Console.PrintError(traceback.format_exc())
             self.parametric_glider.lineset = lineset
-            self.parametric_glider.get_glider_3d(self.obj.Proxy.getGliderInstance())
             return
 
+        # the glider3d is built in the background (see _recompute.py), if the new
+        # lines don't work the old lineset is restored
+        parametric_glider = self.parametric_glider
+        proxy = self.obj.Proxy
+
+        def restore_lineset(error):
+            App.Console.PrintError(error)
+            parametric_glider.lineset = lineset
+            proxy.setParametricGlider(parametric_glider)
+
         self.shape.unregister()
         self.remove_all_callbacks()
         super(LineTool, self).accept()
-        self.update_view_glider()
+        proxy.setParametricGlider(parametric_glider, restore_lineset)
         
     def reject(self):
         self.shape.unregister()
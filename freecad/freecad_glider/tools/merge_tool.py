@@ -6,6 +6,7 @@ from pivy import coin
 from openglider.vector.spline import Bezier
 
 
+from .. import profiling
 from ._tools import BaseTool
 from .pivy_primitives import Line, ControlPointContainer, vector3D
 
@@ -57,6 +58,7 @@ class BaseMergeTool(BaseTool):
     def update_spline(self):
         pass
 
+    @profiling.profile()
     def accept(self):
         self.bezier_cpc.remove_callbacks()
         super(BaseMergeTool, self).accept()
@@ -124,6 +126,7 @@ class AirfoilMergeTool(BaseMergeTool):
                 cp.constraint = y_constraint
         self.update_spline()
 
+    @profiling.profile()
     def accept(self):
         self.parametric_glider.profile_merge_curve.controlpoints = [cp / self.scal for cp in self.bezier_curve.controlpoints]
         super(AirfoilMergeTool, self).accept()
@@ -172,6 +175,7 @@ class BallooningMergeTool(BaseMergeTool):
                 cp.constraint = y_constraint
         self.update_spline()
 
+    @profiling.profile()
     def accept(self):
         self.parametric_glider.ballooning_merge_curve.controlpoints = [cp / self.scal for cp in self.bezier_curve.controlpoints]
         super(BallooningMergeTool, self).accept()
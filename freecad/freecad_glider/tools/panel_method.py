@@ -1,4 +1,8 @@
 from __future__ import division
+import concurrent.futures
+import traceback
+
+import FreeCAD as App
 import FreeCADGui as Gui
 from PySide import QtGui, QtCore
 
@@ -8,6 +12,13 @@ from copy import deepcopy
 
 from openglider.glider.in_out.export_3d import paraBEM_Panels
 from openglider.utils.distribution import Distribution
+from .. import mesh_utils
+from .. import panel_cache
+from .. import panel_refinement
+from .. import polar_sweep
+from .. import profiling
+from .. import streamlines
+from ._glider import get_parameter, set_field_values
 from ._tools import BaseTool, input_field, text_field
 from .pivy_primitives_new import InteractionSeparator, Marker, coin, Line, COLORS
 
@@ -19,163 +30,299 @@ from .pivy_primitives_new import InteractionSeparator, Marker, coin, Line, COLOR
 
 
 
-# import matplotlib
-# matplotlib.use('Qt4Agg')
-# matplotlib.rcParams['backend.qt4']='PySide'
-
-# from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg as FigureCanvas
-# import matplotlib.pyplot as plt
-
 def refresh():
     pass
 
-# class MplCanvas(FigureCanvas):
-#     '''Ultimately, this is a QWidget (as well as a FigureCanvasAgg, etc.).'''
 
-#     def __init__(self, parent=None, width=5, height=4, dpi=100):
-#         self.fig = plt.figure(figsize=(width, height), dpi=dpi)
-#         super(MplCanvas, self).__init__(self.fig)
-#         self.axes = self.fig.add_subplot(111)
-#         self.setParent(parent)
-#         self.updateGeometry()
+# colors of the pressure coefficient, from min_val to max_val
+CP_COLORS = ['red', 'yellow', 'white', 'blue']
+
+
+def mpl_canvas(width=5, height=4, dpi=100):
+    '''matplotlib canvas (a QWidget) with axes and plot, None if matplotlib is missing'''
+    try:
+        from matplotlib.figure import Figure
+        try:
+            from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+        except ImportError:
+            from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg as FigureCanvas
+    except ImportError:
+        App.Console.PrintWarning('matplotlib is not installed\n')
+        return None
+    # no pyplot: the figure doesn't need an event loop of its own
+    canvas = FigureCanvas(Figure(figsize=(width, height), dpi=dpi))
+    canvas.axes = canvas.figure.add_subplot(111)
+    canvas.plot = canvas.axes.plot
+    return canvas
+
+
+_executor = None
+
 
-#     def plot(self, *args, **kwargs):
-#         self.axes.plot(*args, **kwargs)
+def get_executor():
+    '''background thread for the polar sweeps and the cases of cached solutions'''
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(1)
+    return _executor
 
 
-class polars():
+def import_paraBEM():
+    '''
+    paraBEM is imported when a panel-method tool opens (not with the workbench).
+    returns None if it is not installed
+    '''
     try:
-        paraBEM = __import__('paraBEM')
-        pan3d = __import__('paraBEM.pan3d', globals(), locals(), ['abc'])
-        paraBEM_utils = __import__('paraBEM.utils', globals(), locals(), ['abc'])
+        import paraBEM
+        import paraBEM.pan3d
+        import paraBEM.utils
     except ImportError:
-        paraBEM = None
+        return None
+    return paraBEM
+
+
+def cache_settings():
+    '''(directory, size in bytes) of the panel cache (see panel_cache.py), directory is None if disabled'''
+    max_size = get_parameter('panel_cache_size') * 2**20
+    if not max_size:
+        return None, 0
+    return panel_cache.cache_root(App.getUserAppDataDir()), max_size
+
+
+def save_cache(key, arrays):
+    root, max_size = cache_settings()
+    try:
+        panel_cache.save(root, key, arrays, max_size)
+    except (IOError, OSError) as e:
+        App.Console.PrintWarning('panel cache not written: {}\n'.format(e))
+
 
+def cached_panels(paraBEM, parametric_glider, glider_hash=None, **params):
+    '''paraBEM_Panels of the parametric glider, read from the panel cache if possible'''
+    root, max_size = cache_settings()
+    with profiling.timed('paraBEM_Panels'):
+        return panel_cache.get_panels(root, max_size, paraBEM, parametric_glider, glider_hash, **params)
+
+
+class polars(object):
+    '''
+    polar sweep of the glider (see polar_sweep.py). The sweep runs in a background
+    thread, the plots are shown once it is finished.
+    '''
     def __init__(self, obj):
         self.obj = obj
         self.parametric_glider = deepcopy(self.obj.ParametricGlider)
-        self.create_potential_table()
-        self.solve_const_vert_Force()
-
-    
-    def create_potential_table(self):
+        self.result = None
+        self.line_drag = None
+        self.future = None
+        self.canvas = []
+        self.speed_plot = None    # canvas, polar line, trim marker
+        self.form = [QtGui.QWidget()]
+        self.form[0].setWindowTitle('polars')
+        self.layout = QtGui.QFormLayout(self.form[0])
+        self.paraBEM = import_paraBEM()
         if not self.paraBEM:
             self.QWarning = QtGui.QLabel('no panel_method installed')
             self.layout.addWidget(self.QWarning)
         else:
-            self._vertices, self._panels, self._trailing_edges = paraBEM_Panels(
-                self.parametric_glider.get_glider_3d(),
-                midribs=0,
-                profile_numpoints=50,
-                num_average=4,
-                distribution=Distribution.from_nose_cos_distribution(0.2),
-                symmetric=True
-                )
-            case = self.pan3d.DirichletDoublet0Source0Case3(self._panels, self._trailing_edges)
-            case.A_ref = self.parametric_glider.shape.area
-            case.mom_ref_point = self.paraBEM.Vector3(1.25, 0, -6)
-            case.v_inf = self.paraBEM.Vector(self.parametric_glider.v_inf)
-            case.drag_calc = 'trefftz'
-            case.farfield = 5
-            case.create_wake(10000000, 20)
-            pols = case.polars(self.paraBEM_utils.v_inf_deg_range3(case.v_inf, 2, 15, 20))
-            self.cL = []
-            self.cDi = []
-            self.cPi = []
-            self.alpha = []
-            for i in pols.values:
-                self.alpha.append(i.alpha)
-                self.cL.append(i.cL)
-                self.cDi.append(i.cD)
-                self.cPi.append(i.cP)
-            self.alpha = np.array(self.alpha)
-            self.cL = np.array(self.cL)
-            self.cDi = np.array(self.cDi)
-            self.cPi = np.array(self.cPi)
-
-    # def potentialPlot(self):
-    #     self.canvas = MplCanvas()
-    #     self.canvas.plot(cD, cL, label='Drag $c_D * 10$')
-    #     self.canvas.plot(cP, cL, label='Pitch -$c_P$')
-    #     self.canvas.axes.xaxis.set_label('$\\alpha$')
-    #     self.canvas.axes.legend()
-    #     self.canvas.axes.grid()
-    #     self.canvas.draw()
-    #     self.canvas.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint)
-    #     self.canvas.show()
+            self.Qalpha_min = QtGui.QDoubleSpinBox()
+            self.Qalpha_max = QtGui.QDoubleSpinBox()
+            self.Qnum_alpha = QtGui.QSpinBox()
+            self.Qprofile_points = QtGui.QSpinBox()
+            self.Qmidribs = QtGui.QSpinBox()
+            self.Qmass = QtGui.QDoubleSpinBox()
+            self.Qstatus = QtGui.QLabel()
+            self.Qrun = QtGui.QPushButton('compute')
+            self.Qsave = QtGui.QPushButton('save')
+            self.timer = QtCore.QTimer()
+            self.timer.setInterval(100)
+            self.timer.timeout.connect(self.check_result)
+            self.setup_widget()
+            self.create_potential_table()
 
-    def solve_const_vert_Force(self):
-        from scipy.optimize import newton_krylov
-        # constants:
-        c0 = 0.010       # const profile drag
-        c2 = 0.01        # c2 * alpha**2 + c0 = cDpr
-        cDpi = 0.01    # drag cooefficient of pilot
-        rho = 1.2
-        mass = 90
-        g = 9.81
-        area = self.parametric_glider.shape.area
-        cDl = self.obj.GliderInstance.lineset.get_normalized_drag() / area * 2
-        print(cDl)
-        alpha = self.alpha
-        cL = self.cL
-        cDi = self.cDi
-
-        cD_ges = (cDi + np.ones_like(alpha) * (cDpi + cDl + c0) + c2 * cL**2)
-
-        def minimize(phi):
-            return np.arctan(cD_ges / cL) - self.alpha + phi
-
-        def gz():
-            return cL / cD_ges
-
-        def vel(phi):
-            return np.sqrt(2 * mass * g * np.cos(alpha - phi) / cL / rho / area)
-
-        def find_zeros(x, y):
-            sign = np.sign(y[0])
-            i = 1
-            while i < len(y):
-                if sign != np.sign(y[i]):
-                    return x[i-1] + (x[i-1] - x[i]) * y[i-1] / (y[i] - y[i-1])
-                i += 1
-                if i > len(x):
-                    return
-
-
-        phi = newton_krylov(minimize, np.ones_like(self.alpha)) 
-        a_p = [find_zeros(vel(phi), phi), find_zeros(gz(), phi)]
-        canvas = MplCanvas()
-        canvas.plot(vel(phi), gz())
-        canvas.plot(a_p[0], a_p[1], marker='o')
-        canvas.plot()
-        canvas.axes.grid()
-        canvas.draw()
+    def setup_widget(self):
+        self.layout.setWidget(0, text_field, QtGui.QLabel('alpha min [deg]'))
+        self.layout.setWidget(0, input_field, self.Qalpha_min)
+        self.layout.setWidget(1, text_field, QtGui.QLabel('alpha max [deg]'))
+        self.layout.setWidget(1, input_field, self.Qalpha_max)
+        self.layout.setWidget(2, text_field, QtGui.QLabel('number of angles'))
+        self.layout.setWidget(2, input_field, self.Qnum_alpha)
+        self.layout.setWidget(3, text_field, QtGui.QLabel('profile points'))
+        self.layout.setWidget(3, input_field, self.Qprofile_points)
+        self.layout.setWidget(4, text_field, QtGui.QLabel('midribs'))
+        self.layout.setWidget(4, input_field, self.Qmidribs)
+        self.layout.setWidget(5, text_field, QtGui.QLabel('mass [kg]'))
+        self.layout.setWidget(5, input_field, self.Qmass)
+        self.layout.addWidget(self.Qstatus)
+        self.layout.addWidget(self.Qrun)
+        self.layout.addWidget(self.Qsave)
+
+        self.Qalpha_min.setMinimum(-10)
+        self.Qalpha_min.setMaximum(30)
+        self.Qalpha_min.setValue(polar_sweep.DEFAULTS['alpha_min'])
+        self.Qalpha_max.setMinimum(-10)
+        self.Qalpha_max.setMaximum(30)
+        self.Qalpha_max.setValue(polar_sweep.DEFAULTS['alpha_max'])
+        self.Qnum_alpha.setMinimum(2)
+        self.Qnum_alpha.setMaximum(200)
+        self.Qnum_alpha.setValue(polar_sweep.DEFAULTS['num_alpha'])
+        self.Qprofile_points.setMinimum(10)
+        self.Qprofile_points.setMaximum(100)
+        self.Qprofile_points.setValue(polar_sweep.DEFAULTS['profile_numpoints'])
+        self.Qmidribs.setMinimum(0)
+        self.Qmidribs.setMaximum(5)
+        self.Qmidribs.setValue(polar_sweep.DEFAULTS['midribs'])
+        self.Qmass.setMinimum(20)
+        self.Qmass.setMaximum(300)
+        self.Qmass.setValue(polar_sweep.PERFORMANCE['mass'])
+        self.Qsave.setEnabled(False)
+
+        # the speed polar is cheap: it follows the mass while the value is changed
+        self.Qmass.valueChanged.connect(self.solve_const_vert_Force)
+        self.Qrun.clicked.connect(self.create_potential_table)
+        self.Qsave.clicked.connect(self.save_result)
+
+    def sweep_options(self):
+        return {'alpha_min': self.Qalpha_min.value(),
+                'alpha_max': self.Qalpha_max.value(),
+                'num_alpha': self.Qnum_alpha.value(),
+                'profile_numpoints': self.Qprofile_points.value(),
+                'midribs': self.Qmidribs.value()}
+
+    def create_potential_table(self):
+        '''starts the sweep in the background, check_result picks up the result'''
+        if self.future is not None:
+            return
+        root, max_size = cache_settings()
+        self.future = get_executor().submit(
+            polar_sweep.sweep, deepcopy(self.parametric_glider), cache_root=root,
+            max_cache_size=max_size, **self.sweep_options())
+        self.Qrun.setEnabled(False)
+        self.Qstatus.setText('computing...')
+        self.timer.start()
+
+    def check_result(self):
+        if self.future is None or not self.future.done():
+            return
+        self.timer.stop()
+        future, self.future = self.future, None
+        self.Qrun.setEnabled(True)
+        try:
+            self.result, self.line_drag = future.result()
+        except Exception:
+            self.Qstatus.setText('failed')
+            App.Console.PrintError(traceback.format_exc())
+            return
+        self.Qstatus.setText('{} angles computed'.format(len(self.result)))
+        self.Qsave.setEnabled(True)
+        self.alpha = self.result['alpha']
+        self.cL = self.result['cL']
+        self.cDi = self.result['cDi']
+        self.cPi = self.result['cP']
+        self.potentialPlot()
+        self.solve_const_vert_Force()
+
+    def show_canvas(self, canvas):
+        canvas.draw_idle()
         canvas.setWindowFlags(QtCore.Qt.WindowStaysOnTopHint)
         canvas.show()
+        self.canvas.append(canvas)    # keep a reference, else the window is closed
+
+    def potentialPlot(self):
+        canvas = mpl_canvas()
+        if canvas is None:
+            return
+        alpha = np.rad2deg(self.alpha)
+        canvas.plot(alpha, self.cL, label='Lift $c_L$')
+        canvas.plot(alpha, self.cDi * 10, label='Drag $c_{Di} * 10$')
+        canvas.plot(alpha, -self.cPi, label='Pitch -$c_P$')
+        canvas.axes.set_xlabel('$\\alpha$ [deg]')
+        canvas.axes.legend()
+        canvas.axes.grid()
+        self.show_canvas(canvas)
+
+    def save_result(self):
+        path = QtGui.QFileDialog.getSaveFileName(
+            self.form[0], 'save polars', self.obj.Label + '_polars.csv', 'polars (*.csv *.npz)')
+        if isinstance(path, tuple):
+            path = path[0]
+        if not path or self.result is None:
+            return
+        if path.endswith('.npz'):
+            polar_sweep.write_npz([(self.obj.Label, self.result)], path)
+        else:
+            polar_sweep.write_csv([(self.obj.Label, self.result)], path)
+
+    def solve_const_vert_Force(self):
+        '''speed polar of the trimmed glider, recomputed when the pilot mass changes'''
+        if self.result is None:
+            return
+        # the line drag of the sweep, so the polar matches the saved result
+        self.result = polar_sweep.performance(self.result, self.parametric_glider.shape.area,
+                                              self.line_drag, mass=self.Qmass.value())
+        trim = polar_sweep.trim_point(self.result)
+        if trim is None:
+            trim = {'speed': np.nan, 'glide_ratio': np.nan}
+        else:
+            self.Qstatus.setText('trim: {:.1f} m/s, glide ratio {:.2f}'.format(
+                trim['speed'], trim['glide_ratio']))
+        if self.speed_plot is None:
+            canvas = mpl_canvas()
+            if canvas is None:
+                return
+            polar_line, = canvas.plot(self.result['speed'], self.result['glide_ratio'])
+            trim_marker, = canvas.plot([trim['speed']], [trim['glide_ratio']], marker='o')
+            canvas.axes.set_xlabel('speed [m/s]')
+            canvas.axes.set_ylabel('glide ratio')
+            canvas.axes.grid()
+            self.speed_plot = canvas, polar_line, trim_marker
+            self.show_canvas(canvas)
+        else:
+            canvas, polar_line, trim_marker = self.speed_plot
+            polar_line.set_data(self.result['speed'], self.result['glide_ratio'])
+            trim_marker.set_data([trim['speed']], [trim['glide_ratio']])
+            canvas.axes.relim()
+            canvas.axes.autoscale_view()
+            canvas.draw_idle()
+
+    def stop(self):
+        if self.paraBEM:
+            self.timer.stop()
+        if self.future is not None:
+            self.future.cancel()    # a running sweep finishes in the background
 
     def accept(self):
+        self.stop()
         Gui.Control.closeDialog()
 
     def reject(self):
+        self.stop()
         Gui.Control.closeDialog()
 
 
 class PanelTool(BaseTool):
     widget_name = 'Properties'
     hide = True
-    try:
-        paraBEM = __import__('paraBEM')
-        pan3d = __import__('paraBEM.pan3d', globals(), locals(), ['abc'])
-    except ImportError:
-        paraBEM = None
+    drag_budget = 0.03    # s, stream lines traced while the marker is dragged
+    drag_interval = 0.05    # short preview paths while dragging
+    drag_numpoints = 10
 
     def __init__(self, obj):
         super(PanelTool, self).__init__(obj)
+        self.paraBEM = import_paraBEM()
+        if self.paraBEM:
+            self.pan3d = self.paraBEM.pan3d
         if not self.paraBEM:
             self.QWarning = QtGui.QLabel('no panel_method installed')
             self.layout.addWidget(self.QWarning)
         else:
             self.case = None
+            self.case_future = None    # case of a cached solution, solved in the background
+            self.solution = None    # arrays of the solved case (see panel_cache.solution_arrays)
+            self.glider_hash = None
+            self._solution_params = None
+            self.result_vertex_property = None
+            self.tracer = None    # stream lines of the current solution
             self.Qrun = QtGui.QPushButton('run')
             self.Qmidribs = QtGui.QSpinBox()
             self.Qsymmetric = QtGui.QCheckBox()
@@ -186,11 +333,16 @@ class PanelTool(BaseTool):
             self.Qstream_interval = QtGui.QDoubleSpinBox()
             self.Qstream_num = QtGui.QSpinBox()
             self.Qmax_val = QtGui.QDoubleSpinBox()
+            self.Qadaptive = QtGui.QCheckBox()
+            self.Qtolerance = QtGui.QDoubleSpinBox()
             self.Qmin_val = QtGui.QDoubleSpinBox()
             self.cpc = InteractionSeparator()
             self.stream = coin.SoSeparator()
             self.glider_result = coin.SoSeparator()
             self.marker = Marker([[0, 0, 0]], dynamic=True)
+            self.timer = QtCore.QTimer()
+            self.timer.setInterval(100)
+            self.timer.timeout.connect(self.check_case)
             self.setup_widget()
             self.setup_pivy()
 
@@ -215,12 +367,16 @@ class PanelTool(BaseTool):
         self.layout.setWidget(8, input_field, self.Qmin_val)
         self.layout.setWidget(9, text_field, QtGui.QLabel('max_val'))
         self.layout.setWidget(9, input_field, self.Qmax_val)
+        self.layout.setWidget(10, text_field, QtGui.QLabel('adaptive refinement'))
+        self.layout.setWidget(10, input_field, self.Qadaptive)
+        self.layout.setWidget(11, text_field, QtGui.QLabel('tolerance cL, cD [%]'))
+        self.layout.setWidget(11, input_field, self.Qtolerance)
         self.layout.addWidget(self.Qrun)
 
-        self.Qmidribs.setMaximum(5)
+        self.Qmidribs.setMaximum(panel_refinement.MAX_MIDRIBS)
         self.Qmidribs.setMinimum(0)
         self.Qmidribs.setValue(0)
-        self.Qprofile_points.setMaximum(50)
+        self.Qprofile_points.setMaximum(panel_refinement.MAX_PROFILE_NUMPOINTS)
         self.Qprofile_points.setMinimum(10)
         self.Qprofile_points.setValue(20)
         self.Qsymmetric.setChecked(True)
@@ -251,14 +407,22 @@ class PanelTool(BaseTool):
         self.Qmax_val.setValue(1)
         self.Qmax_val.setSingleStep(0.01)
 
+        self.Qadaptive.setChecked(False)
+        self.Qadaptive.setToolTip('start with the given profile points and midribs and '
+                                  'refine until cL and cD change less than the tolerance')
+        self.Qtolerance.setMinimum(0.01)
+        self.Qtolerance.setMaximum(20)
+        self.Qtolerance.setValue(1)
+        self.Qtolerance.setSingleStep(0.1)
+
 
         self.Qstream_points.valueChanged.connect(self.update_stream)
         self.Qstream_radius.valueChanged.connect(self.update_stream)
         self.Qstream_interval.valueChanged.connect(self.update_stream)
         self.Qstream_num.valueChanged.connect(self.update_stream)
 
-        self.Qmin_val.valueChanged.connect(self.show_glider)
-        self.Qmax_val.valueChanged.connect(self.show_glider)
+        self.Qmin_val.valueChanged.connect(self.update_colors)
+        self.Qmax_val.valueChanged.connect(self.update_colors)
 
         self.Qrun.clicked.connect(self.run)
 
@@ -271,115 +435,187 @@ class PanelTool(BaseTool):
         self.marker.on_drag_release.append(self.update_stream)
         self.marker.on_drag.append(self.update_stream_fast)
 
-    def update_stream(self):
-        self.stream.removeAllChildren()
-        if self.case:
-            point = list(self.marker.points[0].getValue())
-            points = numpy.random.random((self.Qstream_points.value(), 3)) - numpy.array([0.5, 0.5, 0.5])
-            points *= self.Qstream_radius.value()
-            points += numpy.array(point)
-            points = points.tolist()
-            for p in points:
-                pts = self.stream_line(p, self.Qstream_interval.value(), self.Qstream_num.value())
-                self.stream.addChild(Line(pts, dynamic=False))
+    def stream_seeds(self):
+        point = numpy.array(self.marker.points[0].getValue())
+        offsets = streamlines.seed_offsets(self.Qstream_points.value())
+        return point + offsets * self.Qstream_radius.value()
+
+    def update_stream(self, *args):
+        self.draw_stream(self.Qstream_interval.value(), self.Qstream_num.value())
 
     def update_stream_fast(self):
+        self.draw_stream(self.drag_interval, self.drag_numpoints, self.drag_budget)
+
+    def draw_stream(self, interval, numpoints, budget=None):
+        '''all stream lines with one line set, with a budget [s] slow seeds are skipped'''
         self.stream.removeAllChildren()
-        if self.case:
-            point = list(self.marker.points[0].getValue())
-            pts = self.stream_line(point, 0.05, 10)
-            self.stream.addChild(Line(pts, dynamic=False))
+        if self.solution is None or self.case is None:
+            return    # the case of a cached solution is not solved yet (see check_case)
+        with profiling.timed('stream lines'):
+            paths = self.get_tracer().trace(self.stream_seeds(), interval, numpoints, budget)
+        vertices, line_index = mesh_utils.polyline_arrays([p for p in paths if p is not None])
+        material = coin.SoMaterial()
+        material.diffuseColor = COLORS['black']
+        vertex_property = coin.SoVertexProperty()
+        set_field_values(vertex_property.vertex, vertices)
+        line_set = coin.SoIndexedLineSet()
+        set_field_values(line_set.coordIndex, line_index)
+        self.stream += [material, vertex_property, line_set]
+
+    def get_tracer(self):
+        if self.tracer is None:
+            self.tracer = streamlines.StreamlineTracer(
+                self.flow_path, num_workers=get_parameter('num_stream_threads'))
+        return self.tracer
+
+    def flow_path(self, point, interval, numpoints):
+        return self.case.flow_path(self.paraBEM.Vector3(*point), interval, numpoints)
 
     def update_glider(self):
         self.obj.ViewObject.num_ribs = self.Qmidribs.value()
         self.obj.ViewObject.profile_num = self.Qprofile_points.value()
 
-    def stream_line(self, point, interval, numpoints):
-        flow_path = self.case.flow_path(self.paraBEM.Vector3(*point), interval, numpoints)
-        return [[p.x, p.y, p.z] for p in flow_path]
-
-    def create_panels(self, midribs=0, profile_numpoints=10, mean=False, symmetric=True):
-        self._vertices, self._panels, self._trailing_edges = paraBEM_Panels(
-            self.parametric_glider.get_glider_3d(),
-            midribs=midribs,
-            profile_numpoints=profile_numpoints,
-            num_average=mean*5,
-            distribution=Distribution.from_nose_cos_distribution(0.2),
-            symmetric=symmetric)
-
+    def panel_params(self):
+        return dict(midribs=self.Qmidribs.value(),
+                    profile_numpoints=self.Qprofile_points.value(),
+                    num_average=self.Qmean_profile.isChecked() * 5,
+                    symmetric=self.Qsymmetric.isChecked())
+
+    def solve_case(self, params):
+        '''the solved case and its panels, doesn't change the tool (also runs in the background)'''
+        vertices, panels, trailing_edges = cached_panels(
+            self.paraBEM, self.parametric_glider, self.glider_hash, **params)
+        case = self.pan3d.DirichletDoublet0Source0Case3(panels, trailing_edges)
+        case.v_inf = self.paraBEM.Vector(self.parametric_glider.v_inf)
+        case.A_ref = self.parametric_glider.shape.area    # cL, cD
+        case.farfield = 5
+        case.create_wake(9999, 10)
+        with profiling.timed('panel method'):
+            case.run()
+        return case, panels
+
+    def build_case(self):
+        '''
+        the case of a cached solution is only needed for the stream lines, it is
+        solved in the background and the stream lines are drawn once it is ready
+        '''
+        self.cancel_case()
+        self.case_future = get_executor().submit(self.solve_case, self._solution_params)
+        self.timer.start()
+
+    def check_case(self):
+        if self.case_future is None or not self.case_future.done():
+            return
+        self.timer.stop()
+        future, self.case_future = self.case_future, None
+        try:
+            self.case, self._panels = future.result()
+        except Exception:
+            App.Console.PrintError(traceback.format_exc())
+            return
+        self.update_stream()
+
+    def cancel_case(self):
+        self.timer.stop()
+        if self.case_future is not None:
+            self.case_future.cancel()    # a running case finishes in the background
+            self.case_future = None
+
+    def solve_params(self, params):
+        '''
+        solution arrays of the panel parameters, read from the panel cache if possible,
+        and whether they were read from the cache
+        '''
+        key = panel_cache.entry_key('solution', self.glider_hash, farfield=5, wake=[9999, 10], **params)
+        root, _ = cache_settings()
+        self.cancel_case()
+        self.case = None
+        self._solution_params = params
+        solution = panel_cache.load(root, key)
+        if solution is not None:
+            return solution, True
+        self.case, self._panels = self.solve_case(params)
+        solution = panel_cache.solution_arrays(self.case, self._panels)
+        if root is not None:
+            save_cache(key, solution)
+        return solution, False
+
+    @profiling.profile()
     def run(self):
         self.update_glider()
-        self.create_panels(self.Qmidribs.value(), self.Qprofile_points.value(),
-                           self.Qmean_profile.isChecked(), self.Qsymmetric.isChecked())
-        del self.case
-        self.case = self.pan3d.DirichletDoublet0Source0Case3(self._panels, self._trailing_edges)
-        self.case.v_inf = self.paraBEM.Vector(self.parametric_glider.v_inf)
-        self.case.farfield = 5
-        self.case.create_wake(9999, 10)
-        self.case.run()
+        params = self.panel_params()
+        self.reset_tracer()
+        if self.glider_hash is None:
+            self.glider_hash = panel_cache.glider_key(self.parametric_glider)
+        if self.Qadaptive.isChecked():
+            self.solution, params, report = panel_refinement.adaptive_solve(
+                self.solve_params, params, tol=self.Qtolerance.value() / 100)
+            App.Console.PrintMessage(panel_refinement.format_report(report) + '\n')
+            self.Qprofile_points.setValue(params['profile_numpoints'])
+            self.Qmidribs.setValue(params['midribs'])
+            self.update_glider()
+        else:
+            self.solution = self.solve_params(params)[0]
+        if self.case is None:
+            self.build_case()
         self.show_glider()
 
+    def reset_tracer(self):
+        if self.tracer is not None:
+            self.tracer.shutdown()
+            self.tracer = None
+
+    def accept(self):
+        if self.paraBEM:
+            self.cancel_case()
+            self.reset_tracer()
+        super(PanelTool, self).accept()
+
+    def reject(self):
+        if self.paraBEM:
+            self.cancel_case()
+            self.reset_tracer()
+        super(PanelTool, self).reject()
+
     def show_glider(self):
+        '''draws the solution, the face index is built once per solution (see update_colors)'''
         self.glider_result.removeAllChildren()
-        verts = [list(i) for i in self.case.vertices]
-        cols = [i.cp for i in self.case.vertices]
-        pols = []
-        pols_i =[]
-        count = 0
-        count_krit = (self.Qmidribs.value() + 1) * (self.Qprofile_points.value() - self.Qprofile_points.value() % 2)
-        for pan in self._panels[::-1]:
-            count += 1
-            for vert in pan.points:
-                #verts.append(list(vert))
-                pols_i.append(vert.nr)
-            pols_i.append(-1)     # end of pol
-            if count % count_krit == 0:
-                pols.append(pols_i)
-                pols_i = []
-        if pols_i:
-            pols.append(pols_i)
-        vertex_property = coin.SoVertexProperty()
+        self.result_vertex_property = None
+        if self.solution is None:
+            return
+        params = self._solution_params
+        count_krit = (params['midribs'] + 1) * (params['profile_numpoints'] - params['profile_numpoints'] % 2)
+        face_indices = mesh_utils.panel_face_index(np.asarray(self.solution['panels'])[::-1], count_krit)
 
-        for i, col in enumerate(cols):
-            vertex_property.orderedRGBA.set1Value(i, coin.SbColor(self.color(col)).getPackedValue())
-            
-        vertex_property.vertex.setValues(0, len(verts), verts)
+        vertex_property = coin.SoVertexProperty()
+        set_field_values(vertex_property.vertex, np.ascontiguousarray(self.solution['vertices'], dtype=np.float32))
         vertex_property.materialBinding = coin.SoMaterialBinding.PER_VERTEX_INDEXED
-
         vertex_property.normalBinding = coin.SoNormalBinding.PER_FACE
+        self.result_vertex_property = vertex_property
+        self.update_colors()
 
         shape_hint = coin.SoShapeHints()
         shape_hint.vertexOrdering = coin.SoShapeHints.COUNTERCLOCKWISE
         shape_hint.creaseAngle = numpy.pi / 2
         self.glider_result.addChild(shape_hint)
         self.glider_result.addChild(vertex_property)
-        for panels in pols:
+        for face_index in face_indices:
             face_set = coin.SoIndexedFaceSet()
-            face_set.coordIndex.setValues(0, len(panels), panels)
+            set_field_values(face_set.coordIndex, face_index)
             self.glider_result.addChild(face_set)
 
-
-        p1 = numpy.array(self.case.center_of_pressure)
-        f = numpy.array(self.case.force)
+        p1 = numpy.array(self.solution['center_of_pressure'])
+        f = numpy.array(self.solution['force'])
         line = Line([p1, p1 + f])
         self.glider_result.addChild(line)
 
-    def color(self, value):
-        def f(n, i, x):
-            if ((i - 1) / n) < x < (i / n):
-                return (n * x + 1 - i)
-            elif (i / n) <= x < ((i + 1) / n):
-                return  (- n * x + 1 + i)
-            else:
-                return 0
-        max_val=self.Qmax_val.value()
-        min_val=self.Qmin_val.value()
-        red = numpy.array(COLORS['red'])
-        blue = numpy.array(COLORS['blue'])
-        yellow = numpy.array(COLORS['yellow'])
-        white = numpy.array(COLORS['white'])
-        norm_val = (value - min_val) / (max_val - min_val)
-        return list(f(3, 0, norm_val) * red + f(3,1,norm_val) * yellow + f(3,2,norm_val) * white + f(3,3,norm_val) * blue)
+    def update_colors(self):
+        '''colors the vertices by cp, only the colors are uploaded again if min_val / max_val change'''
+        if self.result_vertex_property is None:
+            return
+        rgb = mesh_utils.colormap(self.solution['cp'], self.Qmin_val.value(), self.Qmax_val.value(),
+                                  [COLORS[name] for name in CP_COLORS])
+        set_field_values(self.result_vertex_property.orderedRGBA, mesh_utils.pack_rgba(rgb))
 
 
 def create_fem_dict(par_glider):
@@ -11,6 +11,7 @@ import FreeCADGui as Gui
 
 from openglider.vector.spline import Bezier
 
+from .. import profiling
 from ._tools import BaseTool, text_field, input_field
 from .pivy_primitives import Line, vector3D, vector2D, ControlPointContainer
 
@@ -58,6 +59,7 @@ class ShapeTool(BaseTool):
         self.setup_pivy()
         Gui.SendMsgToActiveView('ViewFit')
 
+    @profiling.profile()
     def accept(self):
         self.parametric_glider.rescale_curves()
         self.back_cpc.remove_callbacks()
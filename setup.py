@@ -11,4 +11,7 @@ setup(name='freecad-glider',
       url="https://github.com/booya/freecad_glider",
       description="FreeCAD wb for Openglider",
       install_requires=['openglider'],
+      entry_points={'console_scripts': [
+          'freecad_glider = freecad.freecad_glider.batch:main',
+          'freecad_glider_polars = freecad.freecad_glider.polar_sweep:main']},
 include_package_data=True)
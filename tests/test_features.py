@@ -0,0 +1,62 @@
+import copy
+import unittest
+
+import numpy as np
+
+from freecad.freecad_glider.mesh_utils import shark_nose
+
+
+def shark_nose_loop(airfoil_data, x1, x2, x3, y_add):
+    '''the per-point loop SharkFeature.apply used before shark_nose'''
+    data = []
+    for x, y in copy.copy(airfoil_data):
+        if y < 0:
+            if x > x1 and x < x2:
+                y -= y_add * (x - x1) / (x2 - x1)
+            elif x > x2 and x < x3:
+                y -= y_add * (x3 - x) / (x3 - x2)
+        data.append([x, y])
+    return np.array(data)
+
+
+def random_profiles(num_ribs, num_points, seed=0):
+    random = np.random.RandomState(seed)
+    x = random.random_sample((num_ribs, num_points))
+    y = random.random_sample((num_ribs, num_points)) * 0.2 - 0.1
+    return np.stack([x, y], axis=2)
+
+
+class TestSharkNose(unittest.TestCase):
+    x1, x2, x3, y_add = 0.05, 0.1, 0.25, 0.1
+
+    def test_reference_loop(self):
+        profiles = random_profiles(10, 200)
+        result = shark_nose(profiles, self.x1, self.x2, self.x3, self.y_add)
+        for profile, deformed in zip(profiles, result):
+            expected = shark_nose_loop(profile, self.x1, self.x2, self.x3, self.y_add)
+            self.assertLess(np.abs(deformed - expected).max(), 1e-14)
+
+    def test_input_unchanged(self):
+        profiles = random_profiles(3, 50)
+        original = profiles.copy()
+        shark_nose(profiles, self.x1, self.x2, self.x3, self.y_add)
+        np.testing.assert_array_equal(profiles, original)
+
+    def test_x2(self):
+        profiles = np.array([[[self.x2, -0.01], [self.x2, 0.01]]])
+        for quadratic in (False, True):
+            result = shark_nose(profiles, self.x1, self.x2, self.x3, self.y_add, quadratic)
+            self.assertAlmostEqual(result[0, 0, 1], -0.01 - self.y_add)
+            self.assertEqual(result[0, 1, 1], 0.01)
+
+    def test_quadratic(self):
+        profiles = random_profiles(2, 100, seed=1)
+        linear = shark_nose(profiles, self.x1, self.x2, self.x3, self.y_add)
+        quadratic = shark_nose(profiles, self.x1, self.x2, self.x3, self.y_add, quadratic=True)
+        # the quadratic deformation is never deeper than the linear one
+        self.assertTrue((quadratic[..., 1] >= linear[..., 1] - 1e-15).all())
+        np.testing.assert_array_equal(quadratic[..., 0], profiles[..., 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
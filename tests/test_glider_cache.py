@@ -0,0 +1,55 @@
+import base64
+import io
+import json
+import unittest
+import zipfile
+
+from freecad.freecad_glider import glider_cache
+from freecad.freecad_glider import persistence
+
+
+def glider_tree(date='2026-01-01', offset=0.):
+    return {'MetaData': {'date_created': date},
+            'data': {'_type': 'ParametricGlider',
+                     'profile': [[i / 20., 0.1 + offset] for i in range(20)],
+                     'name': 'test'}}
+
+
+def compact_state(tree, date_time=None):
+    '''persistence.dumps of a jsonify-tree, the zip entries with another time'''
+    buffer = io.BytesIO()
+    persistence.write_archive(buffer, *persistence.pack_tree(tree))
+    data = buffer.getvalue()
+    if date_time is not None:
+        out = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(data)) as archive, zipfile.ZipFile(out, 'w') as rewritten:
+            for info in archive.infolist():
+                rewritten.writestr(zipfile.ZipInfo(info.filename, date_time), archive.read(info))
+        assert out.getvalue() != data
+        data = out.getvalue()
+    return {'format': persistence.FORMAT, 'version': persistence.VERSION,
+            'data': base64.b64encode(data).decode('ascii')}
+
+
+class TestStateKey(unittest.TestCase):
+    def test_archive_time(self):
+        tree = glider_tree()
+        self.assertEqual(glider_cache.state_key(compact_state(tree)),
+                         glider_cache.state_key(compact_state(tree, (2000, 1, 1, 0, 0, 0))))
+
+    def test_formats(self):
+        tree = glider_tree()
+        self.assertEqual(glider_cache.state_key(json.dumps(tree)),
+                         glider_cache.state_key(compact_state(tree)))
+
+    def test_metadata(self):
+        self.assertEqual(glider_cache.state_key(compact_state(glider_tree('2026-01-01'))),
+                         glider_cache.state_key(compact_state(glider_tree('2026-02-01'))))
+
+    def test_changed_glider(self):
+        self.assertNotEqual(glider_cache.state_key(compact_state(glider_tree())),
+                            glider_cache.state_key(compact_state(glider_tree(offset=1e-9))))
+
+
+if __name__ == '__main__':
+    unittest.main()
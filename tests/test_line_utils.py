@@ -0,0 +1,114 @@
+import unittest
+
+import numpy as np
+
+from freecad.freecad_glider import line_utils
+
+
+class Node(object):
+    def __init__(self, vec):
+        self.vec = np.array(vec, dtype=float)
+
+
+class Line(object):
+    '''the parts of openglider's Line used by line_utils'''
+    lineload = 2.
+    force_projected = 4.
+
+    def __init__(self, lower, upper, sag_par_1=None, sag_par_2=None):
+        self.lower_node, self.upper_node = Node(lower), Node(upper)
+        self.sag_par_1, self.sag_par_2 = sag_par_1, sag_par_2
+        self.force = None
+        diff = self.upper_node.vec - self.lower_node.vec
+        self.length_projected = np.linalg.norm(diff)
+        ortho = np.cross(diff, [0., 1., 0.])
+        self.ortho_vec = ortho / np.linalg.norm(ortho)
+
+    def get_line_point(self, x):
+        point = self.lower_node.vec * (1. - x) + self.upper_node.vec * x
+        if self.sag_par_1 is None or self.sag_par_2 is None:
+            return point
+        xs = x * self.length_projected
+        u = -xs ** 2 / 2 * self.lineload / self.force_projected + xs * self.sag_par_1 + self.sag_par_2
+        return point + self.ortho_vec * u
+
+    def get_line_points(self, numpoints=10):
+        return [self.get_line_point(x) for x in np.linspace(0, 1, numpoints)]
+
+
+class LineSet(object):
+    '''recalc / calc_sag of a lineset, calc_sag gives the sag of recalc if consistent'''
+    def __init__(self, consistent=True):
+        self.lines = [Line([0, 0, 0], [1, 0, 5]), Line([1, 0, 5], [2, 0, 8])]
+        self.consistent = consistent
+        self.calls = []
+
+    def recalc(self, calculate_sag=True):
+        self.calls.append(('recalc', calculate_sag))
+        for i, line in enumerate(self.lines):
+            line.force = 10. + i
+            line.sag_par_1 = line.sag_par_2 = None
+        if calculate_sag:
+            self._sag(0.1)
+
+    def calc_sag(self):
+        self.calls.append(('calc_sag',))
+        self._sag(0.1 if self.consistent else 0.2)
+
+    def _sag(self, par_1):
+        for line in self.lines:
+            line.sag_par_1, line.sag_par_2 = par_1, 0.
+
+
+class TestRecalc(unittest.TestCase):
+    def setUp(self):
+        line_utils._split_sag = None
+
+    def tearDown(self):
+        line_utils._split_sag = None
+
+    def test_split(self):
+        lineset = LineSet()
+        stage_timings = line_utils.recalc(lineset)
+        self.assertEqual(set(stage_timings), {'forces', 'sag'})
+        self.assertTrue(line_utils._split_sag)
+        lineset.calls = []
+        line_utils.recalc(lineset)
+        self.assertEqual(lineset.calls, [('recalc', False), ('calc_sag',)])
+
+    def test_inconsistent_split(self):
+        lineset = LineSet(consistent=False)
+        stage_timings = line_utils.recalc(lineset)
+        self.assertEqual(set(stage_timings), {'forces'})
+        self.assertIs(line_utils._split_sag, False)
+        self.assertEqual(lineset.lines[0].sag_par_1, 0.1)    # the result of the combined call
+        lineset.calls = []
+        line_utils.recalc(lineset)
+        self.assertEqual(lineset.calls, [('recalc', True)])
+
+    def test_no_sag(self):
+        lineset = LineSet()
+        self.assertEqual(set(line_utils.recalc(lineset, sag=False)), {'forces'})
+        self.assertEqual(lineset.calls, [('recalc', False)])
+        self.assertIsNone(line_utils._split_sag)
+
+
+class TestLinePoints(unittest.TestCase):
+    def test_sagged_lines(self):
+        lines = [Line([0, 0, 0], [1, 0, 5]), Line([1, 0, 5], [2, 0, 8], 0.1, 0.01),
+                 Line([2, 0, 8], [2, 1, 9], -0.2, 0.)]
+        for points, line in zip(line_utils.line_points(lines, 7), lines):
+            self.assertLess(np.abs(points - line.get_line_points(numpoints=7)).max(), 1e-12)
+
+    def test_fallback(self):
+        # a sag formula which differs from the vectorized one: sampled line by line
+        class OtherLine(Line):
+            def get_line_point(self, x):
+                return Line.get_line_point(self, x) + (self.sag_par_1 or 0.)
+        lines = [OtherLine([0, 0, 0], [1, 0, 5]), OtherLine([1, 0, 5], [2, 0, 8], 0.1, 0.01)]
+        for points, line in zip(line_utils.line_points(lines, 5), lines):
+            np.testing.assert_array_equal(points, line.get_line_points(numpoints=5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+
+from freecad.freecad_glider import panel_refinement
+
+
+def grid_solution(num_ribs=4, num_points=6):
+    '''a flat panel grid with cp jumps along the span only (midribs are refined)'''
+    y, x = np.meshgrid(np.linspace(0, 3, num_ribs), np.linspace(0, 1, num_points), indexing='ij')
+    vertices = np.stack([x.ravel(), y.ravel(), np.zeros(x.size)], axis=1)
+    index = np.arange(x.size).reshape(x.shape)
+    panels = np.array([[index[i, j], index[i, j + 1], index[i + 1, j + 1], index[i + 1, j]]
+                       for i in range(num_ribs - 1) for j in range(num_points - 1)])
+    return {'vertices': vertices, 'panels': panels, 'cp': y.ravel()}
+
+
+class TestAdaptiveSolve(unittest.TestCase):
+    def test_not_converged(self):
+        solved = []
+
+        def solve(params):
+            solved.append(dict(params))
+            solution = grid_solution()
+            # cL changes by 10% per level, never converges
+            solution['cL'] = np.array(1.1 ** len(solved))
+            solution['cD'] = np.array(0.05)
+            return solution, False
+
+        params = {'profile_numpoints': 20, 'midribs': 0}
+        solution, last_params, report = panel_refinement.adaptive_solve(
+            solve, params, tol=0.01, max_levels=3)
+        self.assertEqual(len(solved), 3)
+        self.assertEqual([p['midribs'] for p in solved], [0, 1, 2])
+        # the parameters of the returned solution, not of an unsolved next level
+        self.assertEqual(last_params, solved[-1])
+        self.assertEqual(float(solution['cL']), 1.1 ** 3)
+        self.assertFalse(report[-1]['converged'])
+        self.assertEqual(report[-1]['midribs'], last_params['midribs'])
+
+    def test_converged(self):
+        def solve(params):
+            solution = grid_solution()
+            solution['cL'] = np.array(1.)
+            solution['cD'] = np.array(0.05)
+            return solution, True
+
+        solution, params, report = panel_refinement.adaptive_solve(
+            solve, {'profile_numpoints': 20, 'midribs': 0}, tol=0.01)
+        self.assertEqual(len(report), 2)
+        self.assertTrue(report[-1]['converged'])
+        self.assertEqual(params['midribs'], report[-1]['midribs'])
+
+
+if __name__ == '__main__':
+    unittest.main()